@@ -1,10 +1,16 @@
 import streamlit as st
-import pandas as pd
 import os
 from datetime import datetime
 
-# Your existing custom functions
-# from your_script import clean_path, first_time_unique_code_run_pfp, first_time_run_pfp, simple_gba_tab, simple_team_tab
+from cpw_engine import ingest
+from cpw_engine.pfp import first_time_run_pfp, first_time_unique_code_run_pfp
+
+
+@st.cache_data(show_spinner=False, max_entries=2)
+def parse_upload(fingerprint, _uploaded_file):
+    """Parses the upload from memory once per content fingerprint, reruns reuse the parse"""
+    return ingest.parse_upload(_uploaded_file)
+
 
 process_tabs = st.tabs(["1st Time Run", "Maintenance"])
 
@@ -30,19 +36,32 @@ with process_tabs[0]:
         uploaded_file = st.file_uploader("📂 Upload RAW PFP Excel File", type=["xlsx", "xls"], key="pfp_file_uploader")
 
         if uploaded_file is not None:
-            # Save the uploaded file to a fixed folder
-            save_dir = os.path.join(os.getcwd(), "Uploaded_PFP_Files")
+            # Save the uploaded file to a fixed folder, in the background and only when it changed
+            save_dir = os.path.join(os.getcwd(), ingest.UPLOAD_FOLDER)
             os.makedirs(save_dir, exist_ok=True)
-            saved_path = os.path.join(save_dir, uploaded_file.name)
-
-            with open(saved_path, "wb") as f:
-                f.write(uploaded_file.getbuffer())
-
-            # ✅ Display actual saved path
-            st.success(f"✅ File uploaded and saved at:\n`{saved_path}`")
+            buffer = ingest.upload_buffer(uploaded_file)
+            fingerprint = ingest.upload_fingerprint(buffer)
+            # The save runs across reruns, keep its Future so a rerun checks on it instead of saving again
+            pending = st.session_state.get("pfp_upload_save")
+            if not pending or pending[0] != fingerprint:
+                saved_path, save_future = ingest.save_upload(buffer, uploaded_file.name, save_dir, fingerprint)
+                st.session_state["pfp_upload_save"] = (fingerprint, saved_path, save_future)
+            else:
+                _, saved_path, save_future = pending
+
+            # The upload is parsed from memory, it does not wait for the disk copy
+            if not save_future.done():
+                st.info(f"💾 Saving a copy to `{saved_path}`...")
+            elif save_future.exception() is not None:
+                # Forget the failed save, the next rerun tries again
+                st.session_state.pop("pfp_upload_save", None)
+                st.error(f"❌ Could not save the uploaded file: {save_future.exception()}")
+            else:
+                # ✅ Display actual saved path
+                st.success(f"✅ File uploaded and saved at:\n`{saved_path}`")
 
             try:
-                df_raw = pd.read_excel(saved_path)
+                df_raw = parse_upload(fingerprint, uploaded_file)
                 st.write(f"📊 Raw Data: {df_raw.shape[0]} rows")
                 st.dataframe(df_raw.head(3))
 
@@ -64,7 +83,7 @@ with process_tabs[0]:
                 if st.session_state.get("add_unique_clicked", False):
                     if st.button("Clean & Save", key="clean_pfp_btn"):
                         unique_df = st.session_state.get("unique_df")
-                        cleaned_df = first_time_run_pfp(unique_df)
+                        cleaned_df, _ = first_time_run_pfp(unique_df)
 
                         final_date_str = datetime.now().strftime('%Y-%m-%d')
                         cleaned_file_name = f"Project Plan Analysis-continuous-{final_date_str}.xlsx"
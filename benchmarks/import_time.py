@@ -0,0 +1,85 @@
+"""
+Import-time benchmark for the Streamlit entry point and the engine.
+
+Imports each module in a fresh interpreter with `-X importtime`, reports the
+wall time and the slowest imports, and fails when a budget is exceeded or a
+heavy subsystem (pandas, xlwings, office365, ...) is imported eagerly.
+
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --budget-ms 1500 --repeat 5
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# module -> heavy top-level packages it must not import at startup
+TARGETS = {
+    "main_ui": ["pandas", "openpyxl", "xlwings", "office365", "dotenv"],
+    "cpw_engine": ["streamlit", "pandas", "openpyxl", "xlwings", "office365", "dotenv"],
+}
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+loaded = sorted({{name.split('.')[0] for name in sys.modules}})
+print(json.dumps([elapsed, loaded]))
+"""
+
+
+def measure(module: str):
+    """Returns (seconds, loaded top-level packages, -X importtime lines) for one cold import"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE.format(module=module)],
+        cwd=REPO_ROOT, capture_output=True, text=True, check=True,
+    )
+    elapsed, loaded = json.loads(result.stdout.strip().splitlines()[-1])
+    return elapsed, set(loaded), result.stderr.splitlines()
+
+
+def slowest_imports(importtime_lines, top=10):
+    """Parses `-X importtime` output into the top (cumulative us, package) entries"""
+    entries = []
+    for line in importtime_lines:
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        entries.append((int(cumulative), name.strip()))
+    return sorted(entries, reverse=True)[:top]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--budget-ms", type=float, default=3000, help="Max median cold import time per module")
+    parser.add_argument("--repeat", type=int, default=3, help="Cold imports per module")
+    parser.add_argument("--top", type=int, default=10, help="Slowest imports to list")
+    args = parser.parse_args(argv)
+
+    failures = []
+    for module, forbidden in TARGETS.items():
+        runs = [measure(module) for _ in range(max(1, args.repeat))]
+        times = sorted(run[0] * 1000 for run in runs)
+        median_ms = times[len(times) // 2]
+        eager = sorted(set(forbidden) & runs[-1][1])
+
+        print(f"{module}: median {median_ms:.0f} ms over {len(times)} run(s)")
+        for cumulative_us, name in slowest_imports(runs[-1][2], args.top):
+            print(f"    {cumulative_us / 1000:8.1f} ms  {name}")
+
+        if median_ms > args.budget_ms:
+            failures.append(f"{module} import took {median_ms:.0f} ms (budget {args.budget_ms:.0f} ms)")
+        if eager:
+            failures.append(f"{module} eagerly imports {', '.join(eager)}")
+
+    for failure in failures:
+        print(f"FAIL: {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
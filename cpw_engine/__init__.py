@@ -0,0 +1,47 @@
+"""
+CPW Tool engine: PFP processing and GBA/Team exports without Streamlit.
+
+User-facing messages are emitted through a Reporter (see events.py), so the
+same functions back the Streamlit app, the CLI (`python -m cpw_engine`) and
+scheduled jobs.
+
+Only the stdlib-only modules (events, paths) are imported with the package.
+The heavy subsystems (pandas-based PFP engine, xlwings exporters) are
+submodules loaded on first attribute access, e.g.
+`cpw_engine.pfp.first_time_run_pfp` or `from cpw_engine import run_gba_export`.
+"""
+import importlib
+
+from .events import Event, Reporter, silent_reporter
+from .paths import (clean_file_name, clean_path, derive_gba_file_path,
+                    derive_team_file_path, file_fingerprint)
+
+_SUBMODULES = {"archive", "batch", "cli", "excel", "explorer", "forecast", "gba", "ingest", "journal", "keys",
+               "pfp", "plan", "schema", "team", "watch", "weeks", "workqueue", "writer"}
+
+_LAZY_EXPORTS = {
+    "compare_pfp_weeks": "pfp",
+    "diff_pfp_weeks": "pfp",
+    "first_time_run_pfp": "pfp",
+    "first_time_unique_code_run_pfp": "pfp",
+    "process_raw_pfp": "pfp",
+    "save_new_pfp": "pfp",
+    "export_gba_data_to_files": "gba",
+    "run_gba_export": "gba",
+    "export_team_data_to_files": "team",
+    "run_team_export": "team",
+}
+
+
+def __getattr__(name):
+    if name in _SUBMODULES:
+        return importlib.import_module(f"{__name__}.{name}")
+    if name in _LAZY_EXPORTS:
+        value = getattr(importlib.import_module(f"{__name__}.{_LAZY_EXPORTS[name]}"), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | _SUBMODULES | set(_LAZY_EXPORTS))
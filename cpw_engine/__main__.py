@@ -0,0 +1,5 @@
+from .cli import main
+
+# Guarded: spawned worker processes import this module again as __mp_main__
+if __name__ == "__main__":
+    raise SystemExit(main())
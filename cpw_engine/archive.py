@@ -0,0 +1,336 @@
+"""
+Rolling archive of the GBA and Team workbooks.
+
+Maintenance runs only append to "Project Plan Analysis" (GBA) and "Oracle"
+(Team), so the workbooks grow every week. archive_workbook moves the rows
+that are stale into zstd-compressed Parquet parts next to the workbook and
+deletes them from the live sheet:
+
+    <workbook folder> \\ Archive \\ <workbook name> \\ <sheet> \\ part-<timestamp>.parquet
+
+Oracle Date is the date a row was appended, i.e. when its Unique Code was
+first seen, so a running assignment keeps its old date. A row is only stale
+when its Oracle Date is older than a number of weeks and it no longer counts:
+
+- on a sheet with week columns (Team "Oracle"), it has no allocation in this
+  week or any later one, so the capacity forecast does not read it;
+- on a sheet without (GBA "Project Plan Analysis"), its Unique Code is not
+  in the BA's current cleaned PFP. Without a current PFP nothing is archived.
+
+read_history returns the archived rows plus the live sheet, so the full
+history stays queryable while the workbook stays roughly constant in size.
+
+Deleting rows moves the live rows up, so a workbook with an unfinished export
+in its journal is not archived, and the start rows saved exports recorded are
+moved up with the rows.
+"""
+import glob
+import os
+import re
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from .events import Reporter
+from .excel import excel_session, open_workbook, save_workbook
+from .forecast import _contiguous_runs, find_header_row, parse_week_header, week_key, week_keys
+from .journal import shift_start_rows, unsaved_entries
+
+ARCHIVE_FOLDER = "Archive"
+DATE_HEADER = "Oracle Date"
+CODE_HEADER = "Unique Code"
+DEFAULT_ARCHIVE_WEEKS = 26
+
+# Sheet -> password it is protected with (None: not protected)
+ARCHIVE_SHEETS = {
+    "Project Plan Analysis": None,
+    "Oracle": "1234",
+}
+
+WORKBOOK_PATTERNS = ("CPW Tool_*_Main.xlsm", "CPW Tool_*_Team.xlsm")
+
+
+def archive_dir_for(workbook_path: str, sheet_name: str) -> str:
+    folder, name = os.path.split(os.path.abspath(workbook_path))
+    sheet_slug = re.sub(r"[^\w\-]+", "_", sheet_name).strip("_")
+    return os.path.join(folder, ARCHIVE_FOLDER, os.path.splitext(name)[0], sheet_slug)
+
+
+def _column_names(headers) -> list:
+    """Header row as unique, non-empty column names ("Column N" for blanks)"""
+    names = []
+    for position, header in enumerate(headers, start=1):
+        name = str(header).strip() if header is not None and str(header).strip() else f"Column {position}"
+        while name in names:
+            name = f"{name} ({position})"
+        names.append(name)
+    return names
+
+
+def sheet_frame(values) -> tuple:
+    """
+    Rows of a sheet's used range below the Oracle Date header row.
+
+    Returns:
+        tuple: (DataFrame with one column per header, header row index in values),
+        (empty DataFrame, None) when the sheet has no Oracle Date header
+    """
+    values = [list(row) if isinstance(row, (list, tuple)) else [row] for row in (values or [])]
+    header_row = find_header_row(values, lambda cell: str(cell or "").strip() == DATE_HEADER)
+    if header_row is None:
+        return pd.DataFrame(), None
+    columns = _column_names(values[header_row])
+    body = [row for row in values[header_row + 1:] if any(cell not in (None, "") for cell in row)]
+    return pd.DataFrame(body, columns=columns, dtype=object), header_row
+
+
+def _archive_types(frame: pd.DataFrame) -> pd.DataFrame:
+    """Oracle Date as datetime, every other column as string, so parts always share one schema"""
+    typed = frame.astype("string")
+    typed[DATE_HEADER] = pd.to_datetime(frame[DATE_HEADER], errors="coerce", dayfirst=True, format="mixed")
+    return typed
+
+
+def write_archive_part(frame: pd.DataFrame, archive_dir: str) -> str:
+    """Writes frame as a new zstd Parquet part (atomically) and returns its path"""
+    os.makedirs(archive_dir, exist_ok=True)
+    part_path = os.path.join(archive_dir, f"part-{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}.parquet")
+    tmp_file = f"{part_path}.tmp"
+    _archive_types(frame).to_parquet(tmp_file, index=False, compression="zstd")
+    os.replace(tmp_file, part_path)
+    return part_path
+
+
+def stale_rows(frame: pd.DataFrame, headers, cutoff: date, today: date = None,
+               current_codes=None) -> np.ndarray:
+    """
+    Rows of frame (see sheet_frame) to archive: Oracle Date before cutoff and,
+    with week columns in headers (by sheet column), no allocation from this week on; without
+    week columns, a Unique Code missing from current_codes (no row when
+    current_codes is None). Rows without a readable date are never stale.
+    """
+    today = today or date.today()
+    dates = pd.to_datetime(frame[DATE_HEADER], errors="coerce", dayfirst=True, format="mixed")
+    is_old = (dates < pd.Timestamp(cutoff)).to_numpy()
+    weeks = week_keys(headers, today)
+    if weeks:
+        this_week = week_key(*today.isocalendar()[:2])
+        upcoming = [position for position, week in weeks.items() if week >= this_week]
+        allocation = frame.iloc[:, upcoming].apply(pd.to_numeric, errors="coerce").fillna(0.0)
+        return is_old & ~(allocation > 0).any(axis=1).to_numpy()
+    if current_codes is None or CODE_HEADER not in frame.columns:
+        return np.zeros(len(frame), dtype=bool)
+    codes = frame[CODE_HEADER].astype("string").str.strip()
+    return is_old & ~codes.isin(set(current_codes)).fillna(False).to_numpy(dtype=bool)
+
+
+def archive_sheet(sheet, archive_dir: str, cutoff: date, today: date = None, current_codes=None):
+    """
+    Moves the stale rows of sheet (see stale_rows) into a Parquet part and
+    deletes them from the sheet, bottom-up, one delete per contiguous run of
+    rows.
+
+    Returns:
+        tuple: (rows archived, part path or None, deleted sheet rows)
+    """
+    used = sheet.used_range
+    values = used.value
+    if values and not isinstance(values[0], (list, tuple)):
+        values = [values]
+    frame, header_row = sheet_frame(values)
+    if header_row is None or not len(frame):
+        return 0, None, []
+
+    # Blank rows were dropped from frame, keep track of the sheet row of each kept row
+    values = [list(row) if isinstance(row, (list, tuple)) else [row] for row in values]
+    sheet_rows = np.array([used.row + header_row + 1 + offset
+                           for offset, row in enumerate(values[header_row + 1:])
+                           if any(cell not in (None, "") for cell in row)])
+
+    # The week headers may sit in a row of their own above the column headers
+    week_row = find_header_row(values, lambda cell: parse_week_header(cell) is not None)
+    headers = values[header_row if week_row is None else week_row]
+    is_stale = stale_rows(frame, headers, cutoff, today, current_codes)
+    if not is_stale.any():
+        return 0, None, []
+
+    part_path = write_archive_part(frame[is_stale], archive_dir)
+    deleted = sheet_rows[is_stale].tolist()
+    for run in reversed(_contiguous_runs(deleted)):
+        sheet.range((run[0], 1), (run[-1], 1)).api.EntireRow.Delete()
+    return int(is_stale.sum()), part_path, deleted
+
+
+def current_pfp_codes(workbook_path: str):
+    """
+    Unique Codes of the current cleaned PFP of the CPW FINAL PACKAGE the
+    workbook is in (the latest week of the OLD PFP history store, else the
+    newest cleaned file), or None when there is none.
+    """
+    from .paths import find_latest_file
+    from .pfp import CLEANED_PREFIX, OLD_PFP_FOLDER
+    from .weeks import HistoryStore
+
+    package = os.path.dirname(os.path.dirname(os.path.abspath(workbook_path)))
+    old_pfp_folder = os.path.join(package, "01 Data Processing", "Project Financial Plan (PFP)", OLD_PFP_FOLDER)
+    store = HistoryStore.for_folder(old_pfp_folder)
+    if store.weeks:
+        codes = store.state_as_of(store.weeks[-1]["week"])[CODE_HEADER]
+    else:
+        latest = find_latest_file(old_pfp_folder, prefix=CLEANED_PREFIX)
+        if not latest:
+            return None
+        codes = pd.read_excel(latest, usecols=[CODE_HEADER])[CODE_HEADER]
+    return set(codes.dropna().astype(str).str.strip())
+
+
+def archive_workbook(workbook_path: str, weeks: int = DEFAULT_ARCHIVE_WEEKS, reporter: Reporter = None,
+                     current_codes=None) -> dict:
+    """
+    Archives the stale rows older than `weeks` weeks of every archive sheet
+    in the workbook and saves it. current_codes defaults to
+    current_pfp_codes. If the save fails the new Parquet parts are removed
+    again, so no row is ever in both the archive and the live sheet. The
+    export journals' start rows of the workbook are moved up after the save.
+
+    Returns:
+        dict: sheet name -> rows archived
+
+    Raises:
+        RuntimeError: an export into the workbook is unfinished (a resume would
+            write at a row the archiving moved)
+    """
+    reporter = reporter or Reporter()
+    unsaved = unsaved_entries(workbook_path)
+    if unsaved:
+        raise RuntimeError(f"{os.path.basename(workbook_path)} has {len(unsaved)} unfinished export(s) "
+                           f"({', '.join(sorted({status for _, status in unsaved}))}), finish them before archiving")
+    cutoff = date.today() - timedelta(weeks=weeks)
+    if current_codes is None:
+        current_codes = current_pfp_codes(workbook_path)
+    archived = {}
+    parts = []
+    deleted = []
+    with excel_session():
+        book = open_workbook(workbook_path)
+        try:
+            for sheet_name, password in ARCHIVE_SHEETS.items():
+                try:
+                    sheet = book.sheets[sheet_name]
+                except Exception:
+                    continue
+                if password:
+                    sheet.api.Unprotect(password)
+                try:
+                    rows, part_path, deleted_rows = archive_sheet(sheet, archive_dir_for(workbook_path, sheet_name),
+                                                                  cutoff, current_codes=current_codes)
+                finally:
+                    if password:
+                        sheet.api.Protect(password, True, True, True)
+                if part_path:
+                    parts.append(part_path)
+                archived[sheet_name] = rows
+                deleted += deleted_rows
+            if parts:
+                save_workbook(book)
+        except Exception:
+            for part_path in parts:
+                try:
+                    os.remove(part_path)
+                except OSError:
+                    pass
+            raise
+        finally:
+            book.close()
+
+    if deleted:
+        # Exports record rows of the one sheet they append to ("Project Plan Analysis" or "Oracle")
+        shift_start_rows(workbook_path, deleted)
+
+    name = os.path.basename(workbook_path)
+    if parts:
+        reporter.success(f"📦 Archived {sum(archived.values()):,} stale rows older than {cutoff:%d-%b-%Y} "
+                         f"from {name}")
+    else:
+        reporter.info(f"No stale rows older than {cutoff:%d-%b-%Y} in {name}")
+    return archived
+
+
+def archive_folder(folder: str, weeks: int = DEFAULT_ARCHIVE_WEEKS, reporter: Reporter = None) -> dict:
+    """
+    archive_workbook for every GBA and Team workbook in folder. A workbook that
+    fails is reported and skipped.
+
+    Returns:
+        dict: workbook path -> {sheet name: rows archived}
+    """
+    reporter = reporter or Reporter()
+    workbooks = sorted(p for pattern in WORKBOOK_PATTERNS for p in glob.glob(os.path.join(folder, pattern)))
+    results = {}
+    with excel_session():
+        for idx, workbook_path in enumerate(workbooks):
+            reporter.progress(f"Archiving {os.path.basename(workbook_path)} ({idx + 1}/{len(workbooks)})...")
+            try:
+                results[workbook_path] = archive_workbook(workbook_path, weeks, reporter)
+            except Exception as e:
+                reporter.error(f"❌ Error archiving {os.path.basename(workbook_path)}: {e}")
+    reporter.progress_done()
+    return results
+
+
+def read_archive(workbook_path: str, sheet_name: str, columns=None, filters=None) -> pd.DataFrame:
+    """
+    Archived rows of one sheet of a workbook, oldest part first.
+
+    Args:
+        columns: optional list of columns to read
+        filters: optional pyarrow filters, e.g. [("Oracle Date", ">=", pd.Timestamp("2025-01-01"))]
+    """
+    part_files = sorted(glob.glob(os.path.join(archive_dir_for(workbook_path, sheet_name), "part-*.parquet")))
+    if not part_files:
+        return pd.DataFrame(columns=columns or [])
+    frames = [pd.read_parquet(p, columns=columns, filters=filters) for p in part_files]
+    return pd.concat(frames, ignore_index=True)
+
+
+def archived_max(workbook_path: str, sheet_name: str, column: str) -> int:
+    """Highest numeric value of column in the archived rows of a sheet, 0 without any"""
+    import pyarrow.parquet as pq
+
+    highest = 0
+    for part_file in glob.glob(os.path.join(archive_dir_for(workbook_path, sheet_name), "part-*.parquet")):
+        if column not in pq.read_schema(part_file).names:
+            continue
+        values = pd.to_numeric(pd.read_parquet(part_file, columns=[column])[column], errors="coerce").max()
+        if not pd.isna(values):
+            highest = max(highest, int(values))
+    return highest
+
+
+def read_live_sheet(workbook_path: str, sheet_name: str) -> pd.DataFrame:
+    """Rows of the live sheet, read with openpyxl (no Excel needed), typed like the archive"""
+    from openpyxl import load_workbook
+
+    book = load_workbook(workbook_path, read_only=True, data_only=True, keep_vba=False)
+    try:
+        if sheet_name not in book.sheetnames:
+            return pd.DataFrame()
+        values = list(book[sheet_name].iter_rows(values_only=True))
+    finally:
+        book.close()
+    frame, header_row = sheet_frame(values)
+    if header_row is None:
+        return pd.DataFrame()
+    return _archive_types(frame)
+
+
+def read_history(workbook_path: str, sheet_name: str, include_live: bool = True) -> pd.DataFrame:
+    """Full history of a sheet: the archived rows followed by the rows still in the workbook"""
+    frames = [read_archive(workbook_path, sheet_name)]
+    if include_live:
+        frames.append(read_live_sheet(workbook_path, sheet_name))
+    frames = [f for f in frames if len(f.columns)]
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat(frames, ignore_index=True)
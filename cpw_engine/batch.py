@@ -0,0 +1,206 @@
+"""
+Batch runner: processes every Business Area listed in a manifest in one run.
+
+PFP cleaning, week-over-week diff, GBA export and Team export, then one
+consolidated run report.
+
+Manifest format (JSON), BA -> PFP folder:
+
+    {
+        "Belgium": "C:\\\\...\\\\CPW FINAL PACKAGE\\\\01 Data Processing\\\\Project Financial Plan (PFP)",
+        "France": "..."
+    }
+
+A CSV with the columns ``ba,pfp_folder`` is accepted as well.
+"""
+import csv
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from contextlib import nullcontext
+from datetime import datetime
+
+from .events import Reporter, silent_reporter
+from .excel import excel_session
+from .gba import run_gba_export
+from .keys import code_ids
+from .paths import clean_path, find_latest_file
+from .pfp import (CLEANED_PREFIX, RAW_DATA_FOLDER, cleaned_file_name, diff_pfp_weeks,
+                  load_excel_cached, pfp_folders, process_raw_pfp, save_new_pfp)
+from .schema import CLEANED_PFP, RAW_PFP, validate_file
+from .team import run_team_export
+
+DEFAULT_CACHE_DIR = os.path.join(os.getcwd(), ".cpw_cache")
+
+
+def load_manifest(path: str) -> dict:
+    """Reads a BA -> PFP folder manifest from a JSON or CSV file"""
+    path = clean_path(path)
+    if path.lower().endswith(".csv"):
+        with open(path, newline="", encoding="utf-8") as f:
+            return {row["ba"].strip(): clean_path(row["pfp_folder"]) for row in csv.DictReader(f)}
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    return {ba.strip(): clean_path(folder) for ba, folder in data.items()}
+
+
+# === Per-BA PFP stage (runs in worker processes) ===
+def process_ba_pfp(ba: str, pfp_folder: str, cache_dir: str = DEFAULT_CACHE_DIR, raw_file: str = None) -> dict:
+    """
+    Unique code creation, cleaning and week diff for one BA, on raw_file or
+    the newest file in the BA's Raw Data folder.
+
+    Returns:
+        dict: report entry for the BA, including "gba_source" - the file the
+        GBA export should read (New PFP on maintenance runs, the cleaned file
+        on a first run).
+    """
+    started = time.time()
+    entry = {"ba": ba, "pfp_folder": pfp_folder, "status": "ok", "error": ""}
+    try:
+        raw_file = raw_file or find_latest_file(os.path.join(pfp_folder, RAW_DATA_FOLDER))
+        if not raw_file:
+            raise FileNotFoundError(f"No RAW PFP file found in '{RAW_DATA_FOLDER}'")
+        entry["raw_file"] = raw_file
+
+        folders = pfp_folders(raw_file)
+        cleaned_path = os.path.join(folders["old_pfp_folder"], cleaned_file_name())
+        prev_file = find_latest_file(folders["old_pfp_folder"], prefix=CLEANED_PREFIX, exclude=cleaned_path)
+
+        validate_file(raw_file, RAW_PFP)
+        result = process_raw_pfp(raw_file, load_excel_cached(raw_file, cache_dir))
+        cleaned_df = result["cleaned_df"]
+        entry.update({
+            "raw_rows": result["raw_rows"],
+            "clean_rows": len(cleaned_df),
+            "cleaned_file": result["cleaned_path"],
+        })
+
+        if prev_file:
+            validate_file(prev_file, CLEANED_PFP)
+            df_prev = load_excel_cached(prev_file, cache_dir)
+            df_new_pfp, _ = diff_pfp_weeks(df_prev, cleaned_df, code_ids(df_prev['Unique Code']), result["ids"])
+            entry["prev_file"] = prev_file
+            entry["new_rows"] = len(df_new_pfp)
+            entry["gba_source"] = save_new_pfp(df_new_pfp, folders["new_pfp_folder"]) if len(df_new_pfp) else ""
+        else:
+            # First run for this BA: the whole cleaned file goes to the GBA export
+            entry["new_rows"] = len(cleaned_df)
+            entry["gba_source"] = result["cleaned_path"]
+    except Exception as e:
+        entry["status"] = "failed"
+        entry["error"] = f"PFP: {e}"
+    entry["pfp_seconds"] = round(time.time() - started, 2)
+    return entry
+
+
+# === Excel stage (serial, Excel is a single COM server) ===
+def run_exports(entry: dict, reporter: Reporter = None, writer=None) -> dict:
+    """
+    GBA export of the BA's source file, then Team export of every GBA workbook it touched.
+    With a writer.WorkbookWriter (the app) the workbooks are written by its thread instead.
+    """
+    reporter = reporter or silent_reporter()
+    started = time.time()
+    gba_summary = None
+    if writer is not None:
+        from .writer import queue_gba_export, queue_team_export
+        export_gba = lambda source: queue_gba_export(source, writer, reporter)
+        export_team = lambda workbook, start_row: queue_team_export(workbook, writer, start_row, reporter)
+    else:
+        export_gba = lambda source: run_gba_export(source, reporter)
+        export_team = lambda workbook, start_row: run_team_export(workbook, start_row, reporter)
+    try:
+        gba_summary = export_gba(entry["gba_source"])
+    except Exception as e:
+        entry["status"] = "failed"
+        entry["error"] = f"GBA export: {e}"
+
+    if gba_summary:
+        entry["gba_created"] = gba_summary.get("created", [])
+        entry["gba_updated"] = gba_summary.get("updated", [])
+        entry["team_created"], entry["team_updated"] = [], []
+        for gba_workbook, start_row in gba_summary.get("start_rows", {}).items():
+            try:
+                team_summary = export_team(gba_workbook, start_row) or {}
+                entry["team_created"] += team_summary.get("created", [])
+                entry["team_updated"] += team_summary.get("updated", [])
+            except Exception as e:
+                entry["status"] = "failed"
+                entry["error"] = f"Team export ({os.path.basename(gba_workbook)}): {e}"
+    entry["export_seconds"] = round(time.time() - started, 2)
+    return entry
+
+
+def _pfp_pool(workers: int, processes: bool):
+    """
+    Executor of the PFP stage. Worker processes are always spawned (the only
+    start method on Windows), so every platform runs them the same way.
+    Without processes, or with a single worker, the BAs run on threads of
+    this process.
+    """
+    if processes and workers > 1:
+        return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+    return ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="cpw-pfp")
+
+
+def run_pfp_stage(manifest: dict, workers: int = 4, cache_dir: str = DEFAULT_CACHE_DIR,
+                  reporter: Reporter = None, processes: bool = True) -> list:
+    """
+    process_ba_pfp for every BA of the manifest, report entries sorted by BA.
+    processes=False keeps the work in this process (the app: a Streamlit
+    server must not spawn copies of itself), see _pfp_pool.
+    """
+    reporter = reporter or Reporter()
+    report = []
+    with _pfp_pool(workers, processes) as pool:
+        futures = {pool.submit(process_ba_pfp, ba, folder, cache_dir): ba for ba, folder in manifest.items()}
+        for future in as_completed(futures):
+            entry = future.result()
+            reporter.progress(f"PFP {entry['ba']}: {entry['status']} {entry['error']}".strip())
+            report.append(entry)
+    report.sort(key=lambda e: e["ba"])
+    return report
+
+
+def run_batch(manifest: dict, workers: int = 4, cache_dir: str = DEFAULT_CACHE_DIR,
+              reporter: Reporter = None, writer=None, processes: bool = True) -> list:
+    """
+    Runs the full pipeline for every BA in the manifest.
+
+    Args:
+        manifest: BA -> PFP folder
+        workers: Number of processes for the PFP stage (default: 4)
+        cache_dir: Folder of the shared parsed-frame cache
+        reporter: Receives one progress event per stage and BA
+        writer: writer.WorkbookWriter that writes the workbooks (the app's
+            shared writer), instead of an Excel session of this thread
+        processes: False runs the PFP stage on threads instead of worker processes
+
+    Returns:
+        list: One report entry per BA
+    """
+    reporter = reporter or Reporter()
+    report = run_pfp_stage(manifest, workers, cache_dir, reporter, processes)
+    to_export = [e for e in report if e["status"] == "ok" and e.get("gba_source")]
+    if to_export:
+        # One Excel app, with calculation and screen updating off, for every BA's exports
+        # (the writer's thread has its own)
+        with excel_session() if writer is None else nullcontext():
+            for entry in to_export:
+                reporter.progress(f"Exporting {entry['ba']}...")
+                run_exports(entry, writer=writer)
+                reporter.progress(f"Exports {entry['ba']}: {entry['status']} {entry['error']}".strip())
+    reporter.progress_done()
+    return report
+
+
+def write_report(report: list, report_dir: str) -> str:
+    """Writes the consolidated run report as JSON and returns its path"""
+    os.makedirs(report_dir, exist_ok=True)
+    report_path = os.path.join(report_dir, f"CPW_Batch_Report_{datetime.now().strftime('%Y-%m-%d_%H%M%S')}.json")
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, default=str)
+    return report_path
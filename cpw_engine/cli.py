@@ -0,0 +1,309 @@
+"""
+Command-line entry point of the CPW engine.
+
+    python -m cpw_engine pfp "<RAW PFP file>"
+    python -m cpw_engine diff "<previous week file>" "<current week file>"
+    python -m cpw_engine gba "<New PFP / cleaned PFP file>" [--plan]
+    python -m cpw_engine team "<CPW Tool_<GBA>_Main.xlsm>" --start-row 2
+    python -m cpw_engine forecast "<CPW Tool_<Team>_Team.xlsm>"
+    python -m cpw_engine batch manifest.json --workers 4
+    python -m cpw_engine queue submit queue.db manifest.json
+    python -m cpw_engine queue work queue.db --processes 2
+    python -m cpw_engine watch manifest.json
+    python -m cpw_engine archive "<02 GBA Workbooks or 03 Department Workbooks folder>" --weeks 26
+    python -m cpw_engine history "<CPW Tool_<Team>_Team.xlsm>" --sheet Oracle --out history.csv
+    python -m cpw_engine weeks "<OLD PFP folder>" diff 2025-01-06 2025-03-03 --out changes.csv
+    python -m cpw_engine explore manifest.json --by BA GBA
+"""
+import argparse
+import os
+
+from .events import Reporter
+from .paths import clean_path
+
+
+def cmd_pfp(args, reporter):
+    from .pfp import process_raw_pfp
+    result = process_raw_pfp(clean_path(args.raw_file))
+    stats = result["stats"]
+    reporter.success(f"Cleaned data saved to OLD PFP: {os.path.basename(result['cleaned_path'])}")
+    reporter.info(
+        f"Raw data rows: {stats['original_count']:,}, duplicates removed: {stats['duplicates_removed']:,}, "
+        f"blank employees removed: {stats['blank_employees_removed']:,}, "
+        f"labor cost entries removed: {stats['labor_cost_removed']:,}, final rows: {stats['final_count']:,}"
+    )
+    return 0
+
+
+def cmd_diff(args, reporter):
+    from .pfp import compare_pfp_weeks, new_pfp_folder_for, save_new_pfp
+    prev_file = clean_path(args.prev_file)
+    df_new_pfp, stats = compare_pfp_weeks(prev_file, clean_path(args.current_file))
+    if not len(df_new_pfp):
+        reporter.warning("No new entries found")
+        return 0
+    new_pfp_path = save_new_pfp(df_new_pfp, new_pfp_folder_for(prev_file))
+    reporter.success(f"Found {stats['new_entries']:,} new entries, saved: {new_pfp_path}")
+    return 0
+
+
+def _print_plan(plan, reporter):
+    from .plan import plan_lines
+    for line in plan_lines(plan):
+        reporter.info(line)
+    return 0
+
+
+def cmd_gba(args, reporter):
+    if args.plan:
+        from .plan import plan_gba_export
+        return _print_plan(plan_gba_export(clean_path(args.source_file), resume=not args.fresh), reporter)
+    from .gba import run_gba_export
+    return 0 if run_gba_export(clean_path(args.source_file), reporter, resume=not args.fresh) else 1
+
+
+def cmd_team(args, reporter):
+    if args.plan:
+        from .plan import plan_team_export
+        return _print_plan(plan_team_export(clean_path(args.gba_workbook), args.start_row, resume=not args.fresh),
+                           reporter)
+    from .team import run_team_export
+    return 0 if run_team_export(clean_path(args.gba_workbook), args.start_row, reporter,
+                                resume=not args.fresh) else 1
+
+
+def cmd_forecast(args, reporter):
+    from .excel import excel_session, open_workbook, save_workbook
+    from .forecast import write_capacity_forecast
+    with excel_session():
+        book = open_workbook(clean_path(args.team_workbook))
+        try:
+            written = write_capacity_forecast(book, args.capacity)
+            save_workbook(book)
+        finally:
+            book.close()
+    for sheet_name, rows in written.items():
+        reporter.info(f"{sheet_name}: {rows:,} resource rows written")
+    return 0
+
+
+def cmd_batch(args, reporter):
+    from .batch import load_manifest, run_batch, write_report
+    report = run_batch(load_manifest(args.manifest), args.workers, args.cache_dir, reporter)
+    report_path = write_report(report, args.report_dir)
+    failed = [e["ba"] for e in report if e["status"] != "ok"]
+    reporter.info(f"Processed {len(report)} BA(s), {len(failed)} failed. Report: {report_path}")
+    return 1 if failed else 0
+
+
+def cmd_queue(args, reporter):
+    from . import workqueue
+    queue_path = clean_path(args.queue)
+    if args.action == "submit":
+        from .batch import load_manifest
+        report = workqueue.submit(queue_path, load_manifest(args.manifest), args.workers, args.cache_dir,
+                                  args.shard_size, reporter)
+        for entry in report:
+            reporter.info(f"{entry['ba']}: {entry['status']}, {entry['shards']} GBA shard(s) queued "
+                          f"{entry['error']}".strip())
+        return 1 if any(e["status"] != "ok" for e in report) else 0
+    if args.action == "work":
+        kwargs = {"lease_seconds": args.lease, "shard_size": args.shard_size,
+                  "max_shard_seconds": args.max_shard_seconds}
+        if args.processes > 1:
+            codes = workqueue.run_local_workers(queue_path, args.processes, **kwargs)
+            return 0 if not any(codes) else 1
+        stats = workqueue.run_worker(queue_path, reporter=reporter, **kwargs)
+        reporter.info(f"{stats['done']} shard(s) done, {stats['failed']} failed")
+        return 0
+    queue = workqueue.WorkQueue(queue_path)
+    reporter.info(", ".join(f"{status}: {count}" for status, count in queue.status().items()))
+    for shard in queue.shards():
+        if shard["status"] == workqueue.FAILED:
+            reporter.warning(f"{shard['kind']} {shard['source']} {shard['targets']}: {shard['error']}")
+    return 0
+
+
+def cmd_watch(args, reporter):
+    from .batch import load_manifest
+    from .watch import RawDataWatcher
+    pfp_folders = {}
+    for target in args.targets:
+        target = clean_path(target)
+        if os.path.isdir(target):
+            pfp_folders[os.path.basename(os.path.normpath(target))] = target
+        else:
+            pfp_folders.update(load_manifest(target))
+    watcher = RawDataWatcher(pfp_folders, args.cache_dir, args.interval, args.settle, args.process_existing, reporter)
+    try:
+        results = watcher.run(once=args.once)
+    except KeyboardInterrupt:
+        return 0
+    return 1 if any(e["status"] != "ok" for e in results) else 0
+
+
+def cmd_archive(args, reporter):
+    from .archive import archive_folder, archive_workbook
+    target = clean_path(args.target)
+    if os.path.isdir(target):
+        archive_folder(target, args.weeks, reporter)
+    else:
+        archive_workbook(target, args.weeks, reporter)
+    return 0
+
+
+def cmd_history(args, reporter):
+    from .archive import read_history
+    history = read_history(clean_path(args.workbook), args.sheet, include_live=not args.archived_only)
+    history.to_csv(args.out, index=False)
+    reporter.success(f"{len(history):,} rows of {args.sheet} written to {args.out}")
+    return 0
+
+
+def cmd_weeks(args, reporter):
+    from .weeks import KEEP_FULL_COPIES, HistoryStore, prune_snapshots
+    old_pfp_folder = clean_path(args.old_pfp_folder)
+    store = HistoryStore.for_folder(old_pfp_folder)
+    needed = {"state": 1, "diff": 2}.get(args.action, 0)
+    if len(args.weeks) != needed:
+        reporter.error(f"{args.action} takes {needed} YYYY-MM-DD week(s)")
+        return 2
+    if args.action in ("import", "prune"):
+        if args.action == "import":
+            for entry in store.import_folder(old_pfp_folder):
+                reporter.info(f"{entry['week']}: {entry['kind']}, {entry['changes']:,} changed rows")
+        keep = args.prune_keep or (KEEP_FULL_COPIES if args.action == "prune" else 0)
+        if keep:
+            deleted = prune_snapshots(old_pfp_folder, keep)
+            reporter.success(f"Deleted {len(deleted)} full weekly copies now held in the history store")
+        reporter.success(f"{len(store.weeks)} weeks stored, {store.disk_usage() / 1e6:,.1f} MB")
+    elif args.action == "list":
+        for entry in store.weeks:
+            reporter.info(f"{entry['week']}  {entry['kind']:>5}  {entry['rows']:,} rows, {entry['changes']:,} changes")
+    elif args.action == "state":
+        state = store.state_as_of(args.weeks[0]).drop(columns=["_row_hash"])
+        state.to_csv(args.out, index=False)
+        reporter.success(f"{len(state):,} rows as of {args.weeks[0]} written to {args.out}")
+    else:
+        changes = store.diff_weeks(args.weeks[0], args.weeks[1])
+        changes.to_csv(args.out, index=False)
+        counts = changes["change"].value_counts()
+        reporter.success(f"{counts.get('added', 0):,} added, {counts.get('changed', 0):,} changed, "
+                         f"{counts.get('removed', 0):,} removed; written to {args.out}")
+    return 0
+
+
+def cmd_explore(args, reporter):
+    from .batch import load_manifest
+    from .explorer import Explorer, build_snapshot
+    target = clean_path(args.target)
+    manifest = {os.path.basename(os.path.normpath(target)): target} if os.path.isdir(target) else load_manifest(target)
+    summary = build_snapshot(manifest, args.snapshot_dir, reporter)
+    reporter.success(f"Snapshot up to date: {summary['rows']:,} rows, {summary['rebuilt']} source(s) read, "
+                     f"{summary['kept']} unchanged, {summary['removed']} removed")
+    if args.by:
+        print(Explorer(args.snapshot_dir).aggregate(args.by).to_string(index=False))
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="cpw_engine", description="CPW Tool engine (no Streamlit required).")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("pfp", help="Add unique codes to a RAW PFP file, clean it and save it to OLD PFP")
+    p.add_argument("raw_file")
+    p.set_defaults(func=cmd_pfp)
+
+    p = sub.add_parser("diff", help="Save the current week's new Unique Codes as New_PFP_YYYY-MM-DD.xlsx")
+    p.add_argument("prev_file")
+    p.add_argument("current_file")
+    p.set_defaults(func=cmd_diff)
+
+    p = sub.add_parser("gba", help="Export a PFP extract to the GBA workbooks")
+    p.add_argument("source_file")
+    p.add_argument("--fresh", action="store_true", help="Ignore the journal of a previous run of this file")
+    p.add_argument("--plan", action="store_true", help="Only print which workbooks would get how many rows")
+    p.set_defaults(func=cmd_gba)
+
+    p = sub.add_parser("team", help="Export a GBA workbook to the Team workbooks")
+    p.add_argument("gba_workbook")
+    p.add_argument("--start-row", type=int, default=2)
+    p.add_argument("--fresh", action="store_true", help="Ignore the journal of a previous run of this workbook")
+    p.add_argument("--plan", action="store_true", help="Only print which workbooks would get how many rows")
+    p.set_defaults(func=cmd_team)
+
+    p = sub.add_parser("forecast", help="Recompute the capacity forecast sheets of a Team workbook as static values")
+    p.add_argument("team_workbook")
+    p.add_argument("--capacity", type=float, default=1.0, help="Weekly capacity of one resource (default: 1.0 FTE)")
+    p.set_defaults(func=cmd_forecast)
+
+    p = sub.add_parser("batch", help="Run the full pipeline for every BA in a manifest")
+    p.add_argument("manifest", help="JSON or CSV manifest of BA -> PFP folder")
+    p.add_argument("--workers", type=int, default=4, help="Parallel BA workers for the PFP stage")
+    p.add_argument("--cache-dir", default=os.path.join(os.getcwd(), ".cpw_cache"),
+                   help="Shared parsed-frame cache folder")
+    p.add_argument("--report-dir", default=os.getcwd(), help="Where the run report is written")
+    p.set_defaults(func=cmd_batch)
+
+    p = sub.add_parser("queue", help="Distributed GBA/Team export over a shared SQLite work queue")
+    p.add_argument("action", choices=["submit", "work", "status"],
+                   help="submit: PFP stage + queue GBA shards, work: run shards, status: shard counts")
+    p.add_argument("queue", help="Queue file, on a share every node can reach")
+    p.add_argument("manifest", nargs="?", help="BA manifest (submit)")
+    p.add_argument("--workers", type=int, default=4, help="Parallel BA workers for the PFP stage (submit)")
+    p.add_argument("--cache-dir", default=os.path.join(os.getcwd(), ".cpw_cache"),
+                   help="Shared parsed-frame cache folder (submit)")
+    p.add_argument("--shard-size", type=int, default=4, help="Workbooks per shard (default: 4)")
+    p.add_argument("--processes", type=int, default=1, help="Worker processes on this node, one Excel each (work)")
+    p.add_argument("--lease", type=float, default=600, help="Seconds before a silent worker's shard is reclaimed")
+    p.add_argument("--max-shard-seconds", type=float, default=3600,
+                   help="Seconds after which a shard's lease is no longer renewed (work)")
+    p.set_defaults(func=cmd_queue)
+
+    p = sub.add_parser("watch", help="Process new RAW PFP extracts as soon as they land in Raw Data")
+    p.add_argument("targets", nargs="+", help="PFP folders, or a JSON/CSV BA manifest")
+    p.add_argument("--interval", type=float, default=30.0, help="Seconds between folder polls (default: 30)")
+    p.add_argument("--settle", type=float, default=5.0, help="Seconds a new file must stay unchanged (default: 5)")
+    p.add_argument("--process-existing", action="store_true",
+                   help="Also process the newest extract already in Raw Data at start-up")
+    p.add_argument("--once", action="store_true", help="Process what is new now and exit")
+    p.add_argument("--cache-dir", default=os.path.join(os.getcwd(), ".cpw_cache"),
+                   help="Shared parsed-frame cache folder")
+    p.set_defaults(func=cmd_watch)
+
+    p = sub.add_parser("archive",
+                       help="Move stale rows older than --weeks from GBA/Team workbooks into Parquet archives")
+    p.add_argument("target", help="A workbook, or a folder of CPW Tool_*_Main.xlsm / _Team.xlsm workbooks")
+    p.add_argument("--weeks", type=int, default=26, help="Keep this many weeks of rows live (default: 26)")
+    p.set_defaults(func=cmd_archive)
+
+    p = sub.add_parser("history", help="Export the full history (archive + live rows) of a workbook sheet to CSV")
+    p.add_argument("workbook")
+    p.add_argument("--sheet", default="Oracle", help='"Oracle" (Team) or "Project Plan Analysis" (GBA)')
+    p.add_argument("--out", default="history.csv")
+    p.add_argument("--archived-only", action="store_true", help="Leave out the rows still in the workbook")
+    p.set_defaults(func=cmd_history)
+
+    p = sub.add_parser("weeks", help="Delta-encoded history of the cleaned PFP weeks in an OLD PFP folder")
+    p.add_argument("old_pfp_folder")
+    p.add_argument("action", choices=["import", "prune", "list", "state", "diff"],
+                   help="import: store the cleaned weekly files, prune: delete the stored weekly files but the "
+                        "newest --prune-keep (default 2), state: one week as CSV, diff: two weeks")
+    p.add_argument("weeks", nargs="*", help="YYYY-MM-DD week(s) for state / diff")
+    p.add_argument("--out", default="weeks.csv")
+    p.add_argument("--prune-keep", type=int, default=0,
+                   help="Delete all but this many newest full weekly copies the store holds (import, prune)")
+    p.set_defaults(func=cmd_weeks)
+
+    p = sub.add_parser("explore", help="Refresh the data explorer snapshot of the cleaned PFP and GBA export rows")
+    p.add_argument("target", help="A PFP folder, or a JSON/CSV BA manifest")
+    p.add_argument("--snapshot-dir", default=os.path.join(os.getcwd(), ".cpw_explorer"),
+                   help="Folder of the columnar snapshot the app's explorer reads")
+    p.add_argument("--by", nargs="*", help="Print row counts grouped by these columns, e.g. BA GBA Week")
+    p.set_defaults(func=cmd_explore)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args, Reporter())
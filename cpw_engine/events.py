@@ -0,0 +1,59 @@
+"""
+Progress/event reporting for the CPW engine.
+
+The engine never talks to a UI directly. Every user-facing message goes
+through a Reporter, which hands an Event to a callback. The Streamlit app
+renders events with st.* calls, the CLI prints them.
+"""
+import sys
+from dataclasses import dataclass
+
+LEVELS = ("progress", "info", "success", "warning", "error")
+
+
+@dataclass
+class Event:
+    level: str
+    message: str
+
+
+def print_event(event: Event):
+    """Default callback: one line per event on stdout, progress clears are skipped"""
+    if event.level == "progress" and not event.message:
+        return
+    stream = sys.stderr if event.level == "error" else sys.stdout
+    print(f"[{event.level}] {event.message}", file=stream, flush=True)
+
+
+class Reporter:
+    """Forwards engine messages to a callback(Event)"""
+
+    def __init__(self, callback=None):
+        self.callback = callback or print_event
+
+    def emit(self, level: str, message: str):
+        self.callback(Event(level, message))
+
+    def progress(self, message: str):
+        """Transient status line, replaced by the next progress message"""
+        self.emit("progress", message)
+
+    def progress_done(self):
+        self.emit("progress", "")
+
+    def info(self, message: str):
+        self.emit("info", message)
+
+    def success(self, message: str):
+        self.emit("success", message)
+
+    def warning(self, message: str):
+        self.emit("warning", message)
+
+    def error(self, message: str):
+        self.emit("error", message)
+
+
+def silent_reporter() -> Reporter:
+    """Reporter that drops every event"""
+    return Reporter(lambda event: None)
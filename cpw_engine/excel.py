@@ -0,0 +1,222 @@
+"""Excel helpers on top of xlwings. xlwings is imported on first use."""
+import logging
+import os
+import threading
+from contextlib import contextmanager
+
+# Settings an ExcelSession switches off while it writes, with the values it uses
+SUSPENDED_SETTINGS = {
+    "calculation": "manual",
+    "screen_updating": False,
+    "enable_events": False,
+    "display_alerts": False,
+}
+
+log = logging.getLogger(__name__)
+
+# The active session of each thread: COM objects must only be used by the thread that created them
+_local = threading.local()
+
+
+def _active_session():
+    return getattr(_local, "session", None)
+
+
+def com_thread():
+    """COM needs initialising on every thread that talks to Excel (Windows only)"""
+    try:
+        import pythoncom
+    except ImportError:
+        return
+    pythoncom.CoInitialize()
+
+
+def _xlwings():
+    import xlwings as xw
+    return xw
+
+
+def new_excel_app():
+    """
+    A new hidden Excel instance owned by the session (second value: we own it).
+    Sessions never attach to the user's running Excel, whose settings they
+    would switch and whose workbooks they would share.
+    """
+    return _xlwings().App(visible=False, add_book=False), True
+
+
+class ExcelSession:
+    """
+    One Excel application shared by every workbook of a run.
+
+    From the first workbook the session opens until it closes, automatic
+    calculation, screen updating, events and alerts are off (Excel rejects
+    changing calculation while no workbook is open, so the settings are not
+    touched before). The previous settings are restored on exit, also when the
+    run fails. Excel is quit on exit only if the session started it.
+
+    Args:
+        app_factory: callable returning (app, owned). Defaults to a new hidden
+            Excel instance (new_excel_app). Any object with the xlwings App
+            attributes used here (books.open, calculation, screen_updating,
+            enable_events, display_alerts, quit) works, e.g. a mock on Linux.
+    """
+
+    def __init__(self, app_factory=None):
+        self.app_factory = app_factory or new_excel_app
+        self.app = None
+        self.owned = False
+        self._saved_settings = None
+
+    def __enter__(self):
+        com_thread()
+        self.app, self.owned = self.app_factory()
+        self._saved_settings = None
+        return self
+
+    def _suspend(self):
+        """Switches SUSPENDED_SETTINGS on, once, remembering the previous values"""
+        if self._saved_settings is not None:
+            return
+        self._saved_settings = {}
+        for name, value in SUSPENDED_SETTINGS.items():
+            try:
+                previous = getattr(self.app, name)
+                setattr(self.app, name, value)
+                self._saved_settings[name] = previous
+            except Exception as e:
+                log.warning("Could not set Excel %s to %r: %s", name, value, e)
+
+    def __exit__(self, exc_type, exc, tb):
+        self._restore()
+        if self.owned:
+            try:
+                self.app.quit()
+            except Exception as e:
+                log.warning("Could not quit Excel: %s", e)
+        self.app = None
+        return False
+
+    def _restore(self):
+        for name, value in (self._saved_settings or {}).items():
+            try:
+                setattr(self.app, name, value)
+            except Exception as e:
+                log.warning("Could not restore Excel %s to %r: %s", name, value, e)
+        self._saved_settings = None
+
+    def open(self, path: str):
+        """Opens path in the session's app, or returns it if it is already open there"""
+        full_path = os.path.abspath(path)
+        for book in self.app.books:
+            try:
+                if os.path.abspath(book.fullname) == full_path:
+                    break
+            except Exception:
+                continue
+        else:
+            book = self.app.books.open(full_path)
+        self._suspend()
+        return book
+
+    def save(self, book, path: str = None):
+        """
+        Saves a workbook with the original calculation mode back on for the
+        save, since Excel stores the application's mode in the file: the
+        workbook must not reach its users with manual calculation. The mode is
+        suspended again afterwards.
+        """
+        calculation = (self._saved_settings or {}).get("calculation")
+        if calculation is not None:
+            try:
+                self.app.calculation = calculation
+            except Exception as e:
+                log.warning("Could not restore Excel calculation to %r for the save: %s", calculation, e)
+        try:
+            if path:
+                book.save(path)
+            else:
+                book.save()
+        finally:
+            if calculation is not None:
+                try:
+                    self.app.calculation = SUSPENDED_SETTINGS["calculation"]
+                except Exception as e:
+                    log.warning("Could not suspend Excel calculation again after the save: %s", e)
+
+    def discard(self):
+        """Closes every workbook open in the session's app without saving it"""
+        for book in list(self.app.books):
+            try:
+                book.close()
+            except Exception as e:
+                log.warning("Could not close %s: %s", getattr(book, "name", book), e)
+
+
+@contextmanager
+def excel_session(app_factory=None):
+    """
+    Context manager around ExcelSession. Nested uses on the same thread share
+    the outermost session, so a batch run keeps one Excel app for all of its
+    exports; other threads never see it.
+    """
+    if _active_session() is not None:
+        yield _active_session()
+        return
+    with ExcelSession(app_factory) as session:
+        _local.session = session
+        try:
+            yield session
+        finally:
+            _local.session = None
+
+
+def open_workbook(path: str):
+    session = _active_session()
+    if session is not None:
+        return session.open(path)
+    return _xlwings().Book(path)
+
+
+def save_workbook(book, path: str = None):
+    session = _active_session()
+    if session is not None:
+        session.save(book, path)
+    elif path:
+        book.save(path)
+    else:
+        book.save()
+
+
+def find_last_row(sheet):
+    return sheet.api.Cells(sheet.api.Rows.Count, 1).End(-4162).Row
+
+
+def find_last_col(sheet):
+    return sheet.api.Cells(1, sheet.api.Columns.Count).End(-4159).Column
+
+
+def find_first_empty_row_in_col(sheet, col=5, start=5, search_limit=5000):
+    """
+    Finds the first empty row in a specified column within a given range.
+
+    Args:
+        sheet: Excel worksheet object
+        col: Column number to check (default: 5)
+        start: Starting row to check from (default: 4)
+        search_limit: Maximum row to search up to (default: 5000)
+
+    Returns:
+        int: Row number of first empty cell, or next available row after last used row
+    """
+    for r in range(start, search_limit + 1):
+        val = sheet.range((r, col)).value
+        if val is None or (str(val).strip() == ""):
+            return r
+    lr = sheet.api.Cells(sheet.api.Rows.Count, col).End(-4162).Row
+    return max(start, lr + 1)
+
+
+def read_block(sheet, nrows, ncols):
+    rng = sheet.range((1, 1), (nrows, ncols))
+    return rng.value
@@ -0,0 +1,345 @@
+"""
+Data explorer over the cleaned PFP and the GBA export rows.
+
+The sources are flattened into one columnar snapshot (Parquet, one part per
+source) with the same few columns for every row:
+
+    Dataset ("Cleaned PFP" / "GBA export"), BA, GBA, Department, Resource,
+    Week (Monday), Date, Project Number, Project Name, Unique Code, Source
+
+- Cleaned PFP rows come from the latest week in each BA's OLD PFP history
+  store (see weeks.HistoryStore).
+- GBA export rows are the full history of every CPW Tool_<GBA>_Main.xlsm:
+  its archive plus its live "Project Plan Analysis" rows.
+
+A part is rebuilt only when its source changed. Queries never load the
+snapshot into memory. Filters become a pyarrow dataset expression, so whole
+row groups are skipped on their statistics. Only the requested columns are
+read. The first page of a filter counts its matching rows per row group; later
+pages of that filter read only the row groups their rows are in.
+"""
+import bisect
+import glob
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from .events import Reporter
+from .gba import gba_of_department
+from .paths import derive_gba_file_path, file_fingerprint
+from .pfp import OLD_PFP_FOLDER
+
+DEFAULT_SNAPSHOT_DIR = os.path.join(os.getcwd(), ".cpw_explorer")
+SNAPSHOT_INDEX = "snapshot.json"
+DEFAULT_PAGE_SIZE = 100
+ROW_GROUP_SIZE = 64_000
+# Filters whose row offsets an Explorer keeps
+OFFSET_CACHE_SIZE = 32
+
+PFP_DATASET = "Cleaned PFP"
+GBA_DATASET = "GBA export"
+
+SNAPSHOT_SCHEMA = pa.schema([
+    ("Dataset", pa.string()),
+    ("BA", pa.string()),
+    ("GBA", pa.string()),
+    ("Department", pa.string()),
+    ("Resource", pa.string()),
+    ("Week", pa.date32()),
+    ("Date", pa.date32()),
+    ("Project Number", pa.string()),
+    ("Project Name", pa.string()),
+    ("Unique Code", pa.string()),
+    ("Source", pa.string()),
+])
+COLUMNS = SNAPSHOT_SCHEMA.names
+# Columns the explorer offers value filters for (Week has a date range instead)
+FILTER_COLUMNS = ("Dataset", "BA", "GBA", "Department", "Resource")
+
+
+# === Snapshot ===
+def _snapshot_frame(frame: pd.DataFrame, dataset: str, ba: str, source: str, mapping: dict,
+                    gba: str = None, dates=None) -> pd.DataFrame:
+    """frame in the snapshot columns. mapping: snapshot column -> source column"""
+    def column(name):
+        source_column = mapping.get(name)
+        if source_column in frame.columns:
+            return frame[source_column].astype("string").str.strip()
+        return pd.Series(pd.NA, index=frame.index, dtype="string")
+
+    department = column("Department")
+    dates = pd.to_datetime(dates, errors="coerce")
+    return pd.DataFrame({
+        "Dataset": dataset,
+        "BA": ba,
+        "GBA": gba if gba is not None else department.fillna("").map(gba_of_department),
+        "Department": department,
+        "Resource": column("Resource"),
+        "Week": (dates - pd.to_timedelta(dates.dt.weekday, unit="D")).dt.date,
+        "Date": dates.dt.date,
+        "Project Number": column("Project Number"),
+        "Project Name": column("Project Name"),
+        "Unique Code": column("Unique Code"),
+        "Source": source,
+    }, index=frame.index)
+
+
+def pfp_frame(ba: str, pfp_folder: str) -> pd.DataFrame:
+    """Cleaned PFP of the latest week in the BA's OLD PFP history store"""
+    from .weeks import HistoryStore
+
+    store = HistoryStore.for_folder(os.path.join(pfp_folder, OLD_PFP_FOLDER))
+    if not store.weeks:
+        return pd.DataFrame(columns=COLUMNS)
+    week = store.weeks[-1]["week"]
+    state = store.state_as_of(week)
+    mapping = {"Department": "Expenditure Organization Name", "Resource": "Employee Name",
+               "Project Number": "Project Number", "Project Name": "Project Name", "Unique Code": "Unique Code"}
+    dates = pd.Series(pd.Timestamp(week), index=state.index)
+    return _snapshot_frame(state, PFP_DATASET, ba, f"OLD PFP {week}", mapping, dates=dates)
+
+
+def gba_frame(ba: str, workbook_path: str) -> pd.DataFrame:
+    """Archived and live "Project Plan Analysis" rows of a GBA workbook"""
+    from .archive import read_history
+
+    history = read_history(workbook_path, "Project Plan Analysis")
+    if not len(history.columns):
+        return pd.DataFrame(columns=COLUMNS)
+    name = os.path.basename(workbook_path)
+    gba = name[len("CPW Tool_"):-len("_Main.xlsm")]
+    mapping = {"Department": "Department Name", "Resource": "Resource Name", "Project Number": "Project Number",
+               "Project Name": "Project Name", "Unique Code": "Unique Code"}
+    dates = history["Oracle Date"] if "Oracle Date" in history.columns else pd.Series(pd.NaT, index=history.index)
+    return _snapshot_frame(history, GBA_DATASET, ba, name, mapping, gba=gba, dates=dates)
+
+
+def snapshot_sources(manifest: dict) -> list:
+    """
+    (key, fingerprint, loader) of every source of the BAs in manifest
+    (BA -> PFP folder). The GBA workbooks are the ones of the BA's
+    CPW FINAL PACKAGE.
+    """
+    from .archive import archive_dir_for
+
+    sources = []
+    for ba, pfp_folder in manifest.items():
+        history_index = os.path.join(pfp_folder, OLD_PFP_FOLDER, ".cpw_history", "history.json")
+        if os.path.exists(history_index):
+            sources.append((f"pfp|{ba}|{pfp_folder}", list(file_fingerprint(history_index)),
+                            lambda ba=ba, folder=pfp_folder: pfp_frame(ba, folder)))
+        try:
+            gba_folder = os.path.join(derive_gba_file_path(pfp_folder), "02 GBA Workbooks")
+        except ValueError:
+            continue
+        for workbook in sorted(glob.glob(os.path.join(gba_folder, "CPW Tool_*_Main.xlsm"))):
+            parts = sorted(glob.glob(os.path.join(archive_dir_for(workbook, "Project Plan Analysis"), "part-*")))
+            fingerprint = list(file_fingerprint(workbook)) + [os.path.basename(p) for p in parts]
+            sources.append((f"gba|{ba}|{workbook}", fingerprint,
+                            lambda ba=ba, path=workbook: gba_frame(ba, path)))
+    return sources
+
+
+def _load_index(snapshot_dir: str) -> dict:
+    try:
+        with open(os.path.join(snapshot_dir, SNAPSHOT_INDEX), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def build_snapshot(manifest: dict, snapshot_dir: str = DEFAULT_SNAPSHOT_DIR, reporter: Reporter = None) -> dict:
+    """
+    Brings the snapshot up to date with the sources of manifest: changed
+    sources are written again, unchanged ones are kept, parts of sources that
+    are gone are deleted. Rows are sorted by Week, BA, GBA, Department and
+    Resource, so the row group statistics let filters skip most of a part.
+
+    Returns:
+        dict: {"rebuilt", "kept", "removed", "rows"}
+    """
+    reporter = reporter or Reporter()
+    os.makedirs(snapshot_dir, exist_ok=True)
+    index = _load_index(snapshot_dir)
+    sources = snapshot_sources(manifest)
+    summary = {"rebuilt": 0, "kept": 0, "removed": 0, "rows": 0}
+    new_index = {}
+    for idx, (key, fingerprint, loader) in enumerate(sources):
+        entry = index.get(key)
+        if entry and entry["fingerprint"] == fingerprint and os.path.exists(os.path.join(snapshot_dir, entry["file"])):
+            new_index[key] = entry
+            summary["kept"] += 1
+            summary["rows"] += entry["rows"]
+            continue
+        reporter.progress(f"Reading {key.split('|')[-1]} ({idx + 1}/{len(sources)})...")
+        frame = loader().sort_values(["Week", "BA", "GBA", "Department", "Resource"], na_position="last")
+        file_name = f"part-{hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]}.parquet"
+        part_path = os.path.join(snapshot_dir, file_name)
+        table = pa.Table.from_pandas(frame[COLUMNS], schema=SNAPSHOT_SCHEMA, preserve_index=False)
+        pq.write_table(table, f"{part_path}.tmp", compression="zstd", row_group_size=ROW_GROUP_SIZE)
+        os.replace(f"{part_path}.tmp", part_path)
+        new_index[key] = {"fingerprint": fingerprint, "file": file_name, "rows": len(frame)}
+        summary["rebuilt"] += 1
+        summary["rows"] += len(frame)
+
+    for key, entry in index.items():
+        if key not in new_index:
+            try:
+                os.remove(os.path.join(snapshot_dir, entry["file"]))
+            except OSError:
+                pass
+            summary["removed"] += 1
+
+    tmp_path = os.path.join(snapshot_dir, f"{SNAPSHOT_INDEX}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(new_index, f, indent=2)
+    os.replace(tmp_path, os.path.join(snapshot_dir, SNAPSHOT_INDEX))
+    reporter.progress_done()
+    return summary
+
+
+def snapshot_version(snapshot_dir: str = DEFAULT_SNAPSHOT_DIR):
+    """Changes whenever build_snapshot changed the snapshot (cache key for the app), None without one"""
+    path = os.path.join(snapshot_dir, SNAPSHOT_INDEX)
+    return tuple(file_fingerprint(path)) if os.path.exists(path) else None
+
+
+# === Queries ===
+def filter_expression(filters: dict = None):
+    """
+    pyarrow expression of filters: column -> list of allowed values for the
+    FILTER_COLUMNS, "Week" -> (first, last) date range (either end may be
+    None). Empty lists and missing keys do not filter. A Week range leaves out
+    the rows without a Week.
+    """
+    expression = None
+    for column, value in (filters or {}).items():
+        if column == "Week":
+            first, last = value or (None, None)
+            parts = ([ds.field("Week") >= first] if first else []) + ([ds.field("Week") <= last] if last else [])
+        elif value:
+            parts = [ds.field(column).isin(list(value))]
+        else:
+            parts = []
+        for part in parts:
+            expression = part if expression is None else expression & part
+    return expression
+
+
+def _filter_key(filters: dict = None) -> str:
+    return json.dumps({column: value for column, value in (filters or {}).items() if value},
+                      sort_keys=True, default=str)
+
+
+class Explorer:
+    """
+    Paged, filtered and aggregated reads of a snapshot written by build_snapshot.
+    Safe to share between threads (the app keeps one per snapshot).
+    """
+
+    def __init__(self, snapshot_dir: str = DEFAULT_SNAPSHOT_DIR):
+        index = _load_index(snapshot_dir)
+        files = [os.path.join(snapshot_dir, e["file"]) for e in index.values()]
+        self.dataset = ds.dataset([f for f in files if os.path.exists(f)], format="parquet", schema=SNAPSHOT_SCHEMA)
+        # Every row group of the snapshot, in snapshot order (footer metadata only)
+        self._row_groups = [row_group for fragment in self.dataset.get_fragments()
+                            for row_group in fragment.split_by_row_group()]
+        # filter key -> matching rows before each row group, plus the total (LRU)
+        self._offsets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def row_offsets(self, filters: dict = None) -> list:
+        """
+        Number of rows matching filters before each row group, and in all of
+        them as the last item. Counted once per filter: row groups whose
+        statistics rule the filter out are not read, the others only for the
+        filter columns.
+        """
+        key = _filter_key(filters)
+        with self._lock:
+            if key in self._offsets:
+                self._offsets.move_to_end(key)
+                return self._offsets[key]
+        expression = filter_expression(filters)
+        offsets = [0]
+        for row_group in self._row_groups:
+            if expression is None:
+                # count_rows() without a filter counts the whole file, not the row group
+                matching = row_group.row_groups[0].num_rows
+            else:
+                matching = row_group.count_rows(filter=expression)
+            offsets.append(offsets[-1] + matching)
+        with self._lock:
+            self._offsets[key] = offsets
+            while len(self._offsets) > OFFSET_CACHE_SIZE:
+                self._offsets.popitem(last=False)
+        return offsets
+
+    def count(self, filters: dict = None) -> int:
+        return self.row_offsets(filters)[-1]
+
+    def page(self, filters: dict = None, page: int = 0, page_size: int = DEFAULT_PAGE_SIZE,
+             columns=None) -> pd.DataFrame:
+        """
+        Rows page * page_size onwards (at most page_size) of the filtered snapshot,
+        in snapshot order. Only the row groups holding those rows are read,
+        found from row_offsets, so a deep page costs the same as the first.
+        """
+        columns = list(columns or COLUMNS)
+        expression = filter_expression(filters)
+        offsets = self.row_offsets(filters)
+        start = page * page_size
+        end = min(start + page_size, offsets[-1])
+        tables = []
+        idx = bisect.bisect_right(offsets, start) - 1
+        while start < end:
+            table = self._row_groups[idx].to_table(schema=SNAPSHOT_SCHEMA, columns=columns, filter=expression)
+            piece = table.slice(start - offsets[idx], end - start)
+            tables.append(piece)
+            start += piece.num_rows
+            idx += 1
+        if not tables:
+            return SNAPSHOT_SCHEMA.empty_table().select(columns).to_pandas()
+        return pa.concat_tables(tables).to_pandas()
+
+    def options(self, column: str, filters: dict = None) -> list:
+        """Distinct values of column among the rows matching filters, sorted"""
+        values = self.dataset.to_table(columns=[column], filter=filter_expression(filters))[column]
+        return sorted(v for v in pc.unique(values).to_pylist() if v not in (None, ""))
+
+    def week_range(self) -> tuple:
+        """(first, last) Week of the snapshot, (None, None) when it is empty"""
+        weeks = self.dataset.to_table(columns=["Week"])["Week"]
+        bounds = pc.min_max(weeks).as_py()
+        return bounds["min"], bounds["max"]
+
+    def aggregate(self, by, filters: dict = None) -> pd.DataFrame:
+        """
+        Rows, Unique Codes, resources and projects per group of the by columns,
+        largest groups first.
+        """
+        by = [by] if isinstance(by, str) else list(by)
+        table = self.dataset.to_table(columns=list(dict.fromkeys(by + ["Unique Code", "Resource", "Project Number"])),
+                                      filter=filter_expression(filters))
+        grouped = table.group_by(by).aggregate([
+            ([], "count_all"),
+            ("Unique Code", "count_distinct"),
+            ("Resource", "count_distinct"),
+            ("Project Number", "count_distinct"),
+        ]).to_pandas()
+        grouped = grouped.rename(columns={
+            "count_all": "Rows",
+            "Unique Code_count_distinct": "Unique Codes",
+            "Resource_count_distinct": "Resources",
+            "Project Number_count_distinct": "Projects",
+        })
+        return grouped[by + ["Rows", "Unique Codes", "Resources", "Projects"]].sort_values(
+            "Rows", ascending=False, ignore_index=True)
@@ -0,0 +1,273 @@
+"""
+Capacity forecast computed in Python instead of by workbook formulas.
+
+The Team workbooks' "Summary Table" and "Capacity Forecast %" sheets hold one
+row per resource and one "Week NN" column per ISO week, derived from the
+assignment tables ("Oracle" and "Opportunity | Leaves | Others"). Here the
+per-resource, per-week allocation is pivoted with pandas and written into
+those sheets as static values, so opening or saving a workbook no longer
+recalculates formulas over the whole Oracle table. An "Availability" sheet
+of the same layout, where a workbook has one, gets each resource's weekly
+capacity minus its allocation.
+
+Week columns are keyed by ISO year and week ("2026-W07"), so a table that
+runs past new year keeps Week 05 of both years apart. The headers only carry
+the week number (unless they hold a year or a date): the year rolls over
+where the week numbers wrap, anchored so that this week's column is in the
+current ISO year, as hide_and_protect assumes.
+"""
+import re
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+
+from .schema import SchemaError
+
+ASSIGNMENT_SHEETS = ("Oracle", "Opportunity | Leaves | Others")
+
+# Sheet -> metric written into its week columns. Sheets a workbook does not have are skipped.
+FORECAST_SHEETS = {
+    "Summary Table": "allocation",
+    "Capacity Forecast %": "percent",
+    "Availability": "availability",
+}
+
+# Week cells carry FTE fractions, 1.0 is a full week of one resource. A
+# capacity column on a forecast sheet overrides it per resource.
+DEFAULT_WEEKLY_CAPACITY = 1.0
+CAPACITY_HEADERS = ("Capacity", "Weekly Capacity", "FTE")
+
+RESOURCE_HEADER = "Resource Name"
+HEADER_SEARCH_ROWS = 10
+WEEK_PATTERN = re.compile(r"\bWeek\s*(\d{1,2})\b")
+YEAR_PATTERN = re.compile(r"\b(20\d{2})\b")
+
+
+def week_label(day: date) -> str:
+    """ISO week label as used in the workbook headers, e.g. "Week 07" (same logic as hide_and_protect)"""
+    return f"Week {day.isocalendar()[1]:02d}"
+
+
+def week_key(year: int, week: int) -> str:
+    return f"{year}-W{week:02d}"
+
+
+def parse_week_header(header):
+    """
+    (year or None, week) of a week header: "Week 7" / "Week 07 (Feb)" -> (None, 7),
+    "Week 07 2026" -> (2026, 7), a date cell -> its ISO year and week; None otherwise
+    """
+    if isinstance(header, (date, datetime)):
+        iso = header.isocalendar()
+        return iso[0], iso[1]
+    match = WEEK_PATTERN.search(str(header or ""))
+    if not match:
+        return None
+    year = YEAR_PATTERN.search(str(header))
+    return (int(year.group(1)) if year else None), int(match.group(1))
+
+
+def week_keys(headers, today: date = None) -> dict:
+    """
+    Column position -> "YYYY-Www" for every week header, in column order.
+    Headers without a year take it from the previous week column, plus one
+    where the week number wraps; see the module docstring for the anchor.
+    """
+    today = today or date.today()
+    parsed = [(p,) + parse_week_header(h) for p, h in enumerate(headers) if parse_week_header(h)]
+    if not parsed:
+        return {}
+
+    # Years relative to the first week column, from explicit years and wraps
+    offsets, offset, previous = [], 0, None
+    for _, _, week in parsed:
+        if previous is not None and week < previous:
+            offset += 1
+        offsets.append(offset)
+        previous = week
+    anchors = [year - offsets[i] for i, (_, year, _) in enumerate(parsed) if year]
+    if anchors:
+        first_year = anchors[0]
+    else:
+        this_year, this_week = today.isocalendar()[:2]
+        current = [offsets[i] for i, (_, _, week) in enumerate(parsed) if week == this_week]
+        first_year = this_year - (current[0] if current else 0)
+
+    keys = {}
+    for i, (position, year, week) in enumerate(parsed):
+        keys[position] = week_key(year or first_year + offsets[i], week)
+    return keys
+
+
+def find_header_row(values, predicate):
+    """Index of the first of the top rows where predicate(cell) holds for some cell, or None"""
+    for r, row in enumerate(values[:HEADER_SEARCH_ROWS]):
+        if any(predicate(cell) for cell in row):
+            return r
+    return None
+
+
+def assignments_frame(values, today: date = None) -> pd.DataFrame:
+    """
+    Assignment rows of a sheet's used range as a DataFrame with the resource
+    column and one "YYYY-Www" column per week column.
+    """
+    values = [list(row) for row in (values or [])]
+    header_row = find_header_row(values, lambda cell: str(cell or "").strip() == RESOURCE_HEADER)
+    if header_row is None:
+        return pd.DataFrame(columns=[RESOURCE_HEADER])
+    headers = values[header_row]
+    frame = pd.DataFrame(values[header_row + 1:], columns=range(len(headers)), dtype=object)
+
+    columns = {RESOURCE_HEADER: frame[[str(h or "").strip() for h in headers].index(RESOURCE_HEADER)]}
+    for position, week in week_keys(headers, today).items():
+        if week not in columns:
+            columns[week] = frame[position]
+    return pd.DataFrame(columns)
+
+
+def allocation_by_week(assignments: pd.DataFrame) -> pd.DataFrame:
+    """
+    Per-resource, per-week allocation: the week columns of every assignment
+    melted to (resource, week, value) and pivoted with a sum.
+
+    Returns:
+        DataFrame indexed by resource name with one "YYYY-Www" column per week
+    """
+    week_columns = [c for c in assignments.columns if c != RESOURCE_HEADER]
+    resources = assignments[RESOURCE_HEADER].astype(str).str.strip()
+    valid = assignments[RESOURCE_HEADER].notna() & (resources != "")
+    if not week_columns or not valid.any():
+        return pd.DataFrame()
+
+    long = assignments.loc[valid, week_columns].assign(**{RESOURCE_HEADER: resources[valid]}).melt(
+        id_vars=RESOURCE_HEADER, var_name="Week", value_name="Allocation"
+    )
+    long["Allocation"] = pd.to_numeric(long["Allocation"], errors="coerce").fillna(0.0)
+    pivot = long.pivot_table(index=RESOURCE_HEADER, columns="Week", values="Allocation",
+                             aggfunc="sum", fill_value=0.0)
+    return pivot[sorted(pivot.columns)]
+
+
+def compute_workbook_allocation(workbook, today: date = None) -> pd.DataFrame:
+    """Reads every assignment sheet of a Team workbook and returns allocation_by_week of the combined rows"""
+    frames = []
+    for sheet_name in ASSIGNMENT_SHEETS:
+        try:
+            values = workbook.sheets[sheet_name].used_range.value
+        except Exception:
+            continue
+        frames.append(assignments_frame(values, today))
+    frames = [f for f in frames if len(f)]
+    assignments = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=[RESOURCE_HEADER])
+    return allocation_by_week(assignments)
+
+
+def resource_capacity(body, headers, default: float = DEFAULT_WEEKLY_CAPACITY) -> np.ndarray:
+    """
+    Weekly capacity of every body row: the sheet's capacity column where it
+    holds a positive number, else default
+    """
+    stripped = [str(h or "").strip() for h in headers]
+    position = next((stripped.index(h) for h in CAPACITY_HEADERS if h in stripped), None)
+    if position is None:
+        return np.full(len(body), default)
+    capacity = pd.to_numeric(pd.Series([row[position] for row in body], dtype=object), errors="coerce")
+    return capacity.where(capacity > 0, default).to_numpy(dtype=float)
+
+
+def _contiguous_runs(positions):
+    """[2, 3, 4, 7, 8] -> [[2, 3, 4], [7, 8]]"""
+    runs = []
+    for p in positions:
+        if runs and p == runs[-1][-1] + 1:
+            runs[-1].append(p)
+        else:
+            runs.append([p])
+    return runs
+
+
+def write_forecast_to_sheet(sheet, allocation: pd.DataFrame, metric: str = "allocation",
+                            capacity: float = DEFAULT_WEEKLY_CAPACITY, today: date = None) -> int:
+    """
+    Writes a metric of allocation into the sheet's week columns for every
+    resource row, one block write per contiguous run of week columns.
+    Resources without assignments get 0.
+
+    Args:
+        metric: "allocation", "percent" (allocation / the resource's weekly
+            capacity, see resource_capacity) or "availability" (the weekly
+            capacity minus allocation, negative when over-allocated)
+
+    Returns:
+        int: number of resource rows written
+
+    Raises:
+        SchemaError: the sheet has week columns but no Resource Name column
+    """
+    used = sheet.used_range
+    values = [list(row) if isinstance(row, (list, tuple)) else [row] for row in (used.value or [])]
+    header_row = find_header_row(values, lambda cell: parse_week_header(cell) is not None)
+    if header_row is None:
+        return 0
+    headers = values[header_row]
+    week_positions = week_keys(headers, today)
+    stripped = [str(h or "").strip() for h in headers]
+    if RESOURCE_HEADER not in stripped:
+        raise SchemaError(getattr(sheet, "name", "Forecast sheet"), [RESOURCE_HEADER])
+    resource_position = stripped.index(RESOURCE_HEADER)
+
+    body = values[header_row + 1:]
+    while body and not str(body[-1][resource_position] or "").strip():
+        body.pop()
+    if not body:
+        return 0
+    resources = [str(row[resource_position] or "").strip() for row in body]
+
+    weeks = list(dict.fromkeys(week_positions.values()))
+    if len(allocation):
+        table = allocation.reindex(index=resources, columns=weeks).fillna(0.0)
+    else:
+        table = pd.DataFrame(0.0, index=resources, columns=weeks)
+    if metric == "percent":
+        table = table.div(resource_capacity(body, headers, capacity), axis=0)
+    elif metric == "availability":
+        table = table.rsub(resource_capacity(body, headers, capacity), axis=0)
+    blank_rows = np.array([resource == "" for resource in resources])
+
+    first_row = used.row + header_row + 1
+    for run in _contiguous_runs(sorted(week_positions)):
+        block = table[[week_positions[p] for p in run]].to_numpy(dtype=object, copy=True)
+        block[blank_rows, :] = None
+        sheet.range((first_row, used.column + run[0]),
+                    (first_row + len(body) - 1, used.column + run[-1])).value = block
+    return len(body)
+
+
+def write_capacity_forecast(workbook, capacity: float = DEFAULT_WEEKLY_CAPACITY, today: date = None) -> dict:
+    """
+    Computes the forecast of a Team workbook and writes it as static values
+    into the forecast sheets (unprotecting and re-protecting them). Formulas
+    in their week columns are overwritten.
+
+    Args:
+        capacity: weekly capacity of resources without a value in the
+            capacity column of "Capacity Forecast %" or "Availability"
+
+    Returns:
+        dict: sheet name -> resource rows written
+    """
+    allocation = compute_workbook_allocation(workbook, today)
+    written = {}
+    for sheet_name, metric_name in FORECAST_SHEETS.items():
+        try:
+            sheet = workbook.sheets[sheet_name]
+        except Exception:
+            continue
+        sheet.api.Unprotect("1234")
+        try:
+            written[sheet_name] = write_forecast_to_sheet(sheet, allocation, metric_name, capacity, today)
+        finally:
+            sheet.api.Protect("1234", True, True, True)
+    return written
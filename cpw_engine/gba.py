@@ -0,0 +1,324 @@
+"""GBA export: split a PFP extract into the GBA workbooks (`CPW Tool_<GBA>_Main.xlsm`)."""
+import os
+from datetime import datetime
+
+import pandas as pd
+
+from .events import Reporter
+from .excel import excel_session, find_last_col, find_last_row, open_workbook, read_block, save_workbook
+from .journal import PENDING, SAVED, WRITTEN, ExportJournal, payload_checksum
+from .paths import clean_file_name, derive_gba_file_path
+from .schema import GBA_SOURCE, validate_file
+
+
+def format_project_number(number):
+    try:
+        f = float(number)
+        if f.is_integer():
+            return str(int(f))
+        return str(number)
+    except Exception:
+        return str(number)
+
+
+def get_gba_project_details(sheet, columns=None):
+    """
+    Groups the source rows by GBA. columns is the ColumnMap of GBA_SOURCE,
+    compiled from the sheet's header row when not given (SchemaError when a
+    required column is missing).
+    """
+    last_row_ = find_last_row(sheet)
+    last_col_ = find_last_col(sheet)
+    return group_gba_rows(read_block(sheet, last_row_, last_col_), columns)
+
+
+def gba_of_department(department_name) -> str:
+    """GBA of an Expenditure Organization / Department name from its prefix token, "" when it has none"""
+    for tt in (t.strip() for t in str(department_name).split()):
+        if tt in ("MOB:", "Mobility:"):
+            return "Mobility"
+        elif tt in ("PLA:", "Places:"):
+            return "Places"
+        elif tt in ("RES:", "Resilience:"):
+            return "Resilience"
+        elif tt == "EF:":
+            return "Enabling Function"
+        elif tt == "SSC:":
+            return "Shared Services"
+    return ""
+
+
+def group_gba_rows(block, columns=None):
+    """get_gba_project_details on an already read block (header row first), e.g. a headless read"""
+    headers = block[0]
+    columns = columns or GBA_SOURCE.compile(headers)
+
+    colProject = columns.position("Project Number")
+    colProjectName = columns.position("Project Name")
+    colEmployeeName = columns.position("Employee Name")
+    colDepartmentName = columns.position("Expenditure Organization Name")
+
+    gba_dict = {}
+    for row in block[1:]:
+        department_name = (row[colDepartmentName] if colDepartmentName >= 0 else "") or ""
+        project_number = (row[colProject] if colProject >= 0 else "") or ""
+        project_name = (row[colProjectName] if colProjectName >= 0 else "") or ""
+        resource_name = (row[colEmployeeName] if colEmployeeName >= 0 else "")
+
+        gba_value = gba_of_department(department_name)
+        if gba_value:
+            project_number_fmt = format_project_number(project_number)
+            gba_dict.setdefault(gba_value, []).append(
+                [project_number_fmt, project_name, resource_name, department_name]
+            )
+
+    return gba_dict if gba_dict else None
+
+
+def build_resource_lookup(ws_resource):
+    last_row2 = find_last_row(ws_resource)
+    block = ws_resource.range((1, 1), (last_row2, 4)).value
+    lookup = {}
+    for row in block:
+        if row[1]:
+            lookup[str(row[1]).strip()] = (row[0], row[2], row[3])
+    return lookup
+
+
+def resource_frame(ws_resource) -> pd.DataFrame:
+    """
+    Resource List (columns A:D) as a frame keyed by the stripped resource name
+    in column B, with columns A, C, D as "h", "i", "j". Like build_resource_lookup,
+    the last row wins for a repeated name.
+    """
+    last_row2 = find_last_row(ws_resource)
+    block = ws_resource.range((1, 1), (last_row2, 4)).value
+    if block and not isinstance(block[0], (list, tuple)):
+        block = [block]
+    frame = pd.DataFrame(block or [], columns=["h", "key", "i", "j"], dtype=object)
+    frame = frame[frame["key"].astype(bool)]
+    frame = frame.assign(key=frame["key"].map(str).str.strip())
+    return frame.drop_duplicates(subset="key", keep="last")[["key", "h", "i", "j"]]
+
+
+def build_output_rows(projects, resources: pd.DataFrame, next_row: int, today: datetime = None,
+                      first_serial: int = None) -> list:
+    """
+    The 10 output columns (A:J) of a GBA group in one columnar pass: the date
+    and the serial range are broadcast, column C is the vectorised Unique Code
+    and H:J come from a single left join with the Resource List frame.
+
+    Args:
+        projects: [project number, project name, resource name, department] rows
+        resources: see resource_frame (empty frame for no Resource List)
+        next_row: sheet row of the first output row
+        today: date written into column A (default: today)
+        first_serial: serial of the first output row (default: next_row - 1),
+            see next_gba_serial
+
+    Returns:
+        list: rows ready for one block write to (next_row, 1)
+    """
+    group = pd.DataFrame(list(projects), columns=["d", "e", "f", "g"], dtype=object)
+    count = len(group)
+    # map(str) rather than astype(str): a blank resource must read "None" as in f"{value}"
+    group["key"] = group["f"].map(str).str.strip()
+    joined = group.merge(resources, how="left", on="key", indicator=True, validate="many_to_one")
+    unmatched = (joined["_merge"] == "left_only").to_numpy()
+
+    payload = pd.DataFrame({
+        "a": (today or datetime.today()).strftime("%d-%b-%Y"),
+        "b": None,
+        "c": group["d"].map(str) + " - " + group["f"].map(str),
+        "d": group["d"], "e": group["e"], "f": group["f"], "g": group["g"],
+        "h": joined["h"], "i": joined["i"], "j": joined["j"],
+    }).to_numpy(dtype=object, copy=True)
+    payload[unmatched, 7:10] = ""
+    # Plain ints for the serial column, the COM layer does not take numpy scalars
+    first_serial = next_row - 1 if first_serial is None else first_serial
+    payload[:, 1] = list(range(first_serial, first_serial + count))
+    return payload.tolist()
+
+
+def gba_target_sheets(workbook):
+    """("Project Plan Analysis" sheet, Resource List frame) of a GBA workbook, adding the sheet if missing"""
+    try:
+        ws_target = workbook.sheets["Project Plan Analysis"]
+    except Exception:
+        ws_target = workbook.sheets.add()
+        ws_target.name = "Project Plan Analysis"
+
+    try:
+        ws_resource = workbook.sheets["Resource List"]
+        resources = resource_frame(ws_resource)
+    except Exception:
+        resources = pd.DataFrame(columns=["key", "h", "i", "j"])
+    return ws_target, resources
+
+
+def next_gba_row(ws_target) -> int:
+    """Row after the last filled cell of column A"""
+    return ws_target.api.Cells(ws_target.api.Rows.Count, 1).End(-4162).Row + 1
+
+
+def next_gba_serial(ws_target, target_file: str, next_row: int) -> int:
+    """
+    Serial (column B) after the highest one in the live rows above next_row
+    and in the workbook's archive, so numbering continues after archiving
+    moved old rows out of the sheet
+    """
+    from .archive import archived_max
+
+    live = ws_target.range((2, 2), (next_row - 1, 2)).value if next_row > 2 else []
+    live = live if isinstance(live, list) else [live]
+    live_max = pd.to_numeric(pd.Series(live, dtype=object), errors="coerce").max()
+    highest = max(0 if pd.isna(live_max) else int(live_max),
+                  archived_max(target_file, "Project Plan Analysis", "Index"))
+    return highest + 1
+
+
+def clear_content(workbook):
+    ws_ = workbook.sheets["Project Plan Analysis"]
+    last_row_ = find_last_row(ws_)
+    last_col_ = find_last_col(ws_)
+    if last_row_ >= 3:
+        ws_.range((3, 1), (last_row_, last_col_)).value = None
+    ws_.range((3, 1), (50000, 20)).value = None
+
+
+def export_gba_data_to_files(sheet, gba_file_path: str, reporter: Reporter = None,
+                             journal: ExportJournal = None, columns=None, targets=None):
+    """
+    Appends the rows of the source sheet to the GBA workbooks under
+    `<gba_file_path> \\ 02 GBA Workbooks`, creating them from the GBA template
+    when needed. Workbooks the journal already records as saved with the same
+    rows are skipped. targets limits the export to those GBA values.
+
+    Returns:
+        dict: {"created": [...], "updated": [...], "skipped": [...],
+        "start_rows": {target_file: first appended row}},
+        or None when the source has no GBA rows
+    """
+    reporter = reporter or Reporter()
+    journal = journal or ExportJournal()
+    gba_projects = get_gba_project_details(sheet, columns)
+    if gba_projects and targets is not None:
+        gba_projects = {gba: rows for gba, rows in gba_projects.items() if gba in targets}
+    if not gba_projects:
+        reporter.error("No data found!")
+        return None
+
+    created_files = []
+    updated_files = []
+    skipped_files = []
+    start_rows = {}
+
+    for idx, (gba_value, projects) in enumerate(gba_projects.items()):
+        reporter.progress(f"Processing GBA: {gba_value} ({idx + 1}/{len(gba_projects)})...")
+
+        # Clean the GBA value for filename
+        clean_gba_value = clean_file_name(gba_value)
+        target_file = os.path.join(
+            gba_file_path, "02 GBA Workbooks", f"CPW Tool_{clean_gba_value}_Main.xlsm"
+        )
+        target_file = target_file.replace("/", os.sep)
+        file_exists = os.path.exists(target_file)
+
+        checksum = payload_checksum(projects)
+        if journal.is_saved(target_file, checksum):
+            skipped_files.append(f"CPW Tool_{clean_gba_value}_Main.xlsm")
+            start_rows[target_file] = journal.start_row(target_file, checksum)
+            reporter.info(f"⏭️ Skipping CPW Tool_{clean_gba_value}_Main.xlsm, already saved by a previous run")
+            continue
+        journal.mark(target_file, PENDING, checksum)
+
+        if file_exists:
+            target_wb = open_workbook(target_file)
+            updated_files.append(f"CPW Tool_{clean_gba_value}_Main.xlsm")
+            reporter.success(f"✅ Updating existing file: CPW Tool_{clean_gba_value}_Main.xlsm")
+        else:
+            template_path = os.path.join(
+                gba_file_path, "02 GBA Workbooks", "CPW GBA Specific Template.xlsm"
+            )
+            target_wb = open_workbook(template_path)
+            clear_content(target_wb)
+            created_files.append(f"CPW Tool_{clean_gba_value}_Main.xlsm")
+            reporter.success(f"🆕 Creating new file: CPW Tool_{clean_gba_value}_Main.xlsm")
+
+        ws_target, resources = gba_target_sheets(target_wb)
+
+        resumed_row = journal.start_row(target_file, checksum)
+        if resumed_row:
+            # A previous attempt wrote these rows but never saved them, write them at the same place
+            next_row = resumed_row
+        elif file_exists:
+            next_row = next_gba_row(ws_target)
+        else:
+            next_row = 2
+        start_rows[target_file] = next_row
+
+        first_serial = next_gba_serial(ws_target, target_file, next_row) if file_exists else 1
+        output_rows = build_output_rows(projects, resources, next_row, first_serial=first_serial)
+        if output_rows:
+            ws_target.range((next_row, 1),
+                            (next_row + len(output_rows) - 1, 10)).value = output_rows
+        journal.mark(target_file, WRITTEN, checksum, start_row=next_row)
+
+        reporter.progress(f"Saving CPW Tool_{clean_gba_value}_Main.xlsm ({idx + 1}/{len(gba_projects)})...")
+        try:
+            if not file_exists:
+                os.makedirs(os.path.dirname(target_file), exist_ok=True)
+                save_workbook(target_wb, target_file)
+            else:
+                save_workbook(target_wb)
+            target_wb.close()
+            journal.mark(target_file, SAVED, checksum)
+            reporter.info(f"💾 Saved: {len(projects)} entries to {clean_gba_value}")
+        except Exception as e:
+            journal.mark(target_file, WRITTEN, checksum, error=str(e))
+            reporter.error(f"❌ Error saving {clean_gba_value}: {e}")
+            try:
+                target_wb.close()
+            except:
+                pass
+
+    reporter.progress_done()
+    reporter.success("🎉 GBA-wise project data processing completed!")
+
+    if created_files:
+        reporter.info(f"📁 **New GBA Files Created:** {', '.join(created_files)}")
+
+    if updated_files:
+        reporter.info(f"🔄 **GBA Files Updated:** {', '.join(updated_files)}")
+
+    if skipped_files:
+        reporter.info(f"⏭️ **GBA Files Already Done:** {', '.join(skipped_files)}")
+
+    failed = journal.failed_targets()
+    if failed:
+        reporter.warning(f"⚠️ {len(failed)} GBA file(s) were not saved. Run the export again to retry only those.")
+
+    return {"created": created_files, "updated": updated_files, "skipped": skipped_files,
+            "start_rows": start_rows}
+
+
+def run_gba_export(source_file: str, reporter: Reporter = None, resume: bool = True, targets=None):
+    """
+    Opens the PFP extract at source_file and runs export_gba_data_to_files on
+    its first sheet, checkpointing into the run journal of that source file.
+
+    Args:
+        resume: False ignores workbooks a previous run of the same source already saved
+        targets: Only export these GBA values (a work queue shard)
+    """
+    # Header-only check, a file without the GBA columns fails before Excel is started
+    columns = validate_file(source_file, GBA_SOURCE)
+    gba_file_path = derive_gba_file_path(source_file)
+    journal = ExportJournal.for_run(os.path.join(gba_file_path, "02 GBA Workbooks"), "gba", source_file,
+                                    resume=resume, part=",".join(sorted(targets or ())))
+    with excel_session():
+        book = open_workbook(source_file)
+        try:
+            return export_gba_data_to_files(book.sheets[0], gba_file_path, reporter, journal, columns, targets)
+        finally:
+            book.close()
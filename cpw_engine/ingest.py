@@ -0,0 +1,87 @@
+"""
+Upload ingestion: parse an uploaded Excel file from memory and keep a disk copy.
+
+An upload is identified by the sha1 of its bytes. The DataFrame is parsed
+straight from the in-memory buffer (no write-then-read round trip), and the
+disk copy is written by a background thread, only when that file does not
+already hold the same upload.
+"""
+import hashlib
+import io
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import pandas as pd
+
+from .paths import file_fingerprint
+
+UPLOAD_FOLDER = "Uploaded_PFP_Files"
+
+_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="cpw-upload-writer")
+_written = {}
+_written_lock = threading.Lock()
+
+
+def upload_buffer(uploaded_file) -> memoryview:
+    """Bytes of an upload without copying them (Streamlit UploadedFile, BytesIO or bytes)"""
+    if hasattr(uploaded_file, "getbuffer"):
+        return uploaded_file.getbuffer()
+    return memoryview(uploaded_file)
+
+
+def upload_fingerprint(buffer) -> str:
+    return hashlib.sha1(buffer).hexdigest()
+
+
+def parse_upload(uploaded_file, **read_excel_kwargs) -> pd.DataFrame:
+    """
+    read_excel on the in-memory upload. A file-like upload is read in place,
+    raw bytes are wrapped in a BytesIO.
+    """
+    if hasattr(uploaded_file, "seek"):
+        uploaded_file.seek(0)
+        return pd.read_excel(uploaded_file, **read_excel_kwargs)
+    return pd.read_excel(io.BytesIO(uploaded_file), **read_excel_kwargs)
+
+
+def _write_copy(path: str, data: bytes, fingerprint: str) -> str:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_file = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_file, "wb") as f:
+        f.write(data)
+    os.replace(tmp_file, path)
+    with _written_lock:
+        _written[os.path.abspath(path)] = (fingerprint, file_fingerprint(path))
+    return path
+
+
+def save_upload(buffer, file_name: str, folder: str = None, fingerprint: str = None):
+    """
+    Writes the upload to `<folder> \\ file_name` in the background.
+
+    Skips the write when the file on disk is the copy of the same upload this
+    process wrote last (same content fingerprint, file unchanged since).
+
+    Args:
+        buffer: upload bytes, see upload_buffer
+        file_name: name of the uploaded file
+        folder: target folder (default: Uploaded_PFP_Files in the working directory)
+        fingerprint: upload_fingerprint(buffer), computed when not given
+
+    Returns:
+        tuple: (saved path, Future resolving to the path once it is on disk)
+    """
+    folder = folder or os.path.join(os.getcwd(), UPLOAD_FOLDER)
+    path = os.path.join(folder, file_name)
+    fingerprint = fingerprint or upload_fingerprint(buffer)
+
+    with _written_lock:
+        previous = _written.get(os.path.abspath(path))
+    if previous and os.path.exists(path) and previous == (fingerprint, file_fingerprint(path)):
+        done = Future()
+        done.set_result(path)
+        return path, done
+
+    # The writer thread gets its own bytes, the upload buffer may be released after this rerun
+    return path, _writer.submit(_write_copy, path, bytes(buffer), fingerprint)
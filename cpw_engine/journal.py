@@ -0,0 +1,168 @@
+"""
+Checkpoint journal for the GBA/Team exports.
+
+Every target workbook of an export run goes pending -> written -> saved, with
+a checksum of the rows it receives and the row they were written at. A rerun
+of the same export (same source file fingerprint) skips targets already saved
+with the same payload and retries the others at their recorded start row, so
+a failed save never leads to rows being appended twice.
+
+Several processes (the app's workbook writer, batch runs, queue workers) can
+record into the same journal file. Each save re-reads the file under its lock
+and only replaces the targets this instance marked.
+"""
+import bisect
+import glob
+import hashlib
+import json
+import os
+from datetime import datetime
+
+from .paths import file_fingerprint, file_lock
+
+PENDING = "pending"
+WRITTEN = "written"
+SAVED = "saved"
+
+JOURNAL_FOLDER = ".cpw_journal"
+
+
+def payload_checksum(rows) -> str:
+    """Stable checksum of a 2-D payload (list of lists or ndarray)"""
+    if hasattr(rows, "tolist"):
+        rows = rows.tolist()
+    data = json.dumps(rows, default=str, separators=(",", ":"))
+    return hashlib.sha1(data.encode("utf-8")).hexdigest()
+
+
+class ExportJournal:
+    """
+    JSON journal of one export run: target workbook -> status, checksum, start row.
+    With path=None the journal only lives in memory.
+    """
+
+    def __init__(self, path: str = None):
+        self.path = path
+        self.entries = self._read() if path else {}
+        # Targets marked by this instance, the only ones a save replaces on disk
+        self._marked = set()
+        # False after resume=False: the first save drops what previous runs recorded
+        self._merge_on_save = True
+
+    def _read(self) -> dict:
+        if not os.path.exists(self.path):
+            return {}
+        with open(self.path, encoding="utf-8") as f:
+            return json.load(f).get("targets", {})
+
+    @classmethod
+    def for_run(cls, output_folder: str, kind: str, source_file: str, start_row: int = 0, resume: bool = True,
+                part: str = ""):
+        """
+        Journal of exporting source_file (as of its current fingerprint) into
+        output_folder. kind is "gba" or "team".
+
+        Args:
+            resume: False discards what a previous run of the same export recorded
+            part: Identifies a subset of the targets (a work queue shard), so
+                concurrent shards of one export never write the same journal file
+        """
+        run_key = repr((kind, file_fingerprint(source_file), start_row) + ((part,) if part else ()))
+        run_id = hashlib.sha1(run_key.encode("utf-8")).hexdigest()[:16]
+        journal = cls(os.path.join(output_folder, JOURNAL_FOLDER, f"{kind}_{run_id}.json"))
+        if not resume:
+            journal.entries = {}
+            journal._merge_on_save = False
+        return journal
+
+    def is_saved(self, target: str, checksum: str) -> bool:
+        entry = self.entries.get(target)
+        return bool(entry) and entry["status"] == SAVED and entry["checksum"] == checksum
+
+    def start_row(self, target: str, checksum: str):
+        """Row a previous, unfinished attempt wrote the same payload at, or None"""
+        entry = self.entries.get(target)
+        if entry and entry["checksum"] == checksum and entry.get("start_row"):
+            return entry["start_row"]
+        return None
+
+    def mark(self, target: str, status: str, checksum: str, start_row: int = None, error: str = ""):
+        entry = self.entries.setdefault(target, {})
+        entry.update({
+            "status": status,
+            "checksum": checksum,
+            "updated": datetime.now().isoformat(timespec="seconds"),
+            "error": error,
+        })
+        if start_row is not None:
+            entry["start_row"] = start_row
+        self._marked.add(target)
+        self._write()
+
+    def failed_targets(self) -> list:
+        """Targets this instance marked that are not saved (other processes' entries are theirs to report)"""
+        return [target for target in self._marked if self.entries[target]["status"] != SAVED]
+
+    def _write(self):
+        if not self.path:
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with file_lock(self.path):
+            entries = self._read() if self._merge_on_save else {}
+            entries.update({target: self.entries[target] for target in self._marked})
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"targets": entries}, f, indent=2)
+            os.replace(tmp_path, self.path)
+        self.entries = entries
+        self._merge_on_save = True
+
+
+def _journal_files(target_file: str) -> list:
+    """Journals of the output folder target_file lives in (exports journal next to their targets)"""
+    return sorted(glob.glob(os.path.join(os.path.dirname(os.path.abspath(target_file)), JOURNAL_FOLDER, "*.json")))
+
+
+def _same_file(a: str, b: str) -> bool:
+    return os.path.normcase(os.path.abspath(a)) == os.path.normcase(os.path.abspath(b))
+
+
+def unsaved_entries(target_file: str) -> list:
+    """(journal path, status) of every journal entry of target_file that is not saved yet"""
+    found = []
+    for path in _journal_files(target_file):
+        for target, entry in ExportJournal(path).entries.items():
+            if _same_file(target, target_file) and entry["status"] != SAVED:
+                found.append((path, entry["status"]))
+    return found
+
+
+def shift_start_rows(target_file: str, deleted_rows) -> int:
+    """
+    Moves the recorded start rows of target_file up by the number of deleted
+    sheet rows above them, after rows were deleted from the workbook (archiving).
+
+    Returns:
+        int: journal entries changed
+    """
+    deleted_rows = sorted(deleted_rows)
+    changed = 0
+    for path in _journal_files(target_file):
+        with file_lock(path):
+            journal = ExportJournal(path)
+            shifted = 0
+            for target, entry in journal.entries.items():
+                if not _same_file(target, target_file) or not entry.get("start_row"):
+                    continue
+                shift = bisect.bisect_left(deleted_rows, entry["start_row"])
+                if shift:
+                    entry["start_row"] -= shift
+                    shifted += 1
+            if not shifted:
+                continue
+            changed += shifted
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"targets": journal.entries}, f, indent=2)
+            os.replace(tmp_path, path)
+    return changed
@@ -0,0 +1,23 @@
+"""
+Integer surrogate keys for Unique Code.
+
+A Unique Code ("{Project Number} - {Employee Name}") is mapped to a stable
+int64 id: a keyed 64-bit hash of the code (pandas' hash_array with a fixed
+key), so every process computes the same id for the same code without
+coordinating or storing anything. Dedup and the week diff then run on int64
+arrays instead of Python strings.
+
+Older versions kept a code registry (.unique_code_registry.csv) and id
+caches (.cpw_keys) in OLD PFP. Nothing reads them any more, they can be
+deleted.
+"""
+import numpy as np
+import pandas as pd
+
+HASH_KEY = "cpw-unique-code0"
+
+
+def code_ids(codes) -> np.ndarray:
+    """Stable int64 ids of codes (None / NaN count as "")"""
+    values = pd.Series(codes, dtype=object).fillna("").astype(str).to_numpy(dtype=object)
+    return pd.util.hash_array(values, hash_key=HASH_KEY, categorize=True).view(np.int64)
@@ -0,0 +1,105 @@
+import os
+import time
+from contextlib import contextmanager
+
+
+def clean_path(path: str) -> str:
+    if not path:
+        return ""
+    return path.strip().strip('"').strip("'")
+
+
+def clean_file_name(fn: str) -> str:
+    """Clean filename by removing invalid characters"""
+    invalid = r'\/:*?"<>|'
+    for ch in invalid:
+        fn = fn.replace(ch, '_')
+    return fn.strip()
+
+
+def derive_gba_file_path(selected_file: str) -> str:
+    target_folder = "01 Data Processing"
+    pos = selected_file.find(target_folder)
+    if pos == -1:
+        raise ValueError(f"Target folder '{target_folder}' not found in path.")
+    directory_path = selected_file[: pos + len(target_folder)]
+    if len(directory_path) - 19 > 0:
+        gba_file_path = directory_path[: len(directory_path) - 19]
+    else:
+        gba_file_path = os.path.dirname(directory_path)
+    return gba_file_path
+
+
+def derive_team_file_path(selected_file: str) -> str:
+    target_folder = "02 GBA Workbooks"
+    pos = selected_file.find(target_folder)
+    if pos == -1:
+        raise ValueError(f"Target folder '{target_folder}' not found in path.")
+    directory_path = selected_file[: pos + len(target_folder)]
+    if len(directory_path) - 17 > 0:
+        team_file_path = directory_path[: len(directory_path) - 17]
+    else:
+        team_file_path = os.path.dirname(directory_path)
+    return team_file_path
+
+
+def file_fingerprint(path: str) -> tuple:
+    """Cheap identity of a file on disk (path, mtime, size) used as a cache key"""
+    stat = os.stat(path)
+    return (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+
+
+def find_latest_file(folder: str, prefix: str = "", exclude: str = ""):
+    """Newest .xlsx/.xls file in a folder (by modification time), or None"""
+    if not os.path.isdir(folder):
+        return None
+    candidates = []
+    for name in os.listdir(folder):
+        full_path = os.path.join(folder, name)
+        if name.startswith("~$") or not name.lower().endswith((".xlsx", ".xls")):
+            continue
+        if not name.startswith(prefix) or os.path.abspath(full_path) == os.path.abspath(exclude or ""):
+            continue
+        candidates.append(full_path)
+    if not candidates:
+        return None
+    return max(candidates, key=os.path.getmtime)
+
+
+@contextmanager
+def file_lock(path: str, timeout: float = 60.0, stale_seconds: float = 300.0):
+    """
+    Cross-process lock on path, held through an exclusively created
+    `<path>.lock` file (works on network shares, unlike fcntl/msvcrt locks).
+    A lock file older than stale_seconds is left over by a crashed process
+    and is taken over.
+
+    Raises:
+        TimeoutError: when the lock is not acquired within timeout seconds
+    """
+    lock_path = f"{path}.lock"
+    os.makedirs(os.path.dirname(os.path.abspath(lock_path)), exist_ok=True)
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            break
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(lock_path) > stale_seconds:
+                    os.remove(lock_path)
+                    continue
+            except OSError:
+                continue
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"Could not lock {path} within {timeout:.0f}s (lock file: {lock_path})")
+            time.sleep(0.05)
+    try:
+        os.write(fd, str(os.getpid()).encode("ascii"))
+        os.close(fd)
+        yield
+    finally:
+        try:
+            os.remove(lock_path)
+        except OSError:
+            pass
@@ -0,0 +1,208 @@
+"""PFP processing: unique codes, cleaning and the week-over-week diff."""
+import glob
+import hashlib
+import os
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from .keys import code_ids
+from .paths import file_fingerprint
+from .schema import CLEANED_PFP, RAW_PFP, validate_file
+
+PROJECT_PLAN_FILE = "Project Plan Analysis-continuous.xlsx"
+CLEANED_PREFIX = "Project Plan Analysis-continuous-"
+RAW_DATA_FOLDER = "Raw Data"
+OLD_PFP_FOLDER = "OLD PFP"
+NEW_PFP_FOLDER = "NEW PFP"
+
+
+def first_time_unique_code_run_pfp(df):
+    RAW_PFP.compile(df.columns)
+    df['Unique Code'] = df['Project Number'].astype(str) + ' - ' + df['Employee Name'].astype(str)
+    cols = ['Unique Code'] + [col for col in df.columns if col != 'Unique Code']
+    return df[cols]
+
+
+def first_time_run_pfp(df, ids=None):
+    """
+    Removes duplicate Unique Codes, blank Employee Names and
+    'Labor Cost, Conversion Employee' rows.
+
+    Args:
+        df: PFP data with a Unique Code column
+        ids: Optional int64 Unique Code ids aligned with df (see keys.code_ids),
+            dedup then runs on them instead of the strings
+
+    Returns:
+        tuple: (cleaned DataFrame, cleaning statistics dict)
+    """
+    original_count = len(df)
+
+    # Remove duplicates based on Unique Code
+    if ids is not None:
+        df_unique = df[~pd.Series(ids).duplicated(keep='first').to_numpy()]
+    else:
+        df_unique = df.drop_duplicates(subset=['Unique Code'], keep='first')
+    duplicates_removed = original_count - len(df_unique)
+
+    # Remove rows with missing Employee Name
+    df_no_missing = df_unique.dropna(subset=['Employee Name'])
+    blank_employees_removed = len(df_unique) - len(df_no_missing)
+
+    # Remove 'Labor Cost, Conversion Employee' entries
+    df_final = df_no_missing[df_no_missing['Employee Name'] != 'Labor Cost, Conversion Employee']
+    labor_cost_removed = len(df_no_missing) - len(df_final)
+
+    stats = {
+        "original_count": original_count,
+        "duplicates_removed": duplicates_removed,
+        "blank_employees_removed": blank_employees_removed,
+        "labor_cost_removed": labor_cost_removed,
+        "final_count": len(df_final)
+    }
+    return df_final, stats
+
+
+def pfp_folders(raw_file: str) -> dict:
+    """Folder layout around a RAW PFP file in `<PFP folder> \\ Raw Data`"""
+    raw_data_folder = os.path.dirname(raw_file)
+    pfp_folder = os.path.dirname(raw_data_folder)
+    return {
+        "pfp_folder": pfp_folder,
+        "project_plan_path": os.path.join(pfp_folder, PROJECT_PLAN_FILE),
+        "old_pfp_folder": os.path.join(pfp_folder, OLD_PFP_FOLDER),
+        "new_pfp_folder": os.path.join(pfp_folder, NEW_PFP_FOLDER),
+    }
+
+
+def cleaned_file_name(date_str: str = "") -> str:
+    date_str = date_str or datetime.now().strftime('%Y-%m-%d')
+    return f"{CLEANED_PREFIX}{date_str}.xlsx"
+
+
+def process_raw_pfp(raw_file: str, df_raw=None) -> dict:
+    """
+    Unique code creation and cleaning of a RAW PFP file. Writes
+    Project Plan Analysis-continuous.xlsx next to the Raw Data folder and the
+    cleaned copy into OLD PFP, and records the week in the OLD PFP history
+    store (see weeks.HistoryStore). The weekly copies are never deleted here,
+    see weeks.prune_snapshots.
+
+    Returns:
+        dict: {"cleaned_path", "cleaned_df", "ids" (Unique Code ids of cleaned_df), "stats", "raw_rows"}
+    """
+    folders = pfp_folders(raw_file)
+    if df_raw is None:
+        validate_file(raw_file, RAW_PFP)
+        df_raw = pd.read_excel(raw_file)
+
+    unique_df = first_time_unique_code_run_pfp(df_raw)
+    unique_df.to_excel(folders["project_plan_path"], index=False)
+
+    ids = code_ids(unique_df['Unique Code'])
+    cleaned_df, stats = first_time_run_pfp(unique_df, ids)
+    cleaned_ids = ids[unique_df.index.get_indexer(cleaned_df.index)]
+
+    week = datetime.now().strftime('%Y-%m-%d')
+    cleaned_path = os.path.join(folders["old_pfp_folder"], cleaned_file_name(week))
+    os.makedirs(folders["old_pfp_folder"], exist_ok=True)
+    cleaned_df.to_excel(cleaned_path, index=False)
+
+    from .weeks import HistoryStore
+    HistoryStore.for_folder(folders["old_pfp_folder"]).add_week(cleaned_df, week)
+    return {"cleaned_path": cleaned_path, "cleaned_df": cleaned_df, "ids": cleaned_ids,
+            "stats": stats, "raw_rows": len(df_raw)}
+
+
+def diff_pfp_weeks(df_prev_week, df_current_week, prev_ids=None, current_ids=None):
+    """
+    Rows of the current week whose Unique Code is not present in the
+    previous week. With the Unique Code ids of both weeks (see
+    keys.code_ids) the membership test runs on int64 arrays.
+
+    Returns:
+        tuple: (new rows DataFrame, comparison statistics dict)
+    """
+    if prev_ids is not None and current_ids is not None:
+        prev_week_unique_codes = pd.Series(prev_ids)
+        current_week_unique_codes = pd.Series(current_ids)
+        is_new_row = ~np.isin(current_ids, prev_ids)
+    else:
+        prev_week_unique_codes = df_prev_week['Unique Code']
+        current_week_unique_codes = df_current_week['Unique Code']
+        is_new_row = ~current_week_unique_codes.isin(prev_week_unique_codes).to_numpy()
+    df_new_pfp = df_current_week[is_new_row].copy()
+
+    stats = {
+        "prev_unique_codes": prev_week_unique_codes.nunique(),
+        "current_unique_codes": current_week_unique_codes.nunique(),
+        "new_entries": len(df_new_pfp),
+        "existing_entries": len(df_current_week) - len(df_new_pfp),
+    }
+    return df_new_pfp, stats
+
+
+def compare_pfp_weeks(prev_path: str, current_path: str):
+    """Loads both week files in full and diffs them on Unique Code ids, see diff_pfp_weeks"""
+    validate_file(prev_path, CLEANED_PFP)
+    validate_file(current_path, CLEANED_PFP)
+    df_prev_week = pd.read_excel(prev_path)
+    df_current_week = pd.read_excel(current_path)
+    return diff_pfp_weeks(df_prev_week, df_current_week,
+                          code_ids(df_prev_week['Unique Code']), code_ids(df_current_week['Unique Code']))
+
+
+def new_pfp_folder_for(prev_file: str) -> str:
+    """NEW PFP folder next to the OLD PFP folder holding prev_file"""
+    old_pfp_folder = os.path.dirname(prev_file)
+    return os.path.join(os.path.dirname(old_pfp_folder), NEW_PFP_FOLDER)
+
+
+def save_new_pfp(df_new_pfp, new_pfp_folder: str) -> str:
+    """Saves the new rows as New_PFP_YYYY-MM-DD.xlsx and returns the path"""
+    os.makedirs(new_pfp_folder, exist_ok=True)
+    new_pfp_path = os.path.join(new_pfp_folder, f"New_PFP_{datetime.now().strftime('%Y-%m-%d')}.xlsx")
+    df_new_pfp.to_excel(new_pfp_path, index=False)
+    return new_pfp_path
+
+
+def load_excel_cached(path: str, cache_dir: str) -> pd.DataFrame:
+    """
+    Reads an Excel file through an on-disk Parquet cache keyed by the file
+    fingerprint, so every worker process (and the next run) reuses a parse
+    that was already done instead of going through read_excel again.
+
+    The cache holds one file per source: writing a new parse deletes the ones
+    of the source's older fingerprints. A frame Parquet cannot hold (mixed
+    types in a column) is returned without caching, and an unreadable cache
+    file is parsed again.
+    """
+    path_key = hashlib.sha1(os.path.normcase(os.path.abspath(path)).encode("utf-8")).hexdigest()[:16]
+    key = hashlib.sha1(repr(file_fingerprint(path)).encode("utf-8")).hexdigest()[:16]
+    cache_file = os.path.join(cache_dir, f"{path_key}-{key}.parquet")
+    if os.path.exists(cache_file):
+        try:
+            return pd.read_parquet(cache_file)
+        except Exception:
+            pass
+    df = pd.read_excel(path)
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_file = f"{cache_file}.{os.getpid()}.tmp"
+    try:
+        df.to_parquet(tmp_file, compression="zstd")
+        os.replace(tmp_file, cache_file)
+    except Exception:
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
+        return df
+    # Parses of older versions of the file, and pickle files of the previous cache format, are never read again
+    stale = glob.glob(os.path.join(cache_dir, f"{path_key}-*.parquet")) + glob.glob(os.path.join(cache_dir, "*.pkl"))
+    for old_file in stale:
+        if old_file != cache_file:
+            try:
+                os.remove(old_file)
+            except OSError:
+                pass
+    return df
@@ -0,0 +1,170 @@
+"""
+Dry-run plans of the GBA and Team exports, without Excel.
+
+The source is grouped exactly as the export groups it (group_gba_rows /
+group_team_rows on a headless openpyxl read), and for every target workbook
+the plan tells whether it is created, updated or already done according to
+the run journal, how many rows it gets and at which row they start.
+
+The next free row of an existing target is read headlessly once and kept in
+a small index next to the targets, keyed by the workbook's fingerprint, so a
+plan over unchanged workbooks only reads the source.
+"""
+import json
+import os
+
+from openpyxl import load_workbook
+
+from .gba import group_gba_rows
+from .journal import ExportJournal, payload_checksum
+from .paths import clean_file_name, derive_gba_file_path, derive_team_file_path, file_fingerprint
+from .schema import GBA_SOURCE, GBA_WORKBOOK, validate_file
+from .team import DEFAULT_START_ROW, group_team_rows
+
+PLAN_INDEX_FILE = ".cpw_plan_index.json"
+
+CREATE = "create"
+UPDATE = "update"
+DONE = "already saved"
+
+
+def read_sheet_values(path: str, sheet_name: str = None, max_col: int = None) -> list:
+    """
+    Values of a sheet (default: the first one) as rows of lists, like an
+    xlwings block read: numbers as floats and trailing empty rows dropped.
+    """
+    book = load_workbook(path, read_only=True, data_only=True)
+    try:
+        sheet = book[sheet_name] if sheet_name else book.worksheets[0]
+        rows = [[float(v) if isinstance(v, int) and not isinstance(v, bool) else v for v in row]
+                for row in sheet.iter_rows(max_col=max_col, values_only=True)]
+    finally:
+        book.close()
+    while rows and all(v in (None, "") for v in rows[-1]):
+        rows.pop()
+    return rows
+
+
+def _gba_next_row(path: str) -> int:
+    """Row after the last filled cell of column A in "Project Plan Analysis" (End(xlUp) + 1)"""
+    column = read_sheet_values(path, "Project Plan Analysis", max_col=1)
+    return max(len(column), 1) + 1
+
+
+def _team_next_row(path: str) -> int:
+    """First empty cell of column E in "Oracle" from row 5, as find_first_empty_row_in_col"""
+    column = read_sheet_values(path, "Oracle", max_col=5)
+    for r in range(5, len(column) + 1):
+        value = column[r - 1][4] if len(column[r - 1]) >= 5 else None
+        if value is None or str(value).strip() == "":
+            return r
+    return max(5, len(column) + 1)
+
+
+class TargetIndex:
+    """Next free row of existing target workbooks, cached by workbook fingerprint"""
+
+    def __init__(self, folder: str):
+        self.path = os.path.join(folder, PLAN_INDEX_FILE)
+        self.entries = {}
+        self._dirty = False
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, encoding="utf-8") as f:
+                    self.entries = json.load(f)
+            except (OSError, ValueError):
+                self.entries = {}
+
+    def next_row(self, target: str, compute) -> int:
+        fingerprint = list(file_fingerprint(target))
+        entry = self.entries.get(target)
+        if entry and entry["fingerprint"] == fingerprint:
+            return entry["next_row"]
+        next_row = compute(target)
+        self.entries[target] = {"fingerprint": fingerprint, "next_row": next_row}
+        self._dirty = True
+        return next_row
+
+    def save(self):
+        if not self._dirty or not os.path.isdir(os.path.dirname(self.path)):
+            return
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, indent=2)
+        os.replace(tmp_path, self.path)
+        self._dirty = False
+
+
+def _plan_targets(groups: dict, output_folder: str, file_pattern: str, new_row: int, next_row_of,
+                  journal: ExportJournal) -> list:
+    index = TargetIndex(output_folder)
+    targets = []
+    for name, rows in groups.items():
+        file_name = file_pattern.format(clean_file_name(name))
+        target_file = os.path.join(output_folder, file_name).replace("/", os.sep)
+        checksum = payload_checksum(rows)
+        if journal.is_saved(target_file, checksum):
+            action, first_row = DONE, journal.start_row(target_file, checksum)
+        elif os.path.exists(target_file):
+            action = UPDATE
+            first_row = journal.start_row(target_file, checksum) or index.next_row(target_file, next_row_of)
+        else:
+            action, first_row = CREATE, new_row
+        targets.append({
+            "group": name,
+            "file": file_name,
+            "action": action,
+            "rows": len(rows),
+            "first_row": first_row,
+            "last_row": first_row + len(rows) - 1 if first_row else None,
+        })
+    index.save()
+    return targets
+
+
+def _summary(targets: list) -> dict:
+    return {
+        "targets": targets,
+        "create": sum(t["action"] == CREATE for t in targets),
+        "update": sum(t["action"] == UPDATE for t in targets),
+        "done": sum(t["action"] == DONE for t in targets),
+        "rows": sum(t["rows"] for t in targets if t["action"] != DONE),
+    }
+
+
+def plan_gba_export(source_file: str, resume: bool = True) -> dict:
+    """
+    What run_gba_export(source_file) would do, without opening Excel.
+
+    Returns:
+        dict: {"targets": [{"group", "file", "action", "rows", "first_row", "last_row"}],
+        "create", "update", "done" (target counts), "rows" (rows to write)}
+    """
+    columns = validate_file(source_file, GBA_SOURCE)
+    groups = group_gba_rows(read_sheet_values(source_file), columns) or {}
+    gba_file_path = derive_gba_file_path(source_file)
+    output_folder = os.path.join(gba_file_path, "02 GBA Workbooks")
+    journal = ExportJournal.for_run(output_folder, "gba", source_file, resume=resume)
+    return _summary(_plan_targets(groups, output_folder, "CPW Tool_{}_Main.xlsm", 2, _gba_next_row, journal))
+
+
+def plan_team_export(gba_workbook: str, start_row: int = DEFAULT_START_ROW, resume: bool = True) -> dict:
+    """What run_team_export(gba_workbook, start_row) would do, without opening Excel. See plan_gba_export"""
+    columns = validate_file(gba_workbook, GBA_WORKBOOK)
+    groups = group_team_rows(read_sheet_values(gba_workbook, GBA_WORKBOOK.sheet), start_row, columns) or {}
+    team_file_path = derive_team_file_path(gba_workbook)
+    output_folder = os.path.join(team_file_path, "03 Department Workbooks")
+    journal = ExportJournal.for_run(output_folder, "team", gba_workbook, start_row, resume=resume)
+    return _summary(_plan_targets(groups, output_folder, "CPW Tool_{}_Team.xlsm", 5, _team_next_row, journal))
+
+
+def plan_lines(plan: dict) -> list:
+    """Plan as readable lines for the CLI"""
+    lines = [
+        f"{t['action']:>13}  {t['file']}: {t['rows']:,} rows"
+        + (f" at rows {t['first_row']:,}-{t['last_row']:,}" if t["first_row"] and t["rows"] else "")
+        for t in plan["targets"]
+    ]
+    lines.append(f"{plan['create']} to create, {plan['update']} to update, {plan['done']} already saved, "
+                 f"{plan['rows']:,} rows to write")
+    return lines
@@ -0,0 +1,127 @@
+"""
+Column schemas of the files and sheets the pipelines read.
+
+Each schema is checked against the header row alone (openpyxl read-only,
+first row; pandas for legacy .xls files) before anything is loaded in full,
+so a file with a missing column fails in milliseconds instead of after the
+whole read. A successful check compiles a ColumnMap (header -> 0-based
+position) that the row extractors use instead of looking headers up again.
+"""
+import os
+from dataclasses import dataclass
+
+from openpyxl import load_workbook
+
+
+class SchemaError(ValueError):
+    """A file or sheet is missing required columns"""
+
+    def __init__(self, schema: str, missing, source: str = ""):
+        self.schema = schema
+        self.missing = list(missing)
+        self.source = source
+        where = f" in {os.path.basename(source)}" if source else ""
+        super().__init__(f"{schema}: missing column(s) {', '.join(self.missing)}{where}")
+
+
+class ColumnMap(dict):
+    """Header name -> 0-based column position, compiled by Schema.compile"""
+
+    def position(self, name: str) -> int:
+        """Position of name, -1 for an optional column the header row does not have"""
+        return self.get(name, -1)
+
+
+@dataclass(frozen=True)
+class Schema:
+    name: str
+    required: tuple
+    optional: tuple = ()
+    sheet: str = None
+    header_row: int = 1
+
+    def compile(self, headers, source: str = "") -> ColumnMap:
+        """
+        Maps the schema's columns to their positions in headers (first match,
+        surrounding whitespace ignored).
+
+        Raises:
+            SchemaError: when a required column is missing
+        """
+        positions = {}
+        for position, header in enumerate(headers):
+            name = str(header).strip() if header is not None else ""
+            if name and name not in positions:
+                positions[name] = position
+        missing = [c for c in self.required if c not in positions]
+        if missing:
+            raise SchemaError(self.name, missing, source)
+        return ColumnMap((c, positions[c]) for c in self.required + self.optional if c in positions)
+
+
+RAW_PFP = Schema("RAW PFP", required=("Project Number", "Employee Name"))
+
+CLEANED_PFP = Schema("Cleaned PFP", required=("Unique Code",), optional=("Project Number", "Employee Name"))
+
+# The PFP extract (New PFP / cleaned file) the GBA export splits
+GBA_SOURCE = Schema(
+    "GBA source",
+    required=("Project Number", "Employee Name", "Expenditure Organization Name"),
+    optional=("Project Name",),
+)
+
+# "Project Plan Analysis" of a GBA workbook, which the Team export splits
+GBA_WORKBOOK = Schema(
+    "GBA workbook",
+    required=("Unique Code", "Project Number", "Resource Name", "Department Name"),
+    optional=("Oracle Date", "Index", "Project Name"),
+    sheet="Project Plan Analysis",
+)
+
+SCHEMAS = {schema.name: schema for schema in (RAW_PFP, CLEANED_PFP, GBA_SOURCE, GBA_WORKBOOK)}
+
+
+def _read_xls_header(path: str, sheet_name: str = None, header_row: int = 1):
+    """read_header for the legacy .xls format, which openpyxl cannot open (pandas with xlrd)"""
+    import pandas as pd
+
+    try:
+        book = pd.ExcelFile(path)
+    except ImportError:
+        raise ValueError(f"{os.path.basename(path)}: .xls files need the xlrd package (pip install xlrd). "
+                         "Or save the file as .xlsx in Excel.") from None
+    with book:
+        if sheet_name and sheet_name not in book.sheet_names:
+            return None
+        rows = book.parse(sheet_name or 0, header=None, nrows=header_row)
+    if len(rows) < header_row:
+        return []
+    return [None if pd.isna(value) else value for value in rows.iloc[header_row - 1]]
+
+
+def read_header(path: str, sheet_name: str = None, header_row: int = 1):
+    """Header row of a sheet (default: the first sheet) without reading the rest, None if the sheet is missing"""
+    if path.lower().endswith(".xls"):
+        return _read_xls_header(path, sheet_name, header_row)
+    book = load_workbook(path, read_only=True, data_only=True)
+    try:
+        if sheet_name and sheet_name not in book.sheetnames:
+            return None
+        sheet = book[sheet_name] if sheet_name else book.worksheets[0]
+        rows = sheet.iter_rows(min_row=header_row, max_row=header_row, values_only=True)
+        return list(next(rows, ()))
+    finally:
+        book.close()
+
+
+def validate_file(path: str, schema: Schema) -> ColumnMap:
+    """
+    Checks the header row of path against schema.
+
+    Raises:
+        SchemaError: when a required column is missing
+    """
+    headers = read_header(path, schema.sheet, schema.header_row)
+    if headers is None:
+        raise SchemaError(schema.name, [f'sheet "{schema.sheet}"'], path)
+    return schema.compile(headers, path)
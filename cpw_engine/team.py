@@ -0,0 +1,325 @@
+"""Team export: split a GBA workbook into the department workbooks (`CPW Tool_<Team>_Team.xlsm`)."""
+import os
+from datetime import date
+
+import pandas as pd
+
+from .events import Reporter
+from .forecast import week_label, write_capacity_forecast
+from .excel import (excel_session, find_first_empty_row_in_col, find_last_col, find_last_row,
+                    open_workbook, read_block, save_workbook)
+from .journal import PENDING, SAVED, WRITTEN, ExportJournal, payload_checksum
+from .paths import clean_file_name, derive_team_file_path
+from .schema import GBA_WORKBOOK, validate_file
+
+DEFAULT_START_ROW = 2
+
+
+def _or_blank(column):
+    """Vectorized `value or ""`: None, empty strings and zeros become blanks"""
+    return column.where(column.notna() & column.astype(bool), "")
+
+
+def get_team_project_details(sheet, start_row: int = DEFAULT_START_ROW, columns=None):
+    """
+    Groups the GBA workbook rows from start_row onwards by Department Name.
+
+    The block is read once into a DataFrame, the header-to-column mapping is
+    the ColumnMap of GBA_WORKBOOK (compiled from the header row when not given,
+    SchemaError when a required column is missing), rows without a team are
+    dropped with one mask and the rest is grouped in a single pass.
+
+    Returns:
+        dict: team -> list of (Oracle Date, Index, Unique Code, Project Number,
+        Project Name, Resource Name) rows ready for one range write, or None
+        when no row has a team
+    """
+    project_sheet = sheet.book.sheets['Project Plan Analysis']
+    last_row_ = find_last_row(project_sheet)
+    last_col_ = find_last_col(project_sheet)
+    return group_team_rows(read_block(project_sheet, last_row_, last_col_), start_row, columns)
+
+
+def group_team_rows(block, start_row: int = DEFAULT_START_ROW, columns=None):
+    """get_team_project_details on an already read block (header row first), e.g. a headless read"""
+    headers = block[0]
+    columns = columns or GBA_WORKBOOK.compile(headers)
+
+    start = start_row if start_row > 1 else 2
+    rows = block[start - 1:]
+    if not rows:
+        return None
+    frame = pd.DataFrame(rows, columns=range(len(headers)), dtype=object)
+
+    def column(name, blank):
+        position = columns.position(name)
+        if position < 0:
+            return pd.Series(blank, index=frame.index, dtype=object)
+        values = frame[position]
+        return _or_blank(values) if blank == "" else values
+
+    team_frame = pd.DataFrame({
+        "Oracle Date": column("Oracle Date", None),
+        "Index": column("Index", None),
+        "Unique Code": column("Unique Code", None),
+        "Project Number": column("Project Number", ""),
+        "Project Name": column("Project Name", ""),
+        "Resource Name": column("Resource Name", ""),
+    })
+    team_names = column("Department Name", "")
+    has_team = team_names.astype(str).str.strip() != ""
+    if not has_team.any():
+        return None
+
+    team_dict = {}
+    for team_name, group in team_frame[has_team].groupby(team_names[has_team], sort=False):
+        # Plain lists for the range write, the COM layer does not take numpy arrays or scalars
+        team_dict[team_name] = group.to_numpy(dtype=object).tolist()
+    return team_dict
+
+
+def hide_and_protect(workbook):
+    today_week = week_label(date.today())
+
+    def hide_columns_for_table(ws, table_name):
+        try:
+            tbl = ws.api.ListObjects(table_name)
+        except Exception:
+            return
+        hide_flag = False
+        for col in tbl.ListColumns:
+            header = col.Name
+            if "Week" in str(header):
+                if today_week in str(header):
+                    hide_flag = False
+                if hide_flag:
+                    col.Range.EntireColumn.Hidden = True
+            if "Week 01" in str(header):
+                hide_flag = True
+                col.Range.EntireColumn.Hidden = True
+
+    try:
+        ws = workbook.sheets["Oracle"]
+        hide_columns_for_table(ws, "ProjectRaw6")
+        ws.api.Unprotect("1234")
+        ws.api.Cells.Locked = False
+        ws.api.Range("A:AA").Locked = True
+        ws.api.Protect("1234", True, True, True)
+        try:
+            tbl = ws.api.ListObjects("ProjectRaw6")
+            tbl.Range.Sort(Key1=tbl.ListColumns("Resource Name").Range, Order1=1)
+        except Exception:
+            pass
+    except Exception:
+        pass
+
+    try:
+        ws = workbook.sheets["Opportunity | Leaves | Others"]
+        hide_columns_for_table(ws, "ProjectRaw6312")
+        ws.api.Unprotect("1234")
+        ws.api.Protect("1234", True, True, True)
+    except Exception:
+        pass
+
+    try:
+        ws = workbook.sheets["Summary Table"]
+        hide_columns_for_table(ws, "Combined")
+        ws.api.Unprotect("1234")
+        ws.api.Protect("1234", True, True, True)
+    except Exception:
+        pass
+
+    try:
+        ws = workbook.sheets["Capacity Forecast %"]
+        hide_flag = False
+        for i in range(1, 101):
+            header = ws.range((1, i)).value
+            if header and "Week" in str(header):
+                if today_week in str(header):
+                    hide_flag = False
+                if hide_flag:
+                    ws.range((1, i)).entire_column.hidden = True
+            if header and "Week 01" in str(header):
+                hide_flag = True
+                ws.range((1, i)).entire_column.hidden = True
+        ws.api.Unprotect("1234")
+        ws.api.Protect("1234", True, True, True)
+    except Exception:
+        pass
+
+
+def create_team_workbook(target_file: str, template_path: str):
+    """Opens the Team template and saves it as target_file right away"""
+    target_wb = open_workbook(template_path)
+    os.makedirs(os.path.dirname(target_file), exist_ok=True)
+    save_workbook(target_wb, target_file)
+    return target_wb
+
+
+def oracle_sheet(workbook):
+    try:
+        ws_target = workbook.sheets["Oracle"]
+    except Exception:
+        ws_target = workbook.sheets.add()
+        ws_target.name = "Oracle"
+    if ws_target is None:
+        raise Exception("Failed to create or access 'Oracle' sheet")
+    return ws_target
+
+
+def next_team_row(ws_target) -> int:
+    """First empty cell of column E from row 5"""
+    return find_first_empty_row_in_col(ws_target, col=5, start=5)
+
+
+def write_team_rows(ws_target, next_row: int, projects):
+    """Writes projects to columns B:G from next_row, unprotecting the Oracle sheet for the write"""
+    ws_target.api.Unprotect("1234")
+    if len(projects):
+        ws_target.range((next_row, 2), (next_row + len(projects) - 1, 7)).value = projects
+    ws_target.api.Protect("1234", True, True, True)
+
+
+def finish_team_workbook(workbook, reporter: Reporter, clean_team_name: str):
+    """Capacity forecast values, hidden past weeks and sheet protection before the save"""
+    # CHANGE: Forecast sheets get static values computed in Python instead of recalculating formulas
+    try:
+        write_capacity_forecast(workbook)
+    except Exception as e:
+        reporter.warning(f"⚠️ Capacity forecast not updated for {clean_team_name}: {e}")
+
+    hide_and_protect(workbook)
+
+
+def export_team_data_to_files(sheet, team_file_path: str, start_row: int = DEFAULT_START_ROW,
+                              reporter: Reporter = None, journal: ExportJournal = None, columns=None,
+                              targets=None):
+    """
+    Appends the GBA workbook rows from start_row onwards to the department
+    workbooks under `<team_file_path> \\ 03 Department Workbooks`. Workbooks the
+    journal already records as saved with the same rows are skipped. targets
+    limits the export to those teams.
+
+    Returns:
+        dict: {"created": [...], "updated": [...], "skipped": [...]},
+        or None when there are no team rows
+    """
+    reporter = reporter or Reporter()
+    journal = journal or ExportJournal()
+    team_projects = get_team_project_details(sheet, start_row, columns)
+    if team_projects and targets is not None:
+        team_projects = {team: rows for team, rows in team_projects.items() if team in targets}
+    if not team_projects:
+        reporter.error("No data found!")
+        return None
+
+    created_team_files = []
+    updated_team_files = []
+    skipped_team_files = []
+
+    for idx, (team, projects) in enumerate(team_projects.items()):
+        reporter.progress(f"Processing Team: {team} ({idx + 1}/{len(team_projects)})...")
+
+        # Clean the team name for filename
+        clean_team_name = clean_file_name(team)
+        target_file = os.path.join(
+            team_file_path, "03 Department Workbooks", f"CPW Tool_{clean_team_name}_Team.xlsm"
+        )
+        file_exists = os.path.exists(target_file)
+
+        checksum = payload_checksum(projects)
+        if journal.is_saved(target_file, checksum):
+            skipped_team_files.append(f"CPW Tool_{clean_team_name}_Team.xlsm")
+            reporter.info(f"⏭️ Skipping CPW Tool_{clean_team_name}_Team.xlsm, already saved by a previous run")
+            continue
+        journal.mark(target_file, PENDING, checksum)
+
+        if file_exists:
+            target_wb = open_workbook(target_file)
+            updated_team_files.append(f"CPW Tool_{clean_team_name}_Team.xlsm")
+            reporter.success(f"✅ Updating existing team file: CPW Tool_{clean_team_name}_Team.xlsm")
+        else:
+            template_path = os.path.join(
+                team_file_path, "03 Department Workbooks", "CPW Team Specific Template.xlsm"
+            )
+            created_team_files.append(f"CPW Tool_{clean_team_name}_Team.xlsm")
+            reporter.success(f"🆕 Creating new team file: CPW Tool_{clean_team_name}_Team.xlsm")
+
+            try:
+                target_wb = create_team_workbook(target_file, template_path)
+            except Exception as e:
+                journal.mark(target_file, PENDING, checksum, error=str(e))
+                reporter.error(f"❌ Error saving new team workbook {clean_team_name}: {e}")
+                continue
+
+        ws_target = oracle_sheet(target_wb)
+
+        resumed_row = journal.start_row(target_file, checksum)
+        if resumed_row:
+            # A previous attempt wrote these rows but never saved them, write them at the same place
+            next_row = resumed_row
+        elif file_exists:
+            next_row = next_team_row(ws_target)
+        else:
+            next_row = 5
+
+        write_team_rows(ws_target, next_row, projects)
+        journal.mark(target_file, WRITTEN, checksum, start_row=next_row)
+
+        finish_team_workbook(target_wb, reporter, clean_team_name)
+
+        reporter.progress(f"Saving CPW Tool_{clean_team_name}_Team.xlsm ({idx + 1}/{len(team_projects)})...")
+        try:
+            save_workbook(target_wb)
+            journal.mark(target_file, SAVED, checksum)
+            reporter.info(f"💾 Saved: {len(projects)} entries to {clean_team_name}")
+        except Exception as e:
+            journal.mark(target_file, WRITTEN, checksum, error=str(e))
+            reporter.error(f"❌ Error saving team workbook {clean_team_name}: {e}")
+
+        try:
+            target_wb.close()
+        except Exception as e:
+            reporter.error(f"❌ Error closing team workbook {clean_team_name}: {e}")
+
+    reporter.progress_done()
+    reporter.success("🎉 Team-wise project data processing completed!")
+
+    if created_team_files:
+        reporter.info(f"📁 **New Team Files Created:** {', '.join(created_team_files)}")
+
+    if updated_team_files:
+        reporter.info(f"🔄 **Team Files Updated:** {', '.join(updated_team_files)}")
+
+    if skipped_team_files:
+        reporter.info(f"⏭️ **Team Files Already Done:** {', '.join(skipped_team_files)}")
+
+    failed = journal.failed_targets()
+    if failed:
+        reporter.warning(f"⚠️ {len(failed)} team file(s) were not saved. Run the export again to retry only those.")
+
+    return {"created": created_team_files, "updated": updated_team_files, "skipped": skipped_team_files}
+
+
+def run_team_export(gba_workbook: str, start_row: int = DEFAULT_START_ROW, reporter: Reporter = None,
+                    resume: bool = True, targets=None):
+    """
+    Opens the GBA workbook and runs export_team_data_to_files from start_row,
+    checkpointing into the run journal of that workbook and start row.
+
+    Args:
+        resume: False ignores team workbooks a previous run already saved
+        targets: Only export these teams (a work queue shard)
+    """
+    # Header-only check, a workbook without the GBA columns fails before Excel is started
+    columns = validate_file(gba_workbook, GBA_WORKBOOK)
+    team_file_path = derive_team_file_path(gba_workbook)
+    journal = ExportJournal.for_run(os.path.join(team_file_path, "03 Department Workbooks"), "team",
+                                    gba_workbook, start_row, resume=resume, part=",".join(sorted(targets or ())))
+    with excel_session():
+        book = open_workbook(gba_workbook)
+        try:
+            return export_team_data_to_files(book.sheets[0], team_file_path, start_row, reporter, journal,
+                                             columns, targets)
+        finally:
+            book.close()
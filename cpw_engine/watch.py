@@ -0,0 +1,272 @@
+"""
+Watch-folder service for the weekly maintenance run.
+
+Watches the "Raw Data" folder of every PFP folder. When a new RAW PFP
+extract has landed (its size and modification time stayed the same for a
+few seconds, so the copy is finished), it runs the maintenance PFP steps:
+unique codes, cleaning into OLD PFP, the diff against the newest previous
+OLD PFP file and New_PFP_YYYY-MM-DD.xlsx (see batch.process_ba_pfp).
+
+File system events come from watchdog when it is installed (inotify on
+Linux, ReadDirectoryChangesW on Windows); without it, or when events are
+not available on a network share, the folders are polled. Processed
+extracts are recorded per PFP folder in .cpw_watch.json, which the app reads
+to show that a file was already processed. An extract that failed is retried
+after RETRY_BACKOFF seconds, doubling after every failure, up to MAX_ATTEMPTS
+times; the app shows the failure with its error.
+"""
+import json
+import os
+import threading
+import time
+from datetime import datetime
+
+from .events import Reporter
+from .paths import file_fingerprint
+from .pfp import RAW_DATA_FOLDER
+
+WATCH_STATE_FILE = ".cpw_watch.json"
+DEFAULT_INTERVAL = 30.0
+DEFAULT_SETTLE_SECONDS = 5.0
+MAX_ATTEMPTS = 5
+RETRY_BACKOFF = 60.0
+
+PROCESSED = "processed"
+BASELINE = "baseline"
+FAILED = "failed"
+
+
+def _is_extract(name: str) -> bool:
+    return not name.startswith("~$") and name.lower().endswith((".xlsx", ".xls"))
+
+
+def _state_path(pfp_folder: str) -> str:
+    return os.path.join(pfp_folder, WATCH_STATE_FILE)
+
+
+def load_state(pfp_folder: str) -> dict:
+    """Raw file path -> record of what the watcher did with it"""
+    try:
+        with open(_state_path(pfp_folder), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_state(pfp_folder: str, state: dict):
+    tmp_path = f"{_state_path(pfp_folder)}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2, default=str)
+    os.replace(tmp_path, _state_path(pfp_folder))
+
+
+def watch_entry(raw_file: str) -> dict:
+    """What the watcher recorded for this exact version of raw_file, else None"""
+    pfp_folder = os.path.dirname(os.path.dirname(os.path.abspath(raw_file)))
+    entry = load_state(pfp_folder).get(os.path.abspath(raw_file))
+    if not entry or not os.path.exists(raw_file):
+        return None
+    if entry.get("fingerprint") != list(file_fingerprint(raw_file)):
+        return None
+    return entry
+
+
+def processed_entry(raw_file: str) -> dict:
+    """What the watcher recorded for raw_file if it processed this exact version of it, else None"""
+    entry = watch_entry(raw_file)
+    return entry if entry and entry.get("status") == PROCESSED else None
+
+
+def failed_entry(raw_file: str) -> dict:
+    """
+    What the watcher recorded for raw_file if processing this exact version of
+    it failed, else None. "retry_at" is empty once MAX_ATTEMPTS are used up.
+    """
+    entry = watch_entry(raw_file)
+    return entry if entry and entry.get("status") == FAILED else None
+
+
+def _event_observer(folders, wake: threading.Event):
+    """Started watchdog observer that sets wake on any change in folders, or None without watchdog"""
+    try:
+        from watchdog.events import FileSystemEventHandler
+        from watchdog.observers import Observer
+    except ImportError:
+        return None
+
+    class _Wake(FileSystemEventHandler):
+        def on_any_event(self, event):
+            wake.set()
+
+    observer = Observer()
+    for folder in folders:
+        try:
+            observer.schedule(_Wake(), folder, recursive=False)
+        except OSError:
+            # Folder does not support events (e.g. some network shares), polling still covers it
+            continue
+    observer.start()
+    return observer
+
+
+class RawDataWatcher:
+    """
+    Watches the Raw Data folders of several PFP folders and processes every
+    new extract once.
+
+    Args:
+        pfp_folders: BA -> PFP folder (the folder holding Raw Data and OLD PFP)
+        cache_dir: parsed-frame cache of batch.process_ba_pfp
+        interval: seconds between polls (events wake the watcher earlier)
+        settle_seconds: how long a file must stay unchanged before it is processed
+        process_existing: also process the newest unprocessed extract already
+            present at start-up; otherwise files present at start are left alone
+    """
+
+    def __init__(self, pfp_folders: dict, cache_dir: str = None, interval: float = DEFAULT_INTERVAL,
+                 settle_seconds: float = DEFAULT_SETTLE_SECONDS, process_existing: bool = False,
+                 reporter: Reporter = None):
+        from .batch import DEFAULT_CACHE_DIR
+
+        self.pfp_folders = pfp_folders
+        self.cache_dir = cache_dir or DEFAULT_CACHE_DIR
+        self.interval = interval
+        self.settle_seconds = settle_seconds
+        self.reporter = reporter or Reporter()
+        self.wake = threading.Event()
+        # path -> (fingerprint, time it was first seen with that fingerprint)
+        self._pending = {}
+        self._baseline(process_existing)
+
+    def _raw_folder(self, pfp_folder: str) -> str:
+        return os.path.join(pfp_folder, RAW_DATA_FOLDER)
+
+    def _extracts(self, pfp_folder: str) -> list:
+        folder = self._raw_folder(pfp_folder)
+        if not os.path.isdir(folder):
+            return []
+        paths = [os.path.abspath(os.path.join(folder, name)) for name in os.listdir(folder) if _is_extract(name)]
+        return sorted(paths, key=os.path.getmtime)
+
+    def _baseline(self, process_existing: bool):
+        """Records the extracts present at start-up, so only files that land later trigger a run"""
+        for pfp_folder in self.pfp_folders.values():
+            state = load_state(pfp_folder)
+            unseen = [p for p in self._extracts(pfp_folder) if p not in state]
+            if process_existing and unseen:
+                unseen = unseen[:-1]
+            for path in unseen:
+                state[path] = {"status": BASELINE, "fingerprint": list(file_fingerprint(path))}
+            if unseen and os.path.isdir(pfp_folder):
+                save_state(pfp_folder, state)
+
+    def _ready(self, path: str, state: dict, now: float) -> bool:
+        """
+        True once a new or changed extract has stayed unchanged for
+        settle_seconds, or when a failed extract is due for its next attempt
+        """
+        fingerprint = list(file_fingerprint(path))
+        known = state.get(path)
+        if known and known.get("fingerprint") == fingerprint:
+            self._pending.pop(path, None)
+            # Failures recorded before retries existed have no retry_at key and are due now
+            retry_at = known.get("retry_at", 0)
+            if known.get("status") in (PROCESSED, BASELINE) or retry_at is None:
+                return False
+            return now >= retry_at and self._unlocked(path)
+        seen = self._pending.get(path)
+        if not seen or seen[0] != fingerprint:
+            self._pending[path] = (fingerprint, now)
+            return False
+        if now - seen[1] < self.settle_seconds:
+            return False
+        return self._unlocked(path)
+
+    @staticmethod
+    def _unlocked(path: str) -> bool:
+        try:
+            # Still locked by the copy (Windows) or by Excel
+            with open(path, "rb"):
+                pass
+        except OSError:
+            return False
+        return True
+
+    def process(self, ba: str, pfp_folder: str, raw_file: str) -> dict:
+        from .batch import process_ba_pfp
+
+        self.reporter.progress(f"{ba}: new extract {os.path.basename(raw_file)}, processing...")
+        fingerprint = list(file_fingerprint(raw_file))
+        entry = process_ba_pfp(ba, pfp_folder, self.cache_dir, raw_file=raw_file)
+        state = load_state(pfp_folder)
+        previous = state.get(raw_file) or {}
+        # Attempts count failures of this version of the file, a changed file starts over
+        attempts = previous.get("attempts", 0) if previous.get("fingerprint") == fingerprint else 0
+        ok = entry["status"] == "ok"
+        attempts = 0 if ok else attempts + 1
+        retry_at = None if ok or attempts >= MAX_ATTEMPTS else time.time() + RETRY_BACKOFF * 2 ** (attempts - 1)
+        state[raw_file] = {
+            "status": PROCESSED if ok else FAILED,
+            "fingerprint": fingerprint,
+            "processed_at": datetime.now().isoformat(timespec="seconds"),
+            "cleaned_file": entry.get("cleaned_file", ""),
+            "new_pfp": entry.get("gba_source", "") if entry.get("prev_file") else "",
+            "new_rows": entry.get("new_rows", 0),
+            "error": entry["error"],
+            "attempts": attempts,
+            "retry_at": retry_at,
+        }
+        save_state(pfp_folder, state)
+        self._pending.pop(raw_file, None)
+
+        if ok:
+            target = os.path.basename(state[raw_file]["new_pfp"] or entry.get("cleaned_file", ""))
+            self.reporter.success(f"✅ {ba}: {entry.get('new_rows', 0):,} new rows, saved {target} "
+                                  f"in {entry['pfp_seconds']}s")
+        elif retry_at:
+            self.reporter.error(f"❌ {ba}: {entry['error']} (attempt {attempts}/{MAX_ATTEMPTS}, "
+                                f"retrying at {datetime.fromtimestamp(retry_at).strftime('%H:%M:%S')})")
+        else:
+            self.reporter.error(f"❌ {ba}: {entry['error']} (gave up after {attempts} attempts, "
+                                f"replace the file to try again)")
+        return entry
+
+    def scan(self) -> list:
+        """One pass over every Raw Data folder, processing the extracts that are ready"""
+        now = time.time()
+        results = []
+        for ba, pfp_folder in self.pfp_folders.items():
+            state = load_state(pfp_folder)
+            for raw_file in self._extracts(pfp_folder):
+                if self._ready(raw_file, state, now):
+                    results.append(self.process(ba, pfp_folder, raw_file))
+        return results
+
+    def run(self, stop: threading.Event = None, once: bool = False) -> list:
+        """
+        Scans until stop is set. Waits up to interval between scans, or until
+        a file system event, or settle_seconds while a new file is settling.
+
+        Args:
+            once: scan until nothing is settling any more and return
+        """
+        stop = stop or threading.Event()
+        observer = None if once else _event_observer(
+            [self._raw_folder(f) for f in self.pfp_folders.values() if os.path.isdir(self._raw_folder(f))], self.wake
+        )
+        mode = "file system events" if observer else "polling"
+        self.reporter.info(f"👀 Watching {len(self.pfp_folders)} Raw Data folder(s) ({mode})")
+        results = []
+        try:
+            while not stop.is_set():
+                self.wake.clear()
+                results += self.scan()
+                if once and not self._pending:
+                    break
+                timeout = min(self.interval, self.settle_seconds) if self._pending else self.interval
+                self.wake.wait(timeout)
+        finally:
+            if observer:
+                observer.stop()
+                observer.join()
+        return results
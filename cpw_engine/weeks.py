@@ -0,0 +1,357 @@
+"""
+Delta-encoded history of the cleaned PFP weeks in OLD PFP.
+
+Instead of a full Excel copy per week, the store keeps a base snapshot and,
+for every later week, only the rows that were added, changed or removed,
+keyed by Unique Code. Every few weeks a new base is written, so rebuilding a
+week never replays a long chain of deltas.
+
+    OLD PFP \\ .cpw_history \\ history.json             weeks, oldest first
+                             base-YYYY-MM-DD.parquet
+                             delta-YYYY-MM-DD.parquet    added and changed rows
+                             deleted-YYYY-MM-DD.parquet  Unique Codes removed that week
+
+Columns keep the types read_excel gave them (a column mixing types, e.g.
+numbers and text, is stored as text). Every row carries a _row_hash of its
+values, so diffing two weeks only reads the Unique Code and hash columns.
+Stores written before the types were kept (no "typed" flag on a week) held
+strings only; their weeks are typed again from the values when compared.
+
+history.json is read and written under a lock file, since the app, the
+watcher and batch runs can record weeks of the same folder at once.
+
+Step 2 of the Maintenance tab diffs stored weeks, so the weekly Excel copies
+are only needed by the next run's diff. Deleting the older copies is up to
+the user (`weeks <folder> prune`, see prune_snapshots).
+"""
+import glob
+import json
+import os
+import re
+from contextlib import contextmanager
+
+import pandas as pd
+
+from .paths import file_lock
+from .pfp import CLEANED_PREFIX
+
+HISTORY_FOLDER = ".cpw_history"
+HISTORY_FILE = "history.json"
+KEY = "Unique Code"
+HASH = "_row_hash"
+OP = "_op"
+UPSERT = "upsert"
+DELETE = "delete"
+
+# A new base every this many weeks (a base and then DEFAULT_REBASE_EVERY - 1 deltas),
+# or earlier when a delta would hold this share of the rows
+DEFAULT_REBASE_EVERY = 8
+REBASE_RATIO = 0.5
+# Weekly Excel copies prune_snapshots keeps in OLD PFP: this week's and the previous one for the next diff
+KEEP_FULL_COPIES = 2
+
+WEEK_PATTERN = re.compile(r"(\d{4}-\d{2}-\d{2})")
+
+
+def week_of_file(path: str):
+    """YYYY-MM-DD date of a cleaned PFP file name, None when the name has none"""
+    match = WEEK_PATTERN.search(os.path.basename(path))
+    return match.group(1) if match else None
+
+
+def _weekly_files(old_pfp_folder: str) -> dict:
+    """week -> cleaned PFP file of old_pfp_folder (files without a date in the name are left out)"""
+    files = {}
+    for path in sorted(glob.glob(os.path.join(old_pfp_folder, f"{CLEANED_PREFIX}*.xlsx"))):
+        week = week_of_file(path)
+        if week:
+            files[week] = path
+    return files
+
+
+# infer_dtype results Parquet stores as they are
+_STORABLE = {"string", "empty", "integer", "floating", "mixed-integer-float", "decimal", "boolean",
+             "datetime", "datetime64", "date", "timedelta", "timedelta64"}
+
+
+def _normalise(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    One row per Unique Code (as text), columns in their own types except
+    mixed-type ones (as text), plus the row hash over the values as text
+    """
+    frame = df.drop_duplicates(subset=[KEY], keep="first").reset_index(drop=True)
+    frame[KEY] = frame[KEY].astype("string")
+    for column in frame.columns:
+        if frame[column].dtype == object and pd.api.types.infer_dtype(frame[column], skipna=True) not in _STORABLE:
+            frame[column] = frame[column].astype("string")
+    frame[HASH] = pd.util.hash_pandas_object(frame.astype("string"), index=False).astype("int64")
+    return frame
+
+
+def _restore_types(frame: pd.DataFrame) -> pd.DataFrame:
+    """
+    Weeks of stores written before the types were kept (all strings): columns
+    whose values all read as numbers (or all as ISO dates) back as numbers (dates)
+    """
+    typed = {}
+    for column in frame.columns:
+        values = frame[column]
+        present = values.notna()
+        if not present.any() or column == KEY:
+            typed[column] = values.astype(object)
+            continue
+        numbers = pd.to_numeric(values, errors="coerce")
+        if numbers[present].notna().all():
+            typed[column] = numbers
+            continue
+        dates = pd.to_datetime(values, errors="coerce", format="ISO8601")
+        typed[column] = dates if dates[present].notna().all() else values.astype(object)
+    return pd.DataFrame(typed, index=frame.index)
+
+
+class HistoryStore:
+    """Base + delta history of one OLD PFP folder"""
+
+    def __init__(self, folder: str, rebase_every: int = DEFAULT_REBASE_EVERY):
+        self.folder = folder
+        self.rebase_every = rebase_every
+        self.index_path = os.path.join(folder, HISTORY_FILE)
+        self.weeks = self._load()
+
+    def _load(self) -> list:
+        if not os.path.exists(self.index_path):
+            return []
+        with open(self.index_path, encoding="utf-8") as f:
+            return json.load(f)["weeks"]
+
+    @contextmanager
+    def _locked(self):
+        """Holds the index lock and works on the index as it is on disk"""
+        os.makedirs(self.folder, exist_ok=True)
+        with file_lock(self.index_path):
+            self.weeks = self._load()
+            yield
+
+    @classmethod
+    def for_folder(cls, old_pfp_folder: str, **kwargs):
+        return cls(os.path.join(old_pfp_folder, HISTORY_FOLDER), **kwargs)
+
+    def week_dates(self) -> list:
+        return [w["week"] for w in self.weeks]
+
+    def _save_index(self):
+        os.makedirs(self.folder, exist_ok=True)
+        tmp_path = f"{self.index_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"weeks": self.weeks}, f, indent=2)
+        os.replace(tmp_path, self.index_path)
+
+    def _write(self, frame: pd.DataFrame, name: str) -> str:
+        os.makedirs(self.folder, exist_ok=True)
+        path = os.path.join(self.folder, name)
+        frame.to_parquet(f"{path}.tmp", index=False, compression="zstd")
+        os.replace(f"{path}.tmp", path)
+        return name
+
+    def _read(self, name: str, columns=None) -> pd.DataFrame:
+        return pd.read_parquet(os.path.join(self.folder, name), columns=columns)
+
+    # === Writing ===
+    def add_week(self, df: pd.DataFrame, week: str) -> dict:
+        """
+        Stores the cleaned PFP of week (YYYY-MM-DD) as a delta against the
+        previous week, or as a new base when it is the first week or a rebase
+        is due. Storing the latest week again replaces it.
+
+        Returns:
+            dict: the week's entry {"week", "kind", "file", "rows", "changes", "typed"}
+            (delta weeks with removed codes also have "deleted", their file)
+        """
+        with self._locked():
+            return self._add_week(df, week)
+
+    def _add_week(self, df: pd.DataFrame, week: str) -> dict:
+        if self.weeks and self.weeks[-1]["week"] == week:
+            self._drop_last()
+        if self.weeks and week < self.weeks[-1]["week"]:
+            raise ValueError(f"Week {week} is older than the latest stored week {self.weeks[-1]['week']}")
+
+        current = _normalise(df)
+        entry = {"week": week, "rows": len(current), "typed": True}
+        if not self.weeks:
+            entry.update(kind="base", file=self._write(current, f"base-{week}.parquet"), changes=len(current))
+        else:
+            previous = self.state_as_of(self.weeks[-1]["week"], columns=[KEY, HASH])
+            upserts, removed = self._delta(previous, current)
+            changes = len(upserts) + len(removed)
+            base_index = max(i for i, w in enumerate(self.weeks) if w["kind"] == "base")
+            # Position of the new week in the current base's run (the base itself is 0)
+            weeks_after_base = len(self.weeks) - base_index
+            if weeks_after_base >= self.rebase_every or changes > REBASE_RATIO * max(len(current), 1):
+                entry.update(kind="base", file=self._write(current, f"base-{week}.parquet"), changes=changes)
+            else:
+                entry.update(kind="delta", file=self._write(upserts, f"delta-{week}.parquet"), changes=changes)
+                if len(removed):
+                    entry["deleted"] = self._write(removed, f"deleted-{week}.parquet")
+        self.weeks.append(entry)
+        self._save_index()
+        return entry
+
+    @staticmethod
+    def _delta(previous: pd.DataFrame, current: pd.DataFrame) -> tuple:
+        """(rows of current that are new or changed, Unique Codes of previous that are gone)"""
+        known = previous.set_index(KEY)[HASH]
+        previous_hash = current[KEY].map(known)
+        upserts = current[previous_hash.isna() | (previous_hash != current[HASH])].reset_index(drop=True)
+        removed = previous.loc[~previous[KEY].isin(current[KEY]), [KEY]].reset_index(drop=True)
+        return upserts, removed
+
+    def _drop_last(self):
+        entry = self.weeks.pop()
+        for name in (entry["file"], entry.get("deleted")):
+            if not name:
+                continue
+            try:
+                os.remove(os.path.join(self.folder, name))
+            except OSError:
+                pass
+
+    def import_folder(self, old_pfp_folder: str) -> list:
+        """
+        Adds every cleaned PFP file of old_pfp_folder that is not stored yet
+        (to migrate an existing OLD PFP folder). Stored weeks after the oldest
+        missing one are rebuilt and encoded again after it.
+        """
+        with self._locked():
+            files = _weekly_files(old_pfp_folder)
+            missing = sorted(set(files) - set(self.week_dates()))
+            if not missing:
+                return []
+            later = {w: self.state_as_of(w).drop(columns=[HASH]) for w in self.week_dates() if w > missing[0]}
+            while self.weeks and self.weeks[-1]["week"] > missing[0]:
+                self._drop_last()
+            added = []
+            for week in sorted(set(missing) | set(later)):
+                frame = later[week] if week in later else pd.read_excel(files[week])
+                entry = self._add_week(frame, week)
+                if week in missing:
+                    added.append(entry)
+            return added
+
+    # === Reading ===
+    def _chain(self, week: str) -> list:
+        """Entries needed to rebuild week: its latest base and the deltas after it"""
+        stored = [w for w in self.weeks if w["week"] <= week]
+        if not stored:
+            raise KeyError(f"No week stored on or before {week}")
+        base_index = max(i for i, w in enumerate(stored) if w["kind"] == "base")
+        return stored[base_index:]
+
+    def state_as_of(self, week: str, columns=None) -> pd.DataFrame:
+        """
+        The cleaned PFP as it was in the newest stored week on or before week.
+
+        All deltas after the base are read at once and reduced to the last
+        operation per Unique Code, so the rebuild is one anti-join and one concat.
+
+        Args:
+            columns: columns to read (Unique Code and _row_hash are always kept)
+        """
+        wanted = None if columns is None else list(dict.fromkeys([KEY] + list(columns) + [HASH]))
+        chain = self._chain(week)
+        state = self._read(chain[0]["file"], wanted)
+        if len(chain) == 1:
+            return state
+
+        # Every operation of the deltas in week order, the last one per Unique Code wins
+        upserts, operations = [], []
+        for entry in chain[1:]:
+            if entry.get("typed"):
+                rows = self._read(entry["file"], wanted)
+                removed = self._read(entry["deleted"], [KEY])[KEY] if entry.get("deleted") else pd.Series(dtype=str)
+            else:
+                # Delta of a store written before the types were kept: one file with an _op column
+                rows = self._read(entry["file"], None if wanted is None else wanted + [OP])
+                removed = rows.loc[rows[OP] == DELETE, KEY]
+                rows = rows[rows[OP] == UPSERT].drop(columns=[OP])
+            upserts.append(rows)
+            operations += [pd.DataFrame({KEY: rows[KEY], OP: UPSERT}), pd.DataFrame({KEY: removed, OP: DELETE})]
+        last = pd.concat(operations, ignore_index=True).drop_duplicates(subset=[KEY], keep="last")
+        upserts = pd.concat(upserts, ignore_index=True).drop_duplicates(subset=[KEY], keep="last")
+        state = state[~state[KEY].isin(last[KEY])]
+        upserts = upserts[upserts[KEY].isin(last.loc[last[OP] == UPSERT, KEY])]
+        return pd.concat([state, upserts], ignore_index=True)
+
+    def is_typed(self, week: str) -> bool:
+        """Whether every file week is rebuilt from keeps the column types (see the module docstring)"""
+        return all(entry.get("typed") for entry in self._chain(week))
+
+    def unique_codes_as_of(self, week: str) -> pd.Series:
+        return self.state_as_of(week, columns=[KEY])[KEY]
+
+    def diff_weeks(self, week_a: str, week_b: str) -> pd.DataFrame:
+        """
+        Changes from week_a to week_b, from the key and hash columns only.
+
+        Returns:
+            DataFrame: Unique Code and "change" ("added", "changed" or "removed")
+        """
+        a = self.state_as_of(week_a, columns=[KEY]).set_index(KEY)[HASH]
+        b = self.state_as_of(week_b, columns=[KEY]).set_index(KEY)[HASH]
+        hash_in_a = b.index.to_series().map(a)
+        added = b.index[hash_in_a.isna().to_numpy()]
+        changed = b.index[(hash_in_a.notna() & (hash_in_a != b.to_numpy())).to_numpy()]
+        removed = a.index[~a.index.isin(b.index)]
+        return pd.concat([
+            pd.DataFrame({KEY: added, "change": "added"}),
+            pd.DataFrame({KEY: changed, "change": "changed"}),
+            pd.DataFrame({KEY: removed, "change": "removed"}),
+        ], ignore_index=True)
+
+    def new_rows(self, week_a: str, week_b: str) -> pd.DataFrame:
+        """Rows of week_b whose Unique Code is not in week_a (what the New PFP holds for those weeks)"""
+        b = self.state_as_of(week_b)
+        return b[~b[KEY].isin(self.unique_codes_as_of(week_a))].drop(columns=[HASH])
+
+    def compare_weeks(self, week_a: str, week_b: str) -> tuple:
+        """
+        diff_pfp_weeks of two stored weeks: the rows of week_b whose Unique Code
+        is not in week_a, in their stored types.
+
+        Returns:
+            tuple: (new rows DataFrame, comparison statistics dict)
+        """
+        codes_a = self.unique_codes_as_of(week_a)
+        b = self.state_as_of(week_b).drop(columns=[HASH])
+        new = b[~b[KEY].isin(codes_a)].reset_index(drop=True)
+        if not self.is_typed(week_b):
+            new = _restore_types(new)
+        stats = {
+            "prev_unique_codes": codes_a.nunique(),
+            "current_unique_codes": b[KEY].nunique(),
+            "new_entries": len(new),
+            "existing_entries": len(b) - len(new),
+        }
+        return new, stats
+
+    def disk_usage(self) -> int:
+        return sum(os.path.getsize(os.path.join(self.folder, name))
+                   for w in self.weeks for name in (w["file"], w.get("deleted")) if name)
+
+
+def prune_snapshots(old_pfp_folder: str, keep: int = KEEP_FULL_COPIES) -> list:
+    """
+    Deletes the full cleaned PFP copies that the history store holds, except
+    the newest `keep` (the next run diffs against the newest one).
+
+    Returns:
+        list: deleted file paths
+    """
+    stored = set(HistoryStore.for_folder(old_pfp_folder).week_dates())
+    files = _weekly_files(old_pfp_folder)
+    deleted = []
+    for week in sorted(files)[:-max(1, keep)]:
+        if week in stored:
+            os.remove(files[week])
+            deleted.append(files[week])
+    return deleted
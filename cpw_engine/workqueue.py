@@ -0,0 +1,515 @@
+"""
+Distributed GBA/Team export over a SQLite work queue.
+
+The coordinator (submit) runs the PFP stage of every BA and splits the GBA
+targets of each source file into shards of a few workbooks. Workers, as
+processes on one machine or on several hosts sharing the queue file, claim
+shards with a lease, lock the workbooks the shard writes and run the export
+for just those targets in their own Excel instance. A finished GBA shard
+queues the Team shards of the GBA workbooks it wrote.
+
+    python -m cpw_engine queue submit "<share>\\cpw_queue.db" manifest.json
+    python -m cpw_engine queue work "<share>\\cpw_queue.db" --processes 2     (on every node)
+    python -m cpw_engine queue status "<share>\\cpw_queue.db"
+
+A worker renews its lease only while its shard reports progress, and for at
+most max_shard_seconds. A worker that dies, hangs (e.g. on a stuck Excel) or
+overruns stops renewing; once the lease runs out the shard and its locks go
+to the next worker. The late worker checks its lease on every event the
+export reports, i.e. before each workbook it opens or saves, and stops with
+LeaseLost (its unsaved workbooks are closed) as soon as the lease is no
+longer its own. The export journals (one per shard) make a retried shard skip
+the workbooks it already saved.
+
+The queue file must live on a share with working file locking (SQLite).
+"""
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager, nullcontext
+from multiprocessing import Process
+
+from .events import Reporter, silent_reporter
+from .paths import clean_file_name, derive_gba_file_path, derive_team_file_path
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+DEFAULT_SHARD_SIZE = 4
+DEFAULT_LEASE_SECONDS = 600
+DEFAULT_MAX_SHARD_SECONDS = 3600
+MAX_ATTEMPTS = 3
+
+
+class LeaseLost(RuntimeError):
+    """The worker's lease on its shard ran out or another worker took the shard over"""
+
+GBA_TEMPLATE = "CPW GBA Specific Template.xlsm"
+TEAM_TEMPLATE = "CPW Team Specific Template.xlsm"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS shards (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    source TEXT NOT NULL,
+    start_row INTEGER NOT NULL DEFAULT 0,
+    targets TEXT NOT NULL,
+    ba TEXT NOT NULL DEFAULT '',
+    status TEXT NOT NULL DEFAULT 'queued',
+    owner TEXT,
+    lease_until REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT NOT NULL DEFAULT '',
+    result TEXT,
+    UNIQUE (kind, source, start_row, targets)
+);
+CREATE TABLE IF NOT EXISTS locks (
+    path TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    lease_until REAL NOT NULL
+);
+"""
+
+
+def chunk(items: list, size: int) -> list:
+    size = max(1, size)
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+class WorkQueue:
+    """
+    Shards and workbook locks in one SQLite file. Every state change runs in
+    an IMMEDIATE transaction, so two workers can never claim the same shard
+    or lock the same workbook.
+    """
+
+    def __init__(self, path: str, lease_seconds: float = DEFAULT_LEASE_SECONDS):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        conn = sqlite3.connect(self.path, timeout=60)
+        try:
+            conn.executescript(SCHEMA)
+        finally:
+            conn.close()
+
+    @contextmanager
+    def _transaction(self):
+        conn = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _shard(row) -> dict:
+        shard = dict(row)
+        shard["targets"] = json.loads(shard["targets"])
+        shard["result"] = json.loads(shard["result"]) if shard["result"] else None
+        return shard
+
+    @staticmethod
+    def _enqueue(conn, kind: str, source: str, groups, start_row: int, ba: str, shard_size: int) -> int:
+        added = 0
+        for targets in chunk(sorted(groups), shard_size):
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO shards (kind, source, start_row, targets, ba) VALUES (?, ?, ?, ?, ?)",
+                (kind, source, start_row, json.dumps(targets), ba),
+            )
+            added += cursor.rowcount
+        return added
+
+    def enqueue(self, kind: str, source: str, groups, start_row: int = 0, ba: str = "",
+                shard_size: int = DEFAULT_SHARD_SIZE) -> int:
+        """Queues the groups (GBA values or teams) of one source as shards, returns the shards added"""
+        with self._transaction() as conn:
+            return self._enqueue(conn, kind, source, groups, start_row, ba, shard_size)
+
+    def claim(self, owner: str, skip=()) -> dict:
+        """
+        Leases the next queued shard (or one whose lease ran out) to owner.
+        Shards that ran out of attempts are marked failed on the way.
+
+        Returns:
+            dict: the shard, or None when there is nothing to claim
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            rows = conn.execute(
+                "SELECT * FROM shards WHERE status = ? OR (status = ? AND lease_until < ?) ORDER BY id",
+                (QUEUED, RUNNING, now),
+            ).fetchall()
+            for row in rows:
+                if row["id"] in skip:
+                    continue
+                if row["attempts"] >= MAX_ATTEMPTS:
+                    conn.execute("UPDATE shards SET status = ?, owner = NULL, error = ? WHERE id = ?",
+                                 (FAILED, row["error"] or "Lease expired too often", row["id"]))
+                    continue
+                conn.execute(
+                    "UPDATE shards SET status = ?, owner = ?, lease_until = ?, attempts = attempts + 1 WHERE id = ?",
+                    (RUNNING, owner, now + self.lease_seconds, row["id"]),
+                )
+                return self._shard(conn.execute("SELECT * FROM shards WHERE id = ?", (row["id"],)).fetchone())
+        return None
+
+    def renew(self, shard_id: int, owner: str) -> bool:
+        """
+        Extends the lease of a running shard and of the owner's locks.
+
+        Returns:
+            bool: False when owner no longer holds the shard (its lease ran out
+            or another worker claimed it), nothing is extended then
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE shards SET lease_until = ? WHERE id = ? AND owner = ? AND status = ? AND lease_until >= ?",
+                (now + self.lease_seconds, shard_id, owner, RUNNING, now),
+            )
+            if cursor.rowcount == 0:
+                return False
+            conn.execute("UPDATE locks SET lease_until = ? WHERE owner = ?", (now + self.lease_seconds, owner))
+        return True
+
+    def owns(self, shard_id: int, owner: str) -> bool:
+        """Whether owner still holds a live lease on the shard"""
+        with self._transaction() as conn:
+            row = conn.execute("SELECT 1 FROM shards WHERE id = ? AND owner = ? AND status = ? AND lease_until >= ?",
+                               (shard_id, owner, RUNNING, time.time())).fetchone()
+        return row is not None
+
+    def acquire_locks(self, paths, owner: str) -> bool:
+        """Locks all paths for owner, or none of them when another owner holds a live lock on one"""
+        now = time.time()
+        keys = sorted({os.path.normcase(os.path.abspath(p)) for p in paths})
+        with self._transaction() as conn:
+            for key in keys:
+                row = conn.execute("SELECT owner, lease_until FROM locks WHERE path = ?", (key,)).fetchone()
+                if row and row["owner"] != owner and row["lease_until"] >= now:
+                    return False
+            conn.executemany("INSERT OR REPLACE INTO locks (path, owner, lease_until) VALUES (?, ?, ?)",
+                             [(key, owner, now + self.lease_seconds) for key in keys])
+        return True
+
+    def release_locks(self, owner: str):
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM locks WHERE owner = ?", (owner,))
+
+    def release(self, shard_id: int, owner: str):
+        """Hands a claimed shard back untouched (its workbooks were locked), without using up an attempt"""
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE shards SET status = ?, owner = NULL, lease_until = NULL, attempts = attempts - 1 "
+                "WHERE id = ? AND owner = ?",
+                (QUEUED, shard_id, owner),
+            )
+
+    def complete(self, shard_id: int, owner: str, result: dict, follow_up=(),
+                 shard_size: int = DEFAULT_SHARD_SIZE) -> bool:
+        """
+        Marks the shard done and queues its follow-up shards (dicts of enqueue
+        arguments) in the same transaction. False, and nothing changes, when
+        owner lost the shard to another worker in the meantime.
+        """
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE shards SET status = ?, error = '', result = ? WHERE id = ? AND owner = ? AND status = ?",
+                (DONE, json.dumps(result, default=str), shard_id, owner, RUNNING),
+            )
+            if cursor.rowcount == 0:
+                return False
+            for shard in follow_up:
+                self._enqueue(conn, shard["kind"], shard["source"], shard["groups"], shard.get("start_row", 0),
+                              shard.get("ba", ""), shard_size)
+        return True
+
+    def fail(self, shard_id: int, owner: str, error: str):
+        """Records the error; the shard is queued again until it ran out of attempts"""
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE shards SET status = CASE WHEN attempts < ? THEN ? ELSE ? END, owner = NULL, "
+                "lease_until = NULL, error = ? WHERE id = ? AND owner = ?",
+                (MAX_ATTEMPTS, QUEUED, FAILED, error, shard_id, owner),
+            )
+
+    def pending(self) -> int:
+        """Shards still queued or running"""
+        with self._transaction() as conn:
+            return conn.execute("SELECT COUNT(*) FROM shards WHERE status IN (?, ?)", (QUEUED, RUNNING)).fetchone()[0]
+
+    def shards(self) -> list:
+        with self._transaction() as conn:
+            return [self._shard(row) for row in conn.execute("SELECT * FROM shards ORDER BY id")]
+
+    def status(self) -> dict:
+        """Shard count per status"""
+        counts = {QUEUED: 0, RUNNING: 0, DONE: 0, FAILED: 0}
+        with self._transaction() as conn:
+            for row in conn.execute("SELECT status, COUNT(*) AS n FROM shards GROUP BY status"):
+                counts[row["status"]] = row["n"]
+        return counts
+
+
+# === Shards ===
+def shard_lock_paths(shard: dict) -> list:
+    """
+    Workbooks a shard writes: its targets, plus the template when one of them
+    does not exist yet (new workbooks are saved from it).
+    """
+    if shard["kind"] == "gba":
+        folder = os.path.join(derive_gba_file_path(shard["source"]), "02 GBA Workbooks")
+        pattern, template = "CPW Tool_{}_Main.xlsm", GBA_TEMPLATE
+    else:
+        folder = os.path.join(derive_team_file_path(shard["source"]), "03 Department Workbooks")
+        pattern, template = "CPW Tool_{}_Team.xlsm", TEAM_TEMPLATE
+    paths = [os.path.join(folder, pattern.format(clean_file_name(name))) for name in shard["targets"]]
+    if not all(os.path.exists(p) for p in paths):
+        paths.append(os.path.join(folder, template))
+    return paths
+
+
+def gba_groups(source_file: str) -> list:
+    """GBA values of a PFP extract, read headlessly"""
+    from .gba import group_gba_rows
+    from .plan import read_sheet_values
+    from .schema import GBA_SOURCE, validate_file
+
+    columns = validate_file(source_file, GBA_SOURCE)
+    return list(group_gba_rows(read_sheet_values(source_file), columns) or {})
+
+
+def team_groups(gba_workbook: str, start_row: int) -> list:
+    """Teams of a GBA workbook from start_row onwards, read headlessly"""
+    from .plan import read_sheet_values
+    from .schema import GBA_WORKBOOK, validate_file
+    from .team import group_team_rows
+
+    columns = validate_file(gba_workbook, GBA_WORKBOOK)
+    return list(group_team_rows(read_sheet_values(gba_workbook, GBA_WORKBOOK.sheet), start_row, columns) or {})
+
+
+def execute_shard(shard: dict, reporter: Reporter = None) -> dict:
+    """
+    Runs the export of one shard. A GBA shard returns the Team shards of the
+    GBA workbooks it wrote under "follow_up".
+    """
+    reporter = reporter or silent_reporter()
+    if shard["kind"] == "gba":
+        from .gba import run_gba_export
+
+        summary = run_gba_export(shard["source"], reporter, targets=shard["targets"]) or {}
+        follow_up = [
+            {"kind": "team", "source": gba_workbook, "start_row": start_row, "ba": shard["ba"],
+             "groups": team_groups(gba_workbook, start_row)}
+            for gba_workbook, start_row in summary.get("start_rows", {}).items()
+        ]
+    else:
+        from .team import run_team_export
+
+        summary = run_team_export(shard["source"], shard["start_row"], reporter, targets=shard["targets"]) or {}
+        follow_up = []
+    return {
+        "created": summary.get("created", []),
+        "updated": summary.get("updated", []),
+        "skipped": summary.get("skipped", []),
+        "follow_up": follow_up,
+    }
+
+
+class _Heartbeat(threading.Thread):
+    """
+    Renews a shard's lease (and its locks) while the shard makes progress:
+    only when the shard reported an event (see touch) since the last renewal
+    and it has run for less than max_seconds. Once a renewal finds the shard
+    gone, or an event finds the lease no longer live, the reporter raises
+    LeaseLost.
+    """
+
+    def __init__(self, queue: WorkQueue, shard_id: int, owner: str,
+                 max_seconds: float = DEFAULT_MAX_SHARD_SECONDS):
+        super().__init__(daemon=True)
+        self.queue, self.shard_id, self.owner = queue, shard_id, owner
+        self.max_seconds = max_seconds
+        self.started = time.monotonic()
+        self.progressed = threading.Event()
+        self.stopped = threading.Event()
+        self.lost = threading.Event()
+
+    def touch(self):
+        """Called for every event the shard reports"""
+        self.progressed.set()
+
+    def check(self):
+        """Raises LeaseLost unless the worker still holds a live lease on the shard"""
+        if self.lost.is_set() or not self.queue.owns(self.shard_id, self.owner):
+            self.lost.set()
+            raise LeaseLost(f"Shard {self.shard_id}: the lease ran out or another worker took the shard over")
+
+    def reporter(self, reporter: Reporter) -> Reporter:
+        """
+        reporter, touching the heartbeat on every event. The exports report an
+        event before each workbook they open and save, so the lease is checked
+        (see check) before the event goes through.
+        """
+        def on_event(event):
+            self.check()
+            self.touch()
+            reporter.callback(event)
+
+        return Reporter(on_event)
+
+    def run(self):
+        while not self.stopped.wait(max(1.0, self.queue.lease_seconds / 3)):
+            if time.monotonic() - self.started >= self.max_seconds or not self.progressed.is_set():
+                continue
+            self.progressed.clear()
+            try:
+                if not self.queue.renew(self.shard_id, self.owner):
+                    self.lost.set()
+            except sqlite3.Error:
+                pass
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+
+# === Coordinator and workers ===
+def submit(queue_path: str, manifest: dict, workers: int = 4, cache_dir: str = None,
+           shard_size: int = DEFAULT_SHARD_SIZE, reporter: Reporter = None) -> list:
+    """
+    Runs the PFP stage for every BA (see batch.run_pfp_stage) and queues the
+    GBA shards of each BA's source file.
+
+    Returns:
+        list: the PFP report entries, with "shards" queued per BA
+    """
+    from .batch import DEFAULT_CACHE_DIR, run_pfp_stage
+
+    reporter = reporter or Reporter()
+    queue = WorkQueue(queue_path)
+    report = run_pfp_stage(manifest, workers, cache_dir or DEFAULT_CACHE_DIR, reporter)
+    for entry in report:
+        entry["shards"] = 0
+        if entry["status"] != "ok" or not entry.get("gba_source"):
+            continue
+        try:
+            entry["shards"] = queue.enqueue("gba", entry["gba_source"], gba_groups(entry["gba_source"]),
+                                            ba=entry["ba"], shard_size=shard_size)
+        except Exception as e:
+            entry["status"] = "failed"
+            entry["error"] = f"Queue: {e}"
+    reporter.progress_done()
+    return report
+
+
+def run_worker(queue_path: str, worker_id: str = None, lease_seconds: float = DEFAULT_LEASE_SECONDS,
+               poll_seconds: float = 2.0, shard_size: int = DEFAULT_SHARD_SIZE, execute=None,
+               app_factory=None, reporter: Reporter = None,
+               max_shard_seconds: float = DEFAULT_MAX_SHARD_SECONDS) -> dict:
+    """
+    Claims and runs shards until the queue has nothing queued or running.
+
+    Args:
+        worker_id: Lease owner name (default: host:pid:random)
+        execute: callable(shard, reporter) -> result dict, default execute_shard.
+            Anything else runs without an Excel session, e.g. to test the queue.
+        app_factory: Excel app of the worker's session (default: a new hidden instance)
+        max_shard_seconds: the lease of a shard is not renewed after this long,
+            so a hung shard goes to another worker
+
+    Returns:
+        dict: {"done": n, "failed": n, "lost": n} shards handled by this worker
+        ("lost": stopped because the lease ran out or another worker took the
+        shard over; the shard is failed, its unsaved workbooks closed)
+    """
+    from .excel import excel_session, new_excel_app
+
+    reporter = reporter or silent_reporter()
+    owner = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+    queue = WorkQueue(queue_path, lease_seconds)
+    default_execute = execute is None
+    execute = execute or execute_shard
+    stats = {"done": 0, "failed": 0, "lost": 0}
+    busy = set()
+
+    session = excel_session(app_factory or new_excel_app) if default_execute else nullcontext()
+    with session as excel:
+        while True:
+            shard = queue.claim(owner, skip=busy)
+            if shard is None:
+                if not queue.pending():
+                    break
+                time.sleep(poll_seconds)
+                busy.clear()
+                continue
+            if not queue.acquire_locks(shard_lock_paths(shard), owner):
+                # Another worker writes one of these workbooks, try a different shard first
+                queue.release(shard["id"], owner)
+                busy.add(shard["id"])
+                continue
+
+            label = f"{shard['kind'].upper()} {os.path.basename(shard['source'])} [{', '.join(shard['targets'])}]"
+            reporter.progress(f"{owner}: {label}...")
+            heartbeat = _Heartbeat(queue, shard["id"], owner, max_shard_seconds)
+            heartbeat.start()
+            try:
+                result = execute(shard, heartbeat.reporter(reporter))
+                # Follow-up shards are queued with the completion, so pending() never drops to 0 in between
+                follow_up = result.pop("follow_up", [])
+                if not queue.complete(shard["id"], owner, result, follow_up, shard_size):
+                    raise LeaseLost(f"Shard {shard['id']}: another worker took the shard over")
+                stats["done"] += 1
+                reporter.info(f"✅ {label}")
+            except LeaseLost as e:
+                if excel is not None:
+                    # Rows written since the last save must not reach a workbook the new owner writes
+                    excel.discard()
+                # A no-op when another worker holds the shard now
+                queue.fail(shard["id"], owner, str(e))
+                stats["lost"] += 1
+                reporter.error(f"❌ {label}: {e}")
+            except Exception as e:
+                queue.fail(shard["id"], owner, str(e))
+                stats["failed"] += 1
+                reporter.error(f"❌ {label}: {e}")
+            finally:
+                heartbeat.stop()
+                queue.release_locks(owner)
+            busy.clear()
+    reporter.progress_done()
+    return stats
+
+
+def _worker_process(queue_path: str, index: int, kwargs: dict):
+    run_worker(queue_path, f"{socket.gethostname()}:{os.getpid()}:w{index}", **kwargs)
+
+
+def run_local_workers(queue_path: str, processes: int = 2, **kwargs) -> list:
+    """
+    Runs `processes` workers as separate processes on this machine, each with
+    its own Excel instance, standing in for nodes. kwargs go to run_worker
+    (execute must then be a module-level function).
+
+    Returns:
+        list: exit code per process
+    """
+    workers = [Process(target=_worker_process, args=(queue_path, i, kwargs)) for i in range(max(1, processes))]
+    for p in workers:
+        p.start()
+    for p in workers:
+        p.join()
+    return [p.exitcode for p in workers]
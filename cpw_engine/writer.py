@@ -0,0 +1,281 @@
+"""
+Write-coalescing writer for the GBA and Team workbooks.
+
+App sessions (Streamlit runs each one in its own thread) do not open the
+target workbooks themselves. A session groups its source headlessly and
+submits one append per target workbook to the process-wide WorkbookWriter.
+The writer's single thread owns Excel. Every flush interval it takes all
+queued appends, groups them by target workbook, and opens, writes and saves
+each workbook once. Requests are appended one after the other in arrival
+order.
+
+    writer = WorkbookWriter(flush_interval=2.0)
+    summary = queue_gba_export(source_file, writer, reporter)
+
+Writes to a workbook are serialised. Concurrent exports therefore no longer
+lose appends or fail on a workbook another session has open. Sessions that
+update the same workbook within one interval share a single save.
+"""
+import os
+import threading
+import time
+from concurrent.futures import Future, as_completed
+from dataclasses import dataclass, field
+
+from .events import Reporter
+from .excel import com_thread, excel_session, open_workbook, save_workbook
+from .gba import (build_output_rows, clear_content, gba_target_sheets, group_gba_rows, next_gba_row,
+                  next_gba_serial)
+from .journal import PENDING, SAVED, ExportJournal, payload_checksum
+from .paths import clean_file_name, derive_gba_file_path, derive_team_file_path
+from .plan import read_sheet_values
+from .schema import GBA_SOURCE, GBA_WORKBOOK, validate_file
+from .team import (DEFAULT_START_ROW, create_team_workbook, finish_team_workbook, group_team_rows,
+                   next_team_row, oracle_sheet, write_team_rows)
+
+GBA = "gba"
+TEAM = "team"
+DEFAULT_FLUSH_INTERVAL = 2.0
+
+
+@dataclass
+class AppendRequest:
+    kind: str
+    target_file: str
+    template_path: str
+    rows: object
+    label: str
+    checksum: str
+    submitted: float = field(default_factory=time.monotonic)
+    future: Future = field(default_factory=Future)
+
+
+class WorkbookWriter:
+    """
+    Single writer thread for all target workbooks of a process.
+
+    Args:
+        flush_interval: seconds the writer waits after the first queued append,
+            so appends from other sessions land in the same open/save
+        app_factory: Excel app of each flush's session, see excel.ExcelSession
+    """
+
+    def __init__(self, flush_interval: float = DEFAULT_FLUSH_INTERVAL, app_factory=None):
+        self.flush_interval = flush_interval
+        self.app_factory = app_factory
+        self.stats = {"requests": 0, "flushes": 0, "saves": 0}
+        self._pending = []
+        self._condition = threading.Condition()
+        self._thread = None
+        self._stopped = False
+
+    def submit(self, kind: str, target_file: str, template_path: str, rows, label: str,
+               checksum: str = None) -> Future:
+        """
+        Queues rows for target_file (created from template_path when missing).
+
+        Returns:
+            Future: resolves to {"start_row", "rows", "created", "warnings"} once
+            the workbook is saved, or raises the error of the write or save
+        """
+        request = AppendRequest(kind, target_file, template_path, rows, label, checksum or payload_checksum(rows))
+        with self._condition:
+            if self._stopped:
+                raise RuntimeError("The workbook writer is stopped")
+            self._pending.append(request)
+            self.stats["requests"] += 1
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="cpw-workbook-writer", daemon=True)
+                self._thread.start()
+            self._condition.notify()
+        return request.future
+
+    def stop(self, timeout: float = None):
+        """Flushes what is queued and ends the writer thread"""
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self):
+        com_thread()
+        while True:
+            with self._condition:
+                while not self._pending and not self._stopped:
+                    self._condition.wait()
+                if not self._pending:
+                    return
+                deadline = self._pending[0].submitted + self.flush_interval
+                while not self._stopped and time.monotonic() < deadline:
+                    self._condition.wait(deadline - time.monotonic())
+                batch, self._pending = self._pending, []
+            self.flush(batch)
+
+    def flush(self, batch: list):
+        """One open, write and save per target workbook of batch"""
+        by_target = {}
+        for request in batch:
+            by_target.setdefault(os.path.normcase(os.path.abspath(request.target_file)), []).append(request)
+        try:
+            with excel_session(self.app_factory):
+                for requests in by_target.values():
+                    try:
+                        self._apply(requests)
+                        self.stats["saves"] += 1
+                    except Exception as e:
+                        for request in requests:
+                            if not request.future.done():
+                                request.future.set_exception(e)
+        except Exception as e:
+            # Excel could not be started (or quit badly), fail whatever is still waiting
+            for request in batch:
+                if not request.future.done():
+                    request.future.set_exception(e)
+        self.stats["flushes"] += 1
+
+    def _apply(self, requests: list):
+        first = requests[0]
+        file_exists = os.path.exists(first.target_file)
+        warnings = []
+        if first.kind == GBA:
+            book = open_workbook(first.target_file if file_exists else first.template_path)
+            if not file_exists:
+                clear_content(book)
+            ws_target, resources = gba_target_sheets(book)
+            next_row = next_gba_row(ws_target) if file_exists else 2
+            serial = next_gba_serial(ws_target, first.target_file, next_row) if file_exists else 1
+        else:
+            book = open_workbook(first.target_file) if file_exists else \
+                create_team_workbook(first.target_file, first.template_path)
+            ws_target = oracle_sheet(book)
+            next_row = next_team_row(ws_target) if file_exists else 5
+
+        try:
+            results = {}
+            for request in requests:
+                if request.checksum in results:
+                    # The same rows submitted twice in one interval (e.g. a double click) are written once
+                    continue
+                if request.kind == GBA:
+                    rows = build_output_rows(request.rows, resources, next_row, first_serial=serial)
+                    serial += len(rows)
+                    if rows:
+                        ws_target.range((next_row, 1), (next_row + len(rows) - 1, 10)).value = rows
+                else:
+                    rows = request.rows
+                    write_team_rows(ws_target, next_row, rows)
+                results[request.checksum] = {"start_row": next_row, "rows": len(rows), "created": not file_exists}
+                next_row += len(rows)
+
+            if first.kind == TEAM:
+                finish_team_workbook(book, Reporter(lambda event: warnings.append(event.message)), first.label)
+            if first.kind == GBA and not file_exists:
+                os.makedirs(os.path.dirname(first.target_file), exist_ok=True)
+                save_workbook(book, first.target_file)
+            else:
+                save_workbook(book)
+        finally:
+            try:
+                book.close()
+            except Exception:
+                pass
+
+        for request in requests:
+            request.future.set_result(dict(results[request.checksum], warnings=warnings))
+
+
+def _export(writer: WorkbookWriter, kind: str, groups: dict, output_folder: str, file_pattern: str,
+            template_name: str, journal: ExportJournal, reporter: Reporter, noun: str) -> dict:
+    """Submits every group not saved yet and reports each workbook as the writer saves it"""
+    summary = {"created": [], "updated": [], "skipped": [], "start_rows": {}}
+    futures = {}
+    for name, rows in groups.items():
+        clean_name = clean_file_name(name)
+        file_name = file_pattern.format(clean_name)
+        target_file = os.path.join(output_folder, file_name).replace("/", os.sep)
+        checksum = payload_checksum(rows)
+        if journal.is_saved(target_file, checksum):
+            summary["skipped"].append(file_name)
+            summary["start_rows"][target_file] = journal.start_row(target_file, checksum)
+            reporter.info(f"⏭️ Skipping {file_name}, already saved by a previous run")
+            continue
+        journal.mark(target_file, PENDING, checksum)
+        future = writer.submit(kind, target_file, os.path.join(output_folder, template_name), rows, clean_name,
+                               checksum)
+        futures[future] = (file_name, target_file, checksum, clean_name, len(rows))
+
+    reporter.progress(f"Queued {len(futures)} {noun} workbook(s) for writing...")
+    for idx, future in enumerate(as_completed(futures)):
+        file_name, target_file, checksum, clean_name, count = futures[future]
+        reporter.progress(f"Writing {noun} workbooks ({idx + 1}/{len(futures)})...")
+        try:
+            result = future.result()
+        except Exception as e:
+            journal.mark(target_file, PENDING, checksum, error=str(e))
+            reporter.error(f"❌ Error saving {clean_name}: {e}")
+            continue
+        journal.mark(target_file, SAVED, checksum, start_row=result["start_row"])
+        summary["start_rows"][target_file] = result["start_row"]
+        if result["created"]:
+            summary["created"].append(file_name)
+            reporter.success(f"🆕 Created new file: {file_name}")
+        else:
+            summary["updated"].append(file_name)
+            reporter.success(f"✅ Updated existing file: {file_name}")
+        for warning in result["warnings"]:
+            reporter.warning(warning)
+        reporter.info(f"💾 Saved: {count} entries to {clean_name}")
+
+    reporter.progress_done()
+    reporter.success(f"🎉 {noun}-wise project data processing completed!")
+    if summary["created"]:
+        reporter.info(f"📁 **New {noun} Files Created:** {', '.join(summary['created'])}")
+    if summary["updated"]:
+        reporter.info(f"🔄 **{noun} Files Updated:** {', '.join(summary['updated'])}")
+    if summary["skipped"]:
+        reporter.info(f"⏭️ **{noun} Files Already Done:** {', '.join(summary['skipped'])}")
+    failed = journal.failed_targets()
+    if failed:
+        reporter.warning(f"⚠️ {len(failed)} {noun} file(s) were not saved. Run the export again to retry only those.")
+    return summary
+
+
+def queue_gba_export(source_file: str, writer: WorkbookWriter, reporter: Reporter = None, resume: bool = True,
+                     targets=None):
+    """
+    run_gba_export through the writer: the source is read headlessly and the
+    GBA workbooks are written by the writer thread. Returns the same summary
+    as export_gba_data_to_files, or None when the source has no GBA rows.
+    """
+    reporter = reporter or Reporter()
+    columns = validate_file(source_file, GBA_SOURCE)
+    groups = group_gba_rows(read_sheet_values(source_file), columns)
+    if groups and targets is not None:
+        groups = {gba: rows for gba, rows in groups.items() if gba in targets}
+    if not groups:
+        reporter.error("No data found!")
+        return None
+    output_folder = os.path.join(derive_gba_file_path(source_file), "02 GBA Workbooks")
+    journal = ExportJournal.for_run(output_folder, "gba", source_file, resume=resume,
+                                    part=",".join(sorted(targets or ())))
+    return _export(writer, GBA, groups, output_folder, "CPW Tool_{}_Main.xlsm", "CPW GBA Specific Template.xlsm",
+                   journal, reporter, "GBA")
+
+
+def queue_team_export(gba_workbook: str, writer: WorkbookWriter, start_row: int = DEFAULT_START_ROW,
+                      reporter: Reporter = None, resume: bool = True, targets=None):
+    """run_team_export through the writer, see queue_gba_export"""
+    reporter = reporter or Reporter()
+    columns = validate_file(gba_workbook, GBA_WORKBOOK)
+    groups = group_team_rows(read_sheet_values(gba_workbook, GBA_WORKBOOK.sheet), start_row, columns)
+    if groups and targets is not None:
+        groups = {team: rows for team, rows in groups.items() if team in targets}
+    if not groups:
+        reporter.error("No data found!")
+        return None
+    output_folder = os.path.join(derive_team_file_path(gba_workbook), "03 Department Workbooks")
+    journal = ExportJournal.for_run(output_folder, "team", gba_workbook, start_row, resume=resume,
+                                    part=",".join(sorted(targets or ())))
+    return _export(writer, TEAM, groups, output_folder, "CPW Tool_{}_Team.xlsm", "CPW Team Specific Template.xlsm",
+                   journal, reporter, "Team")
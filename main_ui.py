@@ -1,500 +1,93 @@
 import streamlit as st
 import os
-import pandas as pd
-import io
-from datetime import datetime, date
-from dotenv import load_dotenv
-from office365.sharepoint.client_context import ClientContext
-from office365.runtime.auth.client_credential import ClientCredential
-from office365.sharepoint.files.file import File
-import xlwings as xw
-import time
-
-# === Global state ===
-selected_file: str = ""
-gba_file_path: str = ""
-team_file_path: str = ""
-wb = None
-ws = None
-last_row: int = 0
-last_col: int = 0
-var_start_row: int = 2
-
-load_dotenv()
-
-# === PFP Functions ===
-def first_time_unique_code_run_pfp(df):
-    df['Unique Code'] = df['Project Number'].astype(str) + ' - ' + df['Employee Name'].astype(str)
-    cols = ['Unique Code'] + [col for col in df.columns if col != 'Unique Code']
-    return df[cols]
-
-def first_time_run_pfp(df):
-    # CHANGE: Track cleaning statistics for detailed reporting
-    original_count = len(df)
-    
-    # Remove duplicates based on Unique Code
-    df_unique = df.drop_duplicates(subset=['Unique Code'], keep='first')
-    duplicates_removed = original_count - len(df_unique)
-    
-    # Remove rows with missing Employee Name
-    df_no_missing = df_unique.dropna(subset=['Employee Name'])
-    blank_employees_removed = len(df_unique) - len(df_no_missing)
-    
-    # Remove 'Labor Cost, Conversion Employee' entries
-    df_final = df_no_missing[df_no_missing['Employee Name'] != 'Labor Cost, Conversion Employee']
-    labor_cost_removed = len(df_no_missing) - len(df_final)
-    
-    # CHANGE: Store cleaning statistics in session state for display
-    st.session_state["cleaning_stats"] = {
-        "original_count": original_count,
-        "duplicates_removed": duplicates_removed,
-        "blank_employees_removed": blank_employees_removed,
-        "labor_cost_removed": labor_cost_removed,
-        "final_count": len(df_final)
-    }
-    
-    return df_final
-
-# === Utils Functions ===
-def clean_path(path: str) -> str:
-    if not path:
-        return ""
-    return path.strip().strip('"').strip("'")
-
-def clean_file_name(fn: str) -> str:
-    """Clean filename by removing invalid characters"""
-    invalid = r'\/:*?"<>|'
-    for ch in invalid:
-        fn = fn.replace(ch, '_')
-    return fn.strip()
-
-def derive_gba_file_path(selected_file: str) -> str:
-    target_folder = "01 Data Processing"
-    pos = selected_file.find(target_folder)
-    if pos == -1:
-        raise ValueError(f"Target folder '{target_folder}' not found in path.")
-    directory_path = selected_file[: pos + len(target_folder)]
-    if len(directory_path) - 19 > 0:
-        gba_file_path = directory_path[: len(directory_path) - 19]
-    else:
-        gba_file_path = os.path.dirname(directory_path)
-    return gba_file_path
-
-def derive_team_file_path(selected_file: str) -> str:
-    target_folder = "02 GBA Workbooks"
-    pos = selected_file.find(target_folder)
-    if pos == -1:
-        raise ValueError(f"Target folder '{target_folder}' not found in path.")
-    directory_path = selected_file[: pos + len(target_folder)]
-    if len(directory_path) - 17 > 0:
-        team_file_path = directory_path[: len(directory_path) - 17]
-    else:
-        team_file_path = os.path.dirname(directory_path)
-    return team_file_path
-
-def open_workbook(path: str):
-    return xw.Book(path)
-
-def find_last_row(sheet):
-    return sheet.api.Cells(sheet.api.Rows.Count, 1).End(-4162).Row
-
-def find_last_col(sheet):
-    return sheet.api.Cells(1, sheet.api.Columns.Count).End(-4159).Column
-
-def find_column_index_from_headers(headers, column_name):
-    for j, h in enumerate(headers, start=1):
-        if (h or "").strip() == column_name:
-            return j
-    return 0
-
-def find_first_empty_row_in_col(sheet, col=5, start=5, search_limit=5000):
-    """
-    Finds the first empty row in a specified column within a given range.
-    
-    Args:
-        sheet: Excel worksheet object
-        col: Column number to check (default: 5)  
-        start: Starting row to check from (default: 4)
-        search_limit: Maximum row to search up to (default: 5000)
-    
-    Returns:
-        int: Row number of first empty cell, or next available row after last used row
-    """
-    for r in range(start, search_limit + 1):
-        val = sheet.range((r, col)).value
-        if val is None or (str(val).strip() == ""):
-            return r
-    lr = sheet.api.Cells(sheet.api.Rows.Count, col).End(-4162).Row
-    return max(start, lr + 1)
-
-def read_block(sheet, nrows, ncols):
-    rng = sheet.range((1, 1), (nrows, ncols))
-    return rng.value
-
-# === GBA Export Functions ===
-def format_project_number(number):
-    try:
-        f = float(number)
-        if f.is_integer():
-            return str(int(f))
-        return str(number)
-    except Exception:
-        return str(number)
-
-def get_gba_project_details(sheet):
-    last_row_ = find_last_row(sheet)
-    last_col_ = find_last_col(sheet)
-    block = read_block(sheet, last_row_, last_col_)
-    headers = block[0]
-
-    colProject = find_column_index_from_headers(headers, "Project Number") - 1
-    colProjectName = find_column_index_from_headers(headers, "Project Name") - 1
-    colEmployeeName = find_column_index_from_headers(headers, "Employee Name") - 1
-    colDepartmentName = find_column_index_from_headers(headers, "Expenditure Organization Name") - 1
-
-    gba_dict = {}
-    for row in block[1:]:
-        department_name = (row[colDepartmentName] if colDepartmentName >= 0 else "") or ""
-        project_number = (row[colProject] if colProject >= 0 else "") or ""
-        project_name = (row[colProjectName] if colProject >= 0 else "") or ""
-        resource_name = (row[colEmployeeName] if colEmployeeName >= 0 else "")
-
-        tokens = str(department_name).split()
-        gba_value = ""
-        for tt in (t.strip() for t in tokens):
-            if tt in ("MOB:", "Mobility:"):
-                gba_value = "Mobility"; break
-            elif tt in ("PLA:", "Places:"):
-                gba_value = "Places"; break
-            elif tt in ("RES:", "Resilience:"):
-                gba_value = "Resilience"; break
-            elif tt == "EF:":
-                gba_value = "Enabling Function"; break
-            elif tt == "SSC:":
-                gba_value = "Shared Services"; break
-
-        if gba_value:
-            project_number_fmt = format_project_number(project_number)
-            gba_dict.setdefault(gba_value, []).append(
-                [project_number_fmt, project_name, resource_name, department_name]
-            )
-
-    return gba_dict if gba_dict else None
-
-def build_resource_lookup(ws_resource):
-    last_row2 = find_last_row(ws_resource)
-    block = ws_resource.range((1, 1), (last_row2, 4)).value
-    lookup = {}
-    for row in block:
-        if row[1]:
-            lookup[str(row[1]).strip()] = (row[0], row[2], row[3])
-    return lookup
-
-def clear_content(workbook):
-    ws_ = workbook.sheets["Project Plan Analysis"]
-    last_row_ = find_last_row(ws_)
-    last_col_ = find_last_col(ws_)
-    if last_row_ >= 3:
-        ws_.range((3, 1), (last_row_, last_col_)).value = None
-    ws_.range((3, 1), (50000, 20)).value = None
-
-def export_gba_data_to_files():
-    global wb, ws, gba_file_path
-    book = wb
-    sheet = ws
-    gba_projects = get_gba_project_details(sheet)
-    if not gba_projects:
-        st.error("No data found!")
-        return
-
-    # CHANGE: Track which files were created/updated for progress reporting
-    created_files = []
-    updated_files = []
+from datetime import datetime
+
+# CHANGE: Heavy subsystems are loaded on first use. `engine.pfp` (pandas, openpyxl)
+# and `engine.gba` / `engine.team` (xlwings) are imported by the first attribute
+# access and cached in sys.modules, so the selection page only pays for streamlit
+# itself. The unused office365 / dotenv imports are gone.
+import cpw_engine as engine
+from cpw_engine import events
+from cpw_engine.paths import clean_path
+
+# === Engine adapters ===
+def streamlit_reporter() -> events.Reporter:
+    """Engine Reporter that renders events with st.* calls, progress goes to one placeholder"""
     progress_placeholder = st.empty()
 
-    for idx, (gba_value, projects) in enumerate(gba_projects.items()):
-        # CHANGE: Show real-time progress during file processing
-        progress_placeholder.info(f"Processing GBA: {gba_value} ({idx + 1}/{len(gba_projects)})...")
-        
-        # Clean the GBA value for filename
-        clean_gba_value = clean_file_name(gba_value)
-        target_file = os.path.join(
-            gba_file_path, "02 GBA Workbooks", f"CPW Tool_{clean_gba_value}_Main.xlsm"
-        )
-        target_file = target_file.replace("/", os.sep)
-        file_exists = os.path.exists(target_file)
-
-        if file_exists:
-            target_wb = xw.Book(target_file)
-            updated_files.append(f"CPW Tool_{clean_gba_value}_Main.xlsm")
-            # CHANGE: Show immediate feedback when updating existing file
-            st.success(f"✅ Updating existing file: CPW Tool_{clean_gba_value}_Main.xlsm")
+    def on_event(event):
+        if event.level == "progress":
+            if event.message:
+                progress_placeholder.info(event.message)
+            else:
+                progress_placeholder.empty()
         else:
-            template_path = os.path.join(
-                gba_file_path, "02 GBA Workbooks", "CPW GBA Specific Template.xlsm"
-            )
-            target_wb = xw.Book(template_path)
-            clear_content(target_wb)
-            created_files.append(f"CPW Tool_{clean_gba_value}_Main.xlsm")
-            # CHANGE: Show immediate feedback when creating new file
-            st.success(f"🆕 Creating new file: CPW Tool_{clean_gba_value}_Main.xlsm")
+            getattr(st, event.level)(event.message)
 
-        try:
-            ws_target = target_wb.sheets["Project Plan Analysis"]
-        except Exception:
-            ws_target = target_wb.sheets.add()
-            ws_target.name = "Project Plan Analysis"
+    return events.Reporter(on_event)
 
-        try:
-            ws_resource = target_wb.sheets["Resource List"]
-            resource_lookup = build_resource_lookup(ws_resource)
-        except Exception:
-            resource_lookup = {}
+# CHANGE: Cached frames are bounded, the server keeps at most max_entries results per function
+@st.cache_data(show_spinner=False, max_entries=4)
+def compare_stored_weeks(old_pfp_folder: str, stored_weeks: tuple, prev_week: str, current_week: str):
+    """weeks.HistoryStore.compare_weeks, cached until the folder stores other weeks"""
+    return engine.weeks.HistoryStore.for_folder(old_pfp_folder).compare_weeks(prev_week, current_week)
 
-        if file_exists:
-            next_row = ws_target.api.Cells(ws_target.api.Rows.Count, 1).End(-4162).Row + 1
-        else:
-            next_row = 2
-
-        output_rows = []
-        for idx, proj in enumerate(projects):
-            date_val = datetime.today().strftime("%d-%b-%Y")
-            serial = next_row + idx - 1
-            d_val, e_val, f_val, g_val = proj
-            c_val = f"{d_val} - {f_val}"
-            h_val = i_val = j_val = ""
-            res_info = resource_lookup.get(str(f_val).strip())
-            if res_info:
-                h_val, i_val, j_val = res_info
-            row = [date_val, serial, c_val, d_val, e_val, f_val, g_val, h_val, i_val, j_val]
-            output_rows.append(row)
-
-        if output_rows:
-            ws_target.range((next_row, 1),
-                            (next_row + len(output_rows) - 1, 10)).value = output_rows
-
-        # CHANGE: Enhanced error handling for Excel save operations
-        try:
-            if not file_exists:
-                os.makedirs(os.path.dirname(target_file), exist_ok=True)
-                target_wb.save(target_file)
-            else:
-                target_wb.save()
-            target_wb.close()
-            # CHANGE: Show save confirmation for each file
-            st.info(f"💾 Saved: {len(projects)} entries to {clean_gba_value}")
-        except Exception as e:
-            st.error(f"❌ Error saving {clean_gba_value}: {e}")
-            try:
-                target_wb.close()
-            except:
-                pass
-
-    # CHANGE: Clear progress message and show final summary
-    progress_placeholder.empty()
-    st.success("🎉 GBA-wise project data processing completed!")
-    
-    # CHANGE: Show detailed file creation/update summary
-    if created_files:
-        st.info(f"📁 **New GBA Files Created:** {', '.join(created_files)}")
-    
-    if updated_files:
-        st.info(f"🔄 **GBA Files Updated:** {', '.join(updated_files)}")
-
-# === Team Export Functions ===
-def get_team_project_details(sheet):
-    project_sheet = sheet.book.sheets['Project Plan Analysis']
-    last_row_ = find_last_row(project_sheet)
-    last_col_ = find_last_col(project_sheet)
-    block = read_block(project_sheet, last_row_, last_col_)
-    headers = block[0]
-
-    colOracleDate = find_column_index_from_headers(headers, "Oracle Date")
-    colIndex = find_column_index_from_headers(headers, "Index")
-    colUniqueCode = find_column_index_from_headers(headers, "Unique Code")
-    colProject = find_column_index_from_headers(headers, "Project Number")
-    colProjectName = find_column_index_from_headers(headers, "Project Name")
-    colEmployeeName = find_column_index_from_headers(headers, "Resource Name")
-    colTeamName = find_column_index_from_headers(headers, "Department Name")
-
-    team_dict = {}
-    start = var_start_row if var_start_row > 1 else 2
-    for r in range(start - 1, last_row_):
-        row = block[r]
-        oracle_date = row[colOracleDate - 1] if colOracleDate else None
-        index = row[colIndex - 1] if colIndex else None
-        unique_code = row[colUniqueCode - 1] if colUniqueCode else None
-        project_number = (row[colProject - 1] if colProject else "") or ""
-        project_name = (row[colProjectName - 1] if colProject else "") or ""
-        resource_name = (row[colEmployeeName - 1] if colEmployeeName else "") or ""
-        team_name = (row[colTeamName - 1] if colTeamName else "") or ""
-        if str(team_name).strip() != "":
-            team_dict.setdefault(team_name, []).append(
-                [oracle_date, index, unique_code, project_number, project_name, resource_name]
-            )
-    return team_dict if team_dict else None
-
-def hide_and_protect(workbook):
-    today_week = f"Week {date.today().isocalendar()[1]:02d}"
-
-    def hide_columns_for_table(ws, table_name):
-        try:
-            tbl = ws.api.ListObjects(table_name)
-        except Exception:
-            return
-        hide_flag = False
-        for col in tbl.ListColumns:
-            header = col.Name
-            if "Week" in str(header):
-                if today_week in str(header):
-                    hide_flag = False
-                if hide_flag:
-                    col.Range.EntireColumn.Hidden = True
-            if "Week 01" in str(header):
-                hide_flag = True
-                col.Range.EntireColumn.Hidden = True
-
-    try:
-        ws = workbook.sheets["Oracle"]
-        hide_columns_for_table(ws, "ProjectRaw6")
-        ws.api.Unprotect("1234")
-        ws.api.Cells.Locked = False
-        ws.api.Range("A:AA").Locked = True
-        ws.api.Protect("1234", True, True, True)
-        try:
-            tbl = ws.api.ListObjects("ProjectRaw6")
-            tbl.Range.Sort(Key1=tbl.ListColumns("Resource Name").Range, Order1=1)
-        except Exception:
-            pass
-    except Exception:
-        pass
-
-    try:
-        ws = workbook.sheets["Opportunity | Leaves | Others"]
-        hide_columns_for_table(ws, "ProjectRaw6312")
-        ws.api.Unprotect("1234")
-        ws.api.Protect("1234", True, True, True)
-    except Exception:
-        pass
-
-    try:
-        ws = workbook.sheets["Summary Table"]
-        hide_columns_for_table(ws, "Combined")
-        ws.api.Unprotect("1234")
-        ws.api.Protect("1234", True, True, True)
-    except Exception:
-        pass
-
-    try:
-        ws = workbook.sheets["Capacity Forecast %"]
-        hide_flag = False
-        for i in range(1, 101):
-            header = ws.range((1, i)).value
-            if header and "Week" in str(header):
-                if today_week in str(header):
-                    hide_flag = False
-                if hide_flag:
-                    ws.range((1, i)).entire_column.hidden = True
-            if header and "Week 01" in str(header):
-                hide_flag = True
-                ws.range((1, i)).entire_column.hidden = True
-        ws.api.Unprotect("1234")
-        ws.api.Protect("1234", True, True, True)
-    except Exception:
-        pass
-
-def export_team_data_to_files():
-    global wb, ws, team_file_path
-    book = wb
-    sheet = ws
-    team_projects = get_team_project_details(sheet)
-    if not team_projects:
-        st.error("No data found!")
-        return
+# CHANGE: One writer per server process, shared by every session, serialises and coalesces workbook writes
+@st.cache_resource
+def workbook_writer():
+    """Process-wide writer.WorkbookWriter of the GBA/Team exports"""
+    return engine.writer.WorkbookWriter(flush_interval=2.0)
 
-    # CHANGE: Track which team files were created/updated for progress reporting
-    created_team_files = []
-    updated_team_files = []
-    progress_placeholder = st.empty()
+# CHANGE: The explorer reads a columnar snapshot, so only the requested page / aggregate is loaded per rerun
+# One Explorer at a time: a refreshed snapshot replaces the previous one
+@st.cache_resource(max_entries=1)
+def snapshot_explorer(snapshot_dir: str, version: tuple):
+    """explorer.Explorer of the snapshot, opened again whenever the snapshot changes"""
+    return engine.explorer.Explorer(snapshot_dir)
 
-    for idx, (team, projects) in enumerate(team_projects.items()):
-        # CHANGE: Show real-time progress during team file processing
-        progress_placeholder.info(f"Processing Team: {team} ({idx + 1}/{len(team_projects)})...")
-        
-        # Clean the team name for filename
-        clean_team_name = clean_file_name(team)
-        target_file = os.path.join(
-            team_file_path, "03 Department Workbooks", f"CPW Tool_{clean_team_name}_Team.xlsm"
-        )
-        file_exists = os.path.exists(target_file)
-
-        if file_exists:
-            target_wb = xw.Book(target_file)
-            updated_team_files.append(f"CPW Tool_{clean_team_name}_Team.xlsm")
-            # CHANGE: Show immediate feedback when updating existing team file
-            st.success(f"✅ Updating existing team file: CPW Tool_{clean_team_name}_Team.xlsm")
-        else:
-            template_path = os.path.join(
-                team_file_path, "03 Department Workbooks", "CPW Team Specific Template.xlsm"
-            )
-            target_wb = xw.Book(template_path)
-            os.makedirs(os.path.dirname(target_file), exist_ok=True)
-            created_team_files.append(f"CPW Tool_{clean_team_name}_Team.xlsm")
-            # CHANGE: Show immediate feedback when creating new team file
-            st.success(f"🆕 Creating new team file: CPW Tool_{clean_team_name}_Team.xlsm")
-            
-            # CHANGE: Enhanced error handling for new team file creation
-            try:
-                target_wb.save(target_file)
-            except Exception as e:
-                st.error(f"❌ Error saving new team workbook {clean_team_name}: {e}")
-                continue
+@st.cache_data(show_spinner=False, max_entries=64)
+def explorer_options(_explorer, version: tuple, column: str, filters: dict) -> list:
+    return _explorer.options(column, filters)
 
-        try:
-            ws_target = target_wb.sheets["Oracle"]
-        except Exception:
-            ws_target = target_wb.sheets.add()
-            ws_target.name = "Oracle"
-        if ws_target is None:
-            raise Exception("Failed to create or access 'Oracle' sheet")
-
-        if file_exists:
-            next_row = find_first_empty_row_in_col(ws_target, col=5, start=5)
-        else:
-            next_row = 5
+@st.cache_data(show_spinner=False, max_entries=1)
+def explorer_week_range(_explorer, version: tuple) -> tuple:
+    return _explorer.week_range()
 
-        ws_target.api.Unprotect("1234")
-        if projects:
-            ws_target.range((next_row, 2), (next_row + len(projects) - 1, 7)).value = projects
-        ws_target.api.Protect("1234", True, True, True)
+@st.cache_data(show_spinner=False, max_entries=64)
+def explorer_count(_explorer, version: tuple, filters: dict) -> int:
+    return _explorer.count(filters)
 
-        hide_and_protect(target_wb)
+@st.cache_data(show_spinner=False, max_entries=32)
+def explorer_rows(_explorer, version: tuple, filters: dict, page: int, page_size: int):
+    return _explorer.page(filters, page, page_size)
 
-        # CHANGE: Enhanced error handling for team file save operations
-        try:
-            target_wb.save()
-            # CHANGE: Show save confirmation for each team file
-            st.info(f"💾 Saved: {len(projects)} entries to {clean_team_name}")
-        except Exception as e:
-            st.error(f"❌ Error saving team workbook {clean_team_name}: {e}")
-        
-        try:
-            target_wb.close()
-        except Exception as e:
-            st.error(f"❌ Error closing team workbook {clean_team_name}: {e}")
-
-    # CHANGE: Clear progress message and show final summary
-    progress_placeholder.empty()
-    st.success("🎉 Team-wise project data processing completed!")
-    
-    # CHANGE: Show detailed team file creation/update summary
-    if created_team_files:
-        st.info(f"📁 **New Team Files Created:** {', '.join(created_team_files)}")
-    
-    if updated_team_files:
-        st.info(f"🔄 **Team Files Updated:** {', '.join(updated_team_files)}")
+@st.cache_data(show_spinner=False, max_entries=16)
+def explorer_aggregate(_explorer, version: tuple, by: tuple, filters: dict):
+    return _explorer.aggregate(list(by), filters)
 
 # === Simple Streamlit UI ===
+def show_export_plan(plan):
+    """Shows the dry-run plan of an export: one row per target workbook and a summary"""
+    import pandas as pd
+
+    if not plan["targets"]:
+        st.warning("No data found!")
+        return
+    st.dataframe(pd.DataFrame(plan["targets"]), hide_index=True)
+    st.info(f"📋 {plan['create']} to create, {plan['update']} to update, {plan['done']} already saved, "
+            f"{plan['rows']:,} rows to write")
+
+# CHANGE: Reruns of an unchanged file resume through the export journal unless a fresh run is asked for
+def resume_choice(key: str) -> bool:
+    """Checkbox for a fresh export, returns the resume flag of the export and its plan"""
+    fresh = st.checkbox(
+        "Export again from scratch", value=False, key=key,
+        help="By default a rerun of an unchanged file skips the workbooks a previous run already saved "
+             "and only retries the others. A fresh export writes every workbook again, so rows already "
+             "appended by the previous run are appended a second time.",
+    )
+    return not fresh
+
 def simple_gba_tab():
     st.write("GBA Wise Extract")
 
@@ -512,30 +105,30 @@ def simple_gba_tab():
                using the respective GBA-specific template when required.
             """)
     manual_path = st.text_input("Enter Excel file path:", key="gba_manual_path")
+    resume = resume_choice("gba_fresh")
     
+    # CHANGE: Dry run without Excel, shows which GBA workbooks get how many rows
+    if st.button("Plan GBA Export", key="gba_plan_btn"):
+        if not manual_path:
+            st.warning("Please enter a file path.")
+            return
+        try:
+            show_export_plan(engine.plan.plan_gba_export(clean_path(manual_path), resume))
+        except Exception as e:
+            st.error(f"Error: {e}")
+
     if st.button("Run GBA Export", key="gba_export_btn"):
-        global gba_file_path, wb, ws, last_row, last_col
         if not manual_path:
             st.warning("Please enter a file path.")
             return
         
         selected_file = clean_path(manual_path)
         try:
-            gba_file_path = derive_gba_file_path(selected_file)
-            wb = xw.Book(selected_file)
-            ws = wb.sheets[0]
-            last_row = find_last_row(ws)
-            last_col = find_last_col(ws)
-            export_gba_data_to_files()  # CHANGE: Now shows real-time progress and file creation info
+            engine.writer.queue_gba_export(selected_file, workbook_writer(), streamlit_reporter(), resume)  # CHANGE: Written by the shared workbook writer
         except Exception as e:
             st.error(f"Error: {e}")
-        finally:
-            if wb:
-                wb.close()
-            wb, ws = None, None
 
 def simple_team_tab():
-    global var_start_row, team_file_path, wb, ws, last_row, last_col
     st.write("Team Wise Extract")
     st.info("""
            📌 **First Run – Team-wise Extraction**
@@ -556,29 +149,30 @@ def simple_team_tab():
            """)
 
     manual_path = st.text_input("Enter GBA workbook path:", key="team_manual_path")
-    start_row = st.number_input("Start row", min_value=1, value=var_start_row, key="team_start_row")
+    start_row = st.number_input("Start row", min_value=1, value=engine.team.DEFAULT_START_ROW, key="team_start_row")
+    resume = resume_choice("team_fresh")
     
+    # CHANGE: Dry run without Excel, shows which Team workbooks get how many rows
+    if st.button("Plan Team Export", key="team_plan_btn"):
+        if not manual_path:
+            st.warning("Please enter a file path.")
+            return
+        try:
+            show_export_plan(engine.plan.plan_team_export(clean_path(manual_path), int(start_row), resume))
+        except Exception as e:
+            st.error(f"Error: {e}")
+
     if st.button("Run Team Export", key="team_export_btn"):
         if not manual_path:
             st.warning("Please enter a file path.")
             return
             
-        var_start_row = int(start_row)
         selected_file = clean_path(manual_path)
         
         try:
-            team_file_path = derive_team_file_path(selected_file)
-            wb = xw.Book(selected_file)
-            ws = wb.sheets[0]
-            last_row = find_last_row(ws)
-            last_col = find_last_col(ws)
-            export_team_data_to_files()  # CHANGE: Now shows real-time progress and file creation info
+            engine.writer.queue_team_export(selected_file, workbook_writer(), int(start_row), streamlit_reporter(), resume)  # CHANGE: Written by the shared workbook writer
         except Exception as e:
             st.error(f"Error: {e}")
-        finally:
-            if wb:
-                wb.close()
-            wb, ws = None, None
 
 def simple_maintenance_gba_tab():
     st.write("GBA Wise Extract (Maintenance)")
@@ -596,30 +190,30 @@ def simple_maintenance_gba_tab():
                using the respective GBA-specific template when required.
             """)
     manual_path = st.text_input("Enter Excel file path:", key="maintenance_gba_manual_path")
+    resume = resume_choice("maintenance_gba_fresh")
     
+    # CHANGE: Dry run without Excel, shows which GBA workbooks get how many rows
+    if st.button("Plan GBA Export", key="maintenance_gba_plan_btn"):
+        if not manual_path:
+            st.warning("Please enter a file path.")
+            return
+        try:
+            show_export_plan(engine.plan.plan_gba_export(clean_path(manual_path), resume))
+        except Exception as e:
+            st.error(f"Error: {e}")
+
     if st.button("Run GBA Export", key="maintenance_gba_export_btn"):
-        global gba_file_path, wb, ws, last_row, last_col
         if not manual_path:
             st.warning("Please enter a file path.")
             return
         
         selected_file = clean_path(manual_path)
         try:
-            gba_file_path = derive_gba_file_path(selected_file)
-            wb = xw.Book(selected_file)
-            ws = wb.sheets[0]
-            last_row = find_last_row(ws)
-            last_col = find_last_col(ws)
-            export_gba_data_to_files()  # CHANGE: Now shows real-time progress and file creation info
+            engine.writer.queue_gba_export(selected_file, workbook_writer(), streamlit_reporter(), resume)  # CHANGE: Written by the shared workbook writer
         except Exception as e:
             st.error(f"Error: {e}")
-        finally:
-            if wb:
-                wb.close()
-            wb, ws = None, None
 
 def simple_maintenance_team_tab():
-    global var_start_row, team_file_path, wb, ws, last_row, last_col
     st.write("Team Wise Extract (Maintenance)")
     st.info("""
             📌 **Maintenance – Team-wise Extraction**
@@ -649,29 +243,30 @@ def simple_maintenance_team_tab():
 
 
     manual_path = st.text_input("Enter GBA workbook path:", key="maintenance_team_manual_path")
-    start_row = st.number_input("Start row", min_value=1, value=var_start_row, key="maintenance_team_start_row")
+    start_row = st.number_input("Start row", min_value=1, value=engine.team.DEFAULT_START_ROW, key="maintenance_team_start_row")
+    resume = resume_choice("maintenance_team_fresh")
     
+    # CHANGE: Dry run without Excel, shows which Team workbooks get how many rows
+    if st.button("Plan Team Export", key="maintenance_team_plan_btn"):
+        if not manual_path:
+            st.warning("Please enter a file path.")
+            return
+        try:
+            show_export_plan(engine.plan.plan_team_export(clean_path(manual_path), int(start_row), resume))
+        except Exception as e:
+            st.error(f"Error: {e}")
+
     if st.button("Run Team Export", key="maintenance_team_export_btn"):
         if not manual_path:
             st.warning("Please enter a file path.")
             return
             
-        var_start_row = int(start_row)
         selected_file = clean_path(manual_path)
         
         try:
-            team_file_path = derive_team_file_path(selected_file)
-            wb = xw.Book(selected_file)
-            ws = wb.sheets[0]
-            last_row = find_last_row(ws)
-            last_col = find_last_col(ws)
-            export_team_data_to_files()  # CHANGE: Now shows real-time progress and file creation info
+            engine.writer.queue_team_export(selected_file, workbook_writer(), int(start_row), streamlit_reporter(), resume)  # CHANGE: Written by the shared workbook writer
         except Exception as e:
             st.error(f"Error: {e}")
-        finally:
-            if wb:
-                wb.close()
-            wb, ws = None, None
 
 def selection_page():
     st.title("Capacity Planning Workbook (CPW) Tool")
@@ -705,7 +300,151 @@ def selection_page():
     else:
         st.warning("Please select both BA and GBA")
 
+    st.divider()
+    if st.button("Batch Mode (all BAs)", key="batch_mode_btn"):
+        st.session_state["current_page"] = "batch"
+        st.rerun()
+    # CHANGE: Paged, filterable view of the cleaned PFP and GBA export rows
+    if st.button("🔎 Data Explorer", key="explorer_btn"):
+        st.session_state["current_page"] = "explorer"
+        st.rerun()
+
+def batch_page():
+    import pandas as pd
+    from cpw_engine import batch
+
+    st.title("Capacity Planning Workbook (CPW) Tool")
+    st.title("Batch Processing: all Business Areas")
+
+    if st.button("← Back", key="batch_back_btn"):
+        st.session_state["current_page"] = "selection"
+        st.rerun()
+
+    st.info("""
+            📌 **Batch Mode**
+            
+            1. Prepare a manifest file listing each **BA** and its  
+               `CPW FINAL PACKAGE \\ 01 Data Processing \\ Project Financial Plan (PFP)` folder  
+               (JSON `{"Belgium": "<PFP folder>", ...}` or CSV with `ba,pfp_folder` columns).
+
+            2. Paste the manifest path below and click **Run Batch**.
+
+            3. For every BA the tool will:  
+               - Pick the latest RAW PFP file in the **Raw Data** folder, add unique codes and clean it.  
+               - Compare it with the newest file in **OLD PFP** and save *New_PFP_YYYY-MM-DD.xlsx*.  
+               - Run the GBA export and the Team export for the GBA workbooks it updated.
+
+            4. A consolidated run report is shown and saved next to the manifest.
+            """)
+
+    manifest_path = st.text_input("Manifest file path:", key="batch_manifest_path")
+    workers = st.number_input("Parallel BA workers", min_value=1, max_value=17, value=4, key="batch_workers")
+
+    if st.button("Run Batch", key="run_batch_btn"):
+        if not manifest_path:
+            st.warning("Please enter a manifest path.")
+            return
+        try:
+            manifest_file = clean_path(manifest_path)
+            manifest = batch.load_manifest(manifest_file)
+            # CHANGE: PFP stage on threads, the Streamlit server does not spawn worker processes (python -m cpw_engine batch does)
+            report = batch.run_batch(manifest, int(workers), reporter=streamlit_reporter(), writer=workbook_writer(),
+                                     processes=False)
+            report_path = batch.write_report(report, os.path.dirname(manifest_file))
+
+            failed = [e["ba"] for e in report if e["status"] != "ok"]
+            if failed:
+                st.error(f"❌ {len(failed)} BA(s) failed: {', '.join(failed)}")
+            st.success(f"🎉 Batch completed for {len(report)} BA(s). Report saved: `{report_path}`")
+            report_df = pd.DataFrame(report)
+            report_columns = ["ba", "status", "raw_rows", "clean_rows", "new_rows",
+                              "pfp_seconds", "export_seconds", "error"]
+            st.dataframe(report_df[[c for c in report_columns if c in report_df.columns]])
+        except Exception as e:
+            st.error(f"Error: {e}")
+
+def explorer_page():
+    import math
+    from cpw_engine import batch
+
+    st.title("Capacity Planning Workbook (CPW) Tool")
+    st.title("Data Explorer")
+
+    if st.button("← Back", key="explorer_back_btn"):
+        st.session_state["current_page"] = "selection"
+        st.rerun()
+
+    st.info("""
+            📌 **Data Explorer**
+            
+            1. Paste a batch **manifest** or a BA's `Project Financial Plan (PFP)` folder path below  
+               and click **Refresh Snapshot**. Only sources that changed since the last refresh are read again.
+
+            2. Filter by **Dataset**, **BA**, **GBA**, **Department**, **Resource** and **Week**  
+               and page through the matching rows, e.g. to check what went to a team.
+
+            3. Open **Aggregates** for row, Unique Code, resource and project counts per group.
+            """)
+
+    source_path = st.text_input("Manifest file or PFP folder path:", key="explorer_source_path")
+    snapshot_dir = engine.explorer.DEFAULT_SNAPSHOT_DIR
+    if st.button("Refresh Snapshot", key="explorer_refresh_btn"):
+        if not source_path:
+            st.warning("Please enter a path.")
+            return
+        try:
+            target = clean_path(source_path)
+            if os.path.isdir(target):
+                manifest = {st.session_state.get("ba_selected") or os.path.basename(os.path.normpath(target)): target}
+            else:
+                manifest = batch.load_manifest(target)
+            summary = engine.explorer.build_snapshot(manifest, snapshot_dir, streamlit_reporter())
+            st.success(f"📦 Snapshot up to date: {summary['rows']:,} rows "
+                       f"({summary['rebuilt']} source(s) read, {summary['kept']} unchanged)")
+        except Exception as e:
+            st.error(f"Error: {e}")
+
+    version = engine.explorer.snapshot_version(snapshot_dir)
+    if version is None:
+        st.warning("No snapshot yet. Enter a path and click Refresh Snapshot.")
+        return
+    explorer = snapshot_explorer(snapshot_dir, version)
+
+    # Each filter only offers the values left by the filters before it
+    filters = {}
+    filter_cols = st.columns(len(engine.explorer.FILTER_COLUMNS) + 1)
+    for col, column in zip(filter_cols, engine.explorer.FILTER_COLUMNS):
+        with col:
+            options = explorer_options(explorer, version, column, dict(filters))
+            filters[column] = st.multiselect(column, options, key=f"explorer_{column}")
+    with filter_cols[-1]:
+        first_week, last_week = explorer_week_range(explorer, version)
+        weeks = st.date_input("Week", value=(first_week, last_week), key="explorer_week") if first_week else ()
+        # The full range (the default) does not filter, so rows without a Week stay in
+        if len(weeks) == 2 and tuple(weeks) != (first_week, last_week):
+            filters["Week"] = tuple(weeks)
+
+    total = explorer_count(explorer, version, filters)
+    col1, col2 = st.columns(2)
+    with col1:
+        page_size = st.selectbox("Rows per page", [50, 100, 250, 500], index=1, key="explorer_page_size")
+    with col2:
+        pages = max(1, math.ceil(total / page_size))
+        page = st.number_input(f"Page (of {pages:,})", min_value=1, max_value=pages, value=1, key="explorer_page")
+
+    rows = explorer_rows(explorer, version, filters, int(page) - 1, page_size)
+    st.dataframe(rows, hide_index=True)
+    first_row = (int(page) - 1) * page_size
+    st.caption(f"Rows {min(first_row + 1, total):,}-{first_row + len(rows):,} of {total:,}")
+
+    with st.expander("📊 Aggregates"):
+        by = st.multiselect("Group by", list(engine.explorer.FILTER_COLUMNS) + ["Week"], default=["GBA", "Department"],
+                            key="explorer_group_by")
+        if by:
+            st.dataframe(explorer_aggregate(explorer, version, tuple(by), filters), hide_index=True)
+
 def processing_page():
+    import pandas as pd
     ba = st.session_state.get("ba_selected", "")
     gba = st.session_state.get("gba_selected", "")
     
@@ -756,11 +495,13 @@ def processing_page():
                     project_plan_path = os.path.join(pfp_folder, "Project Plan Analysis-continuous.xlsx")
                     old_pfp_folder = os.path.join(pfp_folder, "OLD PFP")
                     
+                    # CHANGE: Check the header row first, a file with missing columns fails before the full read
+                    engine.schema.validate_file(selected_file, engine.schema.RAW_PFP)
                     df_raw = pd.read_excel(selected_file)
                     st.write(f"Raw Data: {df_raw.shape[0]} rows")
                     
                     if st.button("Add Unique Code", key="create_project_plan_btn"):
-                        unique_df = first_time_unique_code_run_pfp(df_raw)
+                        unique_df = engine.pfp.first_time_unique_code_run_pfp(df_raw)
                         unique_df.to_excel(project_plan_path, index=False)
                         st.success("Project Plan Analysis created!")
                         # CHANGE: Show preview of data with unique codes
@@ -773,12 +514,15 @@ def processing_page():
                     if st.session_state.get("add_unique_clicked", False):
                         if st.button("Clean & Save", key="clean_pfp_btn"):
                             unique_df = st.session_state.get("unique_df")
-                            cleaned_df = first_time_run_pfp(unique_df)
+                            cleaned_df, stats = engine.pfp.first_time_run_pfp(unique_df)
+                            st.session_state["cleaning_stats"] = stats
                             final_date_str = datetime.now().strftime('%Y-%m-%d')
                             cleaned_file_name = f"Project Plan Analysis-continuous-{final_date_str}.xlsx"
                             cleaned_file_path = os.path.join(old_pfp_folder, cleaned_file_name)
                             os.makedirs(old_pfp_folder, exist_ok=True)
                             cleaned_df.to_excel(cleaned_file_path, index=False)
+                            # CHANGE: Record the week in the delta-encoded OLD PFP history
+                            engine.weeks.HistoryStore.for_folder(old_pfp_folder).add_week(cleaned_df, final_date_str)
                             st.success(f"Cleaned data saved to OLD PFP: {cleaned_file_name}")
                             
                             # CHANGE: Show cleaning statistics
@@ -843,8 +587,8 @@ def processing_page():
                     ---
                     
                     **Step 2 – Comparison**  
-                    1. Provide both the **last week’s cleaned file** and the **current week’s file**  
-                       from the **OLD PFP** folder.  
+                    1. Provide the **OLD PFP** folder (filled in after Step 1) and pick the  
+                       **previous week** and the **current week** from its stored weeks.  
                     
                     2. If new *Unique Code* rows are identified:  
                        - Click **Generate New PFP**, and then click **Save New PFP**.  
@@ -862,27 +606,28 @@ def processing_page():
             if current_raw_path:
                 current_raw_file = clean_path(current_raw_path)
                 try:
-                    raw_data_folder = os.path.dirname(current_raw_file)
-                    pfp_folder = os.path.dirname(raw_data_folder)
-                    project_plan_path = os.path.join(pfp_folder, "Project Plan Analysis-continuous.xlsx")
-                    old_pfp_folder = os.path.join(pfp_folder, "OLD PFP")
-                    
+                    # CHANGE: The watch-folder service may already have processed this extract
+                    watched = engine.watch.processed_entry(current_raw_file)
+                    if watched:
+                        new_pfp = f" New PFP: `{watched['new_pfp']}`" if watched["new_pfp"] else ""
+                        st.info(f"⚡ Already processed automatically at {watched['processed_at']}: "
+                                f"{watched['new_rows']} new rows.{new_pfp}")
+                    failed = engine.watch.failed_entry(current_raw_file)
+                    if failed:
+                        retry = (f"The watcher retries at {datetime.fromtimestamp(failed['retry_at']):%H:%M}."
+                                 if failed.get("retry_at") else "The watcher gave up; process it below.")
+                        st.error(f"❌ Automatic processing failed at {failed['processed_at']} "
+                                 f"(attempt {failed.get('attempts', 1)}): {failed['error']}. {retry}")
+                    engine.schema.validate_file(current_raw_file, engine.schema.RAW_PFP)
                     df_current_raw = pd.read_excel(current_raw_file)
                     st.write(f"Current Week Raw Data: {df_current_raw.shape[0]} rows")
                     
                     if st.button("Process Current Week", key="process_current_week_btn"):
-                        current_unique_df = first_time_unique_code_run_pfp(df_current_raw)
-                        current_unique_df.to_excel(project_plan_path, index=False)
-                        
-                        current_cleaned_df = first_time_run_pfp(current_unique_df)
+                        result = engine.pfp.process_raw_pfp(current_raw_file, df_current_raw)
+                        current_cleaned_file_path = result["cleaned_path"]
+                        st.session_state["cleaning_stats"] = result["stats"]
                         
-                        current_date_str = datetime.now().strftime('%Y-%m-%d')
-                        current_cleaned_file_name = f"Project Plan Analysis-continuous-{current_date_str}.xlsx"
-                        current_cleaned_file_path = os.path.join(old_pfp_folder, current_cleaned_file_name)
-                        os.makedirs(old_pfp_folder, exist_ok=True)
-                        current_cleaned_df.to_excel(current_cleaned_file_path, index=False)
-                        
-                        st.success(f"Current week processed and saved: {current_cleaned_file_name}")
+                        st.success(f"Current week processed and saved: {os.path.basename(current_cleaned_file_path)}")
                         
                         # CHANGE: Show processing statistics for current week
                         if "cleaning_stats" in st.session_state:
@@ -905,65 +650,62 @@ def processing_page():
             st.divider()
             st.subheader("Step 2: Compare with Previous Week")
             
-            col1, col2 = st.columns(2)
-            
-            with col1:
-                prev_week_path = st.text_input("Previous Week File:", key="maintenance_prev_path")
-            
-            with col2:
-                if st.session_state.get("current_week_processed", False):
-                    current_week_path = st.session_state.get("current_cleaned_path", "")
-                    st.text_input("Current Week File:", value=current_week_path, disabled=True, key="maintenance_current_path_display")
-                else:
-                    current_week_path = st.text_input("Current Week File:", key="maintenance_current_path")
-
-            if prev_week_path and current_week_path:
+            # CHANGE: The weeks are compared in the OLD PFP history store, the weekly Excel copies are not read
+            default_old_pfp = ""
+            if st.session_state.get("current_week_processed", False):
+                default_old_pfp = os.path.dirname(st.session_state.get("current_cleaned_path", ""))
+            old_pfp_path = st.text_input("OLD PFP folder:", value=default_old_pfp, key="maintenance_old_pfp_folder")
+
+            if old_pfp_path:
                 try:
-                    df_prev_week = pd.read_excel(clean_path(prev_week_path))
-                    df_current_week = pd.read_excel(clean_path(current_week_path))
-                    
-                    st.write(f"Previous: {len(df_prev_week)} rows, Current: {len(df_current_week)} rows")
-                    
-                    # CHANGE: Show preview of both weeks' data
-                    col1, col2 = st.columns(2)
-                    with col1:
-                        st.write("**Previous Week Preview:**")
-                        st.dataframe(df_prev_week.head(2))
-                    with col2:
-                        st.write("**Current Week Preview:**")
-                        st.dataframe(df_current_week.head(2))
-
-                    if st.button("Generate New PFP", key="generate_new_pfp_btn"):
-                        prev_week_unique_codes = df_prev_week['Unique Code']
-                        current_week_unique_codes = df_current_week['Unique Code']
-                        is_new_row = ~current_week_unique_codes.isin(prev_week_unique_codes)
-                        df_new_pfp = df_current_week[is_new_row].copy()
+                    old_pfp_folder = clean_path(old_pfp_path)
+                    store = engine.weeks.HistoryStore.for_folder(old_pfp_folder)
+                    if st.button("Import Weekly Files", key="import_weekly_files_btn",
+                                 help="Adds the weekly cleaned files of OLD PFP that are not stored yet"):
+                        added = store.import_folder(old_pfp_folder)
+                        st.success(f"Stored {len(added)} more week(s)")
+                    weeks = store.week_dates()
+                    if len(weeks) < 2:
+                        st.warning(f"{len(weeks)} week(s) stored for this folder, process the current week "
+                                   "(Step 1) or import the weekly files to compare two weeks")
+                    else:
+                        col1, col2 = st.columns(2)
+                        with col1:
+                            prev_week = st.selectbox("Previous Week:", weeks, index=len(weeks) - 2,
+                                                     key="maintenance_prev_week")
+                        with col2:
+                            current_week = st.selectbox("Current Week:", weeks, index=len(weeks) - 1,
+                                                        key="maintenance_current_week")
+                        rows = {w["week"]: w["rows"] for w in store.weeks}
+                        st.write(f"Previous: {rows[prev_week]} rows, Current: {rows[current_week]} rows")
+
+                        if st.button("Generate New PFP", key="generate_new_pfp_btn"):
+                            df_new_pfp, stats = compare_stored_weeks(old_pfp_folder, tuple(weeks), prev_week,
+                                                                     current_week)
                         
-                        if len(df_new_pfp) > 0:
-                            st.success(f"Found {len(df_new_pfp)} new entries!")
+                            if len(df_new_pfp) > 0:
+                                st.success(f"Found {len(df_new_pfp)} new entries!")
 
-                            # CHANGE: Show detailed comparison statistics
-                            st.info(f"""
-                            **Comparison Results:**
-                            - Previous week unique codes: {len(prev_week_unique_codes.unique()):,}
-                            - Current week unique codes: {len(current_week_unique_codes.unique()):,}
-                            - New entries (not in previous): {len(df_new_pfp):,}
-                            - Duplicate entries (already existed): {len(df_current_week) - len(df_new_pfp):,}
-                            """)
-                            # CHANGE: Show preview of new entries
-                            st.write("**New PFP Entries Preview:**")
-                            st.dataframe(df_new_pfp.head(3))
+                                # CHANGE: Show detailed comparison statistics
+                                st.info(f"""
+                                **Comparison Results:**
+                                - Previous week unique codes: {stats['prev_unique_codes']:,}
+                                - Current week unique codes: {stats['current_unique_codes']:,}
+                                - New entries (not in previous): {stats['new_entries']:,}
+                                - Duplicate entries (already existed): {stats['existing_entries']:,}
+                                """)
+                                # CHANGE: Show preview of new entries
+                                st.write("**New PFP Entries Preview:**")
+                                st.dataframe(df_new_pfp.head(3))
                             
-                            st.session_state["df_new_pfp_ready"] = df_new_pfp
-                            st.session_state["new_pfp_entries_found"] = True
+                                st.session_state["df_new_pfp_ready"] = df_new_pfp
+                                st.session_state["new_pfp_entries_found"] = True
                             
-                            old_pfp_folder = os.path.dirname(clean_path(prev_week_path))
-                            pfp_base_folder = os.path.dirname(old_pfp_folder)
-                            new_pfp_folder = os.path.join(pfp_base_folder, "NEW PFP")
-                            st.session_state["new_pfp_folder"] = new_pfp_folder
-                        else:
-                            st.warning("No new entries found")
-                            st.info("All current week entries already existed in previous week")
+                                st.session_state["new_pfp_folder"] = os.path.join(os.path.dirname(old_pfp_folder),
+                                                                                  engine.pfp.NEW_PFP_FOLDER)
+                            else:
+                                st.warning("No new entries found")
+                                st.info("All current week entries already existed in previous week")
 
                 except Exception as e:
                     st.error(f"Error: {e}")
@@ -975,13 +717,8 @@ def processing_page():
                     
                     if st.button("Save New PFP", key="save_new_pfp_btn"):
                         try:
-                            new_pfp_folder = st.session_state.get("new_pfp_folder")
-                            os.makedirs(new_pfp_folder, exist_ok=True)
-                            timestamp = datetime.now().strftime('%Y-%m-%d')
-                            new_pfp_filename = f"New_PFP_{timestamp}.xlsx"
-                            new_pfp_path = os.path.join(new_pfp_folder, new_pfp_filename)
-                            df_new_pfp.to_excel(new_pfp_path, index=False)
-                            st.success(f"New PFP saved to NEW PFP folder: {new_pfp_filename}")
+                            new_pfp_path = engine.pfp.save_new_pfp(df_new_pfp, st.session_state.get("new_pfp_folder"))
+                            st.success(f"New PFP saved to NEW PFP folder: {os.path.basename(new_pfp_path)}")
                             
                             # CHANGE: Show final summary
                             st.info(f"""
@@ -1011,6 +748,10 @@ def main():
         selection_page()
     elif st.session_state["current_page"] == "processing":
         processing_page()
+    elif st.session_state["current_page"] == "batch":
+        batch_page()
+    elif st.session_state["current_page"] == "explorer":
+        explorer_page()
 
 if __name__ == "__main__":
     st.set_page_config(page_title="Workforce Planning Tool", layout="wide")
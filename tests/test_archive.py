@@ -0,0 +1,53 @@
+"""archive.archive_sheet on fake sheets: only stale rows leave the live sheet"""
+from datetime import date
+from types import SimpleNamespace
+
+import pandas as pd
+
+from cpw_engine.archive import archive_sheet
+
+TODAY = date(2026, 3, 4)  # ISO week 10
+CUTOFF = date(2025, 9, 3)
+
+
+class FakeSheet:
+    """used_range values starting at sheet row 1, records the deleted row runs"""
+
+    def __init__(self, values):
+        self.used_range = SimpleNamespace(value=values, row=1, column=1)
+        self.deleted = []
+
+    def range(self, first, last):
+        delete = lambda: self.deleted.append((first[0], last[0]))
+        return SimpleNamespace(api=SimpleNamespace(EntireRow=SimpleNamespace(Delete=delete)))
+
+
+def read_archive_codes(part_path) -> list:
+    return pd.read_parquet(part_path)["Unique Code"].tolist()
+
+
+def test_old_oracle_row_with_future_allocation_stays(tmp_path):
+    sheet = FakeSheet([
+        ["Oracle Date", "Unique Code", "Resource Name", "Week 08", "Week 09", "Week 10", "Week 11"],
+        ["05-Jan-2025", "P1 - A", "A", 1.0, 1.0, 0.0, 0.5],   # old, allocated next week: stays
+        ["05-Jan-2025", "P2 - B", "B", 1.0, 0.5, None, None],  # old, allocation over: archived
+        ["05-Feb-2026", "P3 - C", "C", 1.0, None, None, None],  # allocation over but recent: stays
+    ])
+    rows, part_path, deleted = archive_sheet(sheet, str(tmp_path), CUTOFF, TODAY)
+    assert (rows, deleted, sheet.deleted) == (1, [3], [(3, 3)])
+    assert read_archive_codes(part_path) == ["P2 - B"]
+
+
+def test_old_gba_row_is_archived_only_when_gone_from_the_pfp(tmp_path):
+    values = [
+        ["Oracle Date", "Index", "Unique Code", "Resource Name"],
+        ["05-Jan-2025", 1, "P1 - A", "A"],
+        ["05-Jan-2025", 2, "P2 - B", "B"],
+        ["05-Feb-2026", 3, "P3 - C", "C"],
+    ]
+    assert archive_sheet(FakeSheet(values), str(tmp_path / "unknown"), CUTOFF, TODAY)[0] == 0
+
+    sheet = FakeSheet(values)
+    rows, part_path, deleted = archive_sheet(sheet, str(tmp_path), CUTOFF, TODAY, current_codes={"P1 - A"})
+    assert (rows, deleted) == (1, [3])
+    assert read_archive_codes(part_path) == ["P2 - B"]
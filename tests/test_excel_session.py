@@ -0,0 +1,122 @@
+"""ExcelSession against a fake Excel app (xlwings needs Excel, which the tests do not)"""
+import logging
+import os
+
+import pytest
+
+from cpw_engine import excel
+
+
+class FakeBook:
+    def __init__(self, app, path):
+        self.app = app
+        self.fullname = path
+        self.saved_as = []
+
+    def save(self, path=None):
+        self.saved_as.append((path, self.app.calculation))
+
+
+class FakeBooks(list):
+    def __init__(self, app):
+        super().__init__()
+        self.app = app
+
+    def open(self, path):
+        book = FakeBook(self.app, path)
+        self.append(book)
+        return book
+
+
+class FakeApp:
+    """Rejects calculation changes while no workbook is open, like Excel does"""
+
+    def __init__(self):
+        self.books = FakeBooks(self)
+        self.screen_updating = True
+        self.enable_events = True
+        self.display_alerts = True
+        self._calculation = "automatic"
+        self.quit_called = False
+
+    @property
+    def calculation(self):
+        return self._calculation
+
+    @calculation.setter
+    def calculation(self, value):
+        if not self.books:
+            raise RuntimeError("Calculation can only be set with a workbook open")
+        self._calculation = value
+
+    def quit(self):
+        self.quit_called = True
+
+
+ORIGINAL = {"calculation": "automatic", "screen_updating": True, "enable_events": True, "display_alerts": True}
+
+
+def settings(app):
+    return {name: getattr(app, name) for name in excel.SUSPENDED_SETTINGS}
+
+
+def test_settings_applied_after_first_open_and_restored(tmp_path):
+    app = FakeApp()
+    with excel.excel_session(lambda: (app, True)) as session:
+        assert settings(app) == ORIGINAL
+        book = excel.open_workbook(str(tmp_path / "a.xlsm"))
+        assert settings(app) == excel.SUSPENDED_SETTINGS
+        assert session.open(str(tmp_path / "a.xlsm")) is book
+    assert settings(app) == ORIGINAL
+    assert app.quit_called
+
+
+def test_settings_restored_when_the_run_fails(tmp_path):
+    app = FakeApp()
+    with pytest.raises(ValueError):
+        with excel.excel_session(lambda: (app, False)):
+            excel.open_workbook(str(tmp_path / "a.xlsm"))
+            raise ValueError("export failed")
+    assert settings(app) == ORIGINAL
+    assert not app.quit_called
+
+
+def test_save_writes_the_original_calculation_mode(tmp_path):
+    app = FakeApp()
+    with excel.excel_session(lambda: (app, True)):
+        book = excel.open_workbook(str(tmp_path / "a.xlsm"))
+        excel.save_workbook(book)
+        assert app.calculation == "manual"
+        excel.save_workbook(book, str(tmp_path / "b.xlsm"))
+        assert app.calculation == "manual"
+    assert book.saved_as == [(None, "automatic"), (str(tmp_path / "b.xlsm"), "automatic")]
+
+
+def test_nothing_applied_without_a_workbook():
+    app = FakeApp()
+    with excel.excel_session(lambda: (app, True)):
+        pass
+    assert settings(app) == ORIGINAL
+
+
+class LockedEventsApp(FakeApp):
+    """enable_events is locked, e.g. by a policy"""
+
+    @property
+    def enable_events(self):
+        return True
+
+    @enable_events.setter
+    def enable_events(self, value):
+        if not value:
+            raise RuntimeError("Access denied")
+
+
+def test_failed_setting_is_logged(tmp_path, caplog):
+    app = LockedEventsApp()
+    with caplog.at_level(logging.WARNING, logger=excel.__name__):
+        with excel.excel_session(lambda: (app, True)):
+            excel.open_workbook(os.path.join(str(tmp_path), "a.xlsm"))
+            assert app.calculation == "manual"
+    assert "enable_events" in caplog.text
+    assert app.calculation == "automatic"
@@ -0,0 +1,56 @@
+"""explorer.Explorer paging on a snapshot with small row groups"""
+import json
+import os
+from datetime import date, timedelta
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from cpw_engine.explorer import SNAPSHOT_INDEX, SNAPSHOT_SCHEMA, Explorer, filter_expression
+
+
+@pytest.fixture
+def explorer(tmp_path):
+    index = {}
+    for part in range(2):
+        rows = 1000
+        weeks = [date(2025, 1, 6) + timedelta(weeks=i // 100) for i in range(rows)]
+        table = pa.table({
+            "Dataset": ["GBA export"] * rows,
+            "BA": [f"BA{part}"] * rows,
+            "GBA": [f"G{i % 3}" for i in range(rows)],
+            "Department": ["D"] * rows,
+            "Resource": [f"R{i % 7}" for i in range(rows)],
+            "Week": [None if i % 50 == 0 else w for i, w in enumerate(weeks)],
+            "Date": weeks,
+            "Project Number": [str(i) for i in range(rows)],
+            "Project Name": ["P"] * rows,
+            "Unique Code": [f"{part}-{i}" for i in range(rows)],
+            "Source": ["test"] * rows,
+        }, schema=SNAPSHOT_SCHEMA)
+        file_name = f"part-{part}.parquet"
+        pq.write_table(table, str(tmp_path / file_name), row_group_size=64)
+        index[f"key{part}"] = {"fingerprint": [], "file": file_name, "rows": rows}
+    with open(os.path.join(tmp_path, SNAPSHOT_INDEX), "w", encoding="utf-8") as f:
+        json.dump(index, f)
+    return Explorer(str(tmp_path))
+
+
+@pytest.mark.parametrize("filters", [
+    None,
+    {"GBA": ["G1"], "Resource": ["R2", "R5"]},
+    {"BA": ["BA1"], "Week": (date(2025, 1, 20), date(2025, 2, 10))},
+])
+def test_every_page_matches_a_full_scan(explorer, filters):
+    expected = explorer.dataset.to_table(filter=filter_expression(filters)).to_pandas()
+    assert explorer.count(filters) == len(expected)
+    page_size = 45
+    for page in range(len(expected) // page_size + 2):
+        rows = explorer.page(filters, page, page_size)
+        assert rows.equals(expected.iloc[page * page_size:(page + 1) * page_size].reset_index(drop=True))
+
+
+def test_week_range_filter_leaves_out_rows_without_a_week(explorer):
+    assert explorer.count() == 2000
+    assert explorer.count({"Week": explorer.week_range()}) == 2000 - 40
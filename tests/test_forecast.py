@@ -0,0 +1,75 @@
+"""forecast week keys, pivot and capacity on plain values, and the metrics written to a fake sheet"""
+from datetime import date
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+
+from cpw_engine.forecast import allocation_by_week, resource_capacity, week_keys, write_forecast_to_sheet
+
+TODAY = date(2026, 1, 7)  # ISO 2026-W02
+
+
+class FakeSheet:
+    """used_range values starting at sheet row 1, records every block written"""
+
+    def __init__(self, values):
+        self.name = "Forecast"
+        self.used_range = SimpleNamespace(value=values, row=1, column=1)
+        self.written = {}
+
+    def range(self, first, last):
+        sheet = self
+
+        class Block:
+            @property
+            def value(self):
+                return None
+
+            @value.setter
+            def value(self, block):
+                sheet.written[(first, last)] = block.tolist()
+
+        return Block()
+
+
+def test_week_keys_roll_the_year_over_where_the_weeks_wrap():
+    headers = ["Resource Name", "Week 51", "Week 52", "Week 01", "Week 02", "Week 03"]
+    assert week_keys(headers, TODAY) == {
+        1: "2025-W51", 2: "2025-W52", 3: "2026-W01", 4: "2026-W02", 5: "2026-W03",
+    }
+    # An explicit year anchors the columns instead of today
+    assert week_keys(["Week 52 2030", "Week 01"], TODAY) == {0: "2030-W52", 1: "2031-W01"}
+
+
+def test_allocation_by_week_sums_the_assignments_of_each_resource():
+    assignments = pd.DataFrame({
+        "Resource Name": ["A", "B", " A ", None, ""],
+        "2026-W02": [0.5, 1.0, 0.25, 1.0, 1.0],
+        "2026-W01": ["0.5", None, "n/a", 1.0, 1.0],
+    })
+    allocation = allocation_by_week(assignments)
+    assert list(allocation.columns) == ["2026-W01", "2026-W02"]
+    assert allocation.loc["A"].tolist() == [0.5, 0.75]
+    assert allocation.loc["B"].tolist() == [0.0, 1.0]
+    assert sorted(allocation.index) == ["A", "B"]
+
+
+def test_resource_capacity_falls_back_to_the_default():
+    headers = ["Resource Name", "FTE", "Week 02"]
+    body = [["A", 0.5, None], ["B", None, None], ["C", "x", None], ["D", 0, None]]
+    assert resource_capacity(body, headers).tolist() == [0.5, 1.0, 1.0, 1.0]
+    assert resource_capacity(body, ["Resource Name", "Week 02"], default=0.8).tolist() == [0.8] * 4
+
+
+def test_availability_is_capacity_minus_allocation():
+    allocation = pd.DataFrame({"2026-W01": [0.25, 1.5], "2026-W02": [0.5, 0.0]}, index=["A", "B"])
+    sheet = FakeSheet([
+        ["Resource Name", "Capacity", "Week 01", "Week 02"],
+        ["A", 0.5, None, None],
+        ["B", None, None, None],
+        ["C", None, None, None],
+    ])
+    assert write_forecast_to_sheet(sheet, allocation, "availability", today=TODAY) == 3
+    [block] = sheet.written.values()
+    assert np.allclose(block, [[0.25, 0.0], [-0.5, 1.0], [1.0, 1.0]])
@@ -0,0 +1,88 @@
+"""ExportJournal through export_team_data_to_files with fake workbooks: reruns skip saved targets"""
+import os
+from types import SimpleNamespace
+
+import pytest
+
+from cpw_engine import team
+from cpw_engine.events import silent_reporter
+from cpw_engine.journal import SAVED, WRITTEN, ExportJournal
+
+GROUPS = {
+    "Team X": [["05-Jan-2026", 1, "P1 - A", "P1", "Alpha", "A"]],
+    "Team Y": [["05-Jan-2026", 2, "P2 - B", "P2", "Beta", "B"]],
+}
+
+
+@pytest.fixture
+def fake_excel(tmp_path, monkeypatch):
+    """Existing Team workbooks for GROUPS; records the row writes, fails the saves listed in failing"""
+    folder = tmp_path / "03 Department Workbooks"
+    folder.mkdir()
+    for name in GROUPS:
+        (folder / f"CPW Tool_{name}_Team.xlsm").touch()
+    excel = SimpleNamespace(writes=[], saves=[], failing=set(), next_row=10)
+
+    def open_workbook(path):
+        return SimpleNamespace(path=path, close=lambda: None)
+
+    def write_team_rows(ws_target, next_row, projects):
+        excel.writes.append((os.path.basename(ws_target.path), next_row))
+
+    def save_workbook(book, path=None):
+        if os.path.basename(book.path) in excel.failing:
+            raise OSError("file is locked")
+        excel.saves.append(os.path.basename(book.path))
+
+    monkeypatch.setattr(team, "get_team_project_details", lambda sheet, start_row, columns: dict(GROUPS))
+    monkeypatch.setattr(team, "open_workbook", open_workbook)
+    monkeypatch.setattr(team, "oracle_sheet", lambda book: book)
+    monkeypatch.setattr(team, "next_team_row", lambda ws: excel.next_row)
+    monkeypatch.setattr(team, "write_team_rows", write_team_rows)
+    monkeypatch.setattr(team, "finish_team_workbook", lambda book, reporter, name: None)
+    monkeypatch.setattr(team, "save_workbook", save_workbook)
+    excel.folder = folder
+    return excel
+
+
+def export(tmp_path, journal):
+    return team.export_team_data_to_files(None, str(tmp_path), 2, silent_reporter(), journal)
+
+
+def test_rerun_skips_saved_targets_and_retries_failed_ones_at_their_row(tmp_path, fake_excel):
+    source = tmp_path / "gba.xlsm"
+    source.touch()
+    journal_for = lambda **kw: ExportJournal.for_run(str(fake_excel.folder), "team", str(source), 2, **kw)
+
+    fake_excel.failing = {"CPW Tool_Team Y_Team.xlsm"}
+    export(tmp_path, journal_for())
+    assert fake_excel.saves == ["CPW Tool_Team X_Team.xlsm"]
+    journal = journal_for()
+    statuses = {os.path.basename(t): e["status"] for t, e in journal.entries.items()}
+    assert statuses == {"CPW Tool_Team X_Team.xlsm": SAVED, "CPW Tool_Team Y_Team.xlsm": WRITTEN}
+
+    # The failed rows were written in memory only, the rerun writes them at the same row
+    fake_excel.failing, fake_excel.next_row, fake_excel.writes = set(), 11, []
+    summary = export(tmp_path, journal)
+    assert summary["skipped"] == ["CPW Tool_Team X_Team.xlsm"]
+    assert fake_excel.writes == [("CPW Tool_Team Y_Team.xlsm", 10)]
+    assert fake_excel.saves == ["CPW Tool_Team X_Team.xlsm", "CPW Tool_Team Y_Team.xlsm"]
+
+    # A fresh run ignores what was recorded and writes every target again
+    fake_excel.writes = []
+    summary = export(tmp_path, journal_for(resume=False))
+    assert summary["skipped"] == []
+    assert fake_excel.writes == [("CPW Tool_Team X_Team.xlsm", 11), ("CPW Tool_Team Y_Team.xlsm", 11)]
+
+
+def test_a_changed_source_gets_a_new_journal(tmp_path):
+    source = tmp_path / "gba.xlsm"
+    source.write_text("week 1")
+    first = ExportJournal.for_run(str(tmp_path), "team", str(source), 2)
+    first.mark("target.xlsm", SAVED, "abc")
+    assert ExportJournal.for_run(str(tmp_path), "team", str(source), 2).is_saved("target.xlsm", "abc")
+
+    source.write_text("week 2, more rows")
+    assert not ExportJournal.for_run(str(tmp_path), "team", str(source), 2).entries
+    # Another payload for the same target is not skipped either
+    assert not first.is_saved("target.xlsm", "def")
@@ -0,0 +1,39 @@
+"""pfp.load_excel_cached and the PFP stage pool"""
+import os
+
+import pandas as pd
+
+from cpw_engine.batch import run_pfp_stage
+from cpw_engine.pfp import load_excel_cached
+
+
+def test_cache_keeps_one_parse_per_file(tmp_path):
+    source = str(tmp_path / "pfp.xlsx")
+    cache_dir = str(tmp_path / "cache")
+    os.makedirs(cache_dir)
+    (tmp_path / "cache" / "legacy.pkl").write_bytes(b"not a pickle")
+
+    pd.DataFrame({"Project Number": [1, 2], "Employee Name": ["A", "B"]}).to_excel(source, index=False)
+    first = load_excel_cached(source, cache_dir)
+    assert load_excel_cached(source, cache_dir).equals(first)
+
+    pd.DataFrame({"Project Number": [3], "Employee Name": ["C"]}).to_excel(source, index=False)
+    os.utime(source, ns=(0, os.stat(source).st_mtime_ns + 10**9))
+    assert load_excel_cached(source, cache_dir)["Employee Name"].tolist() == ["C"]
+    assert [name.endswith(".parquet") for name in os.listdir(cache_dir)] == [True]
+
+
+def test_mixed_columns_are_returned_without_caching(tmp_path):
+    source = str(tmp_path / "pfp.xlsx")
+    cache_dir = str(tmp_path / "cache")
+    pd.DataFrame({"Project Number": [1, "P-2"]}).to_excel(source, index=False)
+    assert load_excel_cached(source, cache_dir)["Project Number"].tolist() == [1, "P-2"]
+    assert os.listdir(cache_dir) == []
+
+
+def test_pfp_stage_runs_on_spawned_processes_and_threads(tmp_path):
+    manifest = {"Belgium": str(tmp_path / "missing"), "France": str(tmp_path / "missing too")}
+    for processes in (True, False):
+        report = run_pfp_stage(manifest, workers=2, cache_dir=str(tmp_path / "cache"), processes=processes)
+        assert [e["ba"] for e in report] == ["Belgium", "France"]
+        assert all(e["status"] == "failed" and "RAW PFP" in e["error"] for e in report)
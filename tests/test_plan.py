@@ -0,0 +1,81 @@
+"""plan_team_export on small workbooks: actions, row ranges and the cached next rows of existing targets"""
+import os
+
+from openpyxl import Workbook
+
+from cpw_engine import plan
+from cpw_engine.journal import SAVED, ExportJournal, payload_checksum
+from cpw_engine.team import group_team_rows
+
+HEADERS = ["Oracle Date", "Index", "Unique Code", "Project Number", "Project Name", "Resource Name", "Department Name"]
+ROWS = [
+    ["05-Jan-2026", 1, "P1 - A", "P1", "Alpha", "A", "Team X"],
+    ["05-Jan-2026", 2, "P2 - B", "P2", "Beta", "B", "Team X"],
+    ["05-Jan-2026", 3, "P3 - C", "P3", "Gamma", "C", "Team Y"],
+]
+
+
+def save_sheet(path, name: str, rows):
+    book = Workbook()
+    sheet = book.active
+    sheet.title = name
+    for row in rows:
+        sheet.append(row)
+    book.save(path)
+
+
+def package(tmp_path):
+    """A GBA workbook with ROWS and an existing Team X workbook whose Oracle rows 5-7 are filled"""
+    gba_folder = tmp_path / "02 GBA Workbooks"
+    team_folder = tmp_path / "03 Department Workbooks"
+    gba_folder.mkdir()
+    team_folder.mkdir()
+    gba_workbook = str(gba_folder / "CPW Tool_GBA 1_Main.xlsm")
+    save_sheet(gba_workbook, "Project Plan Analysis", [HEADERS] + ROWS)
+    save_sheet(team_folder / "CPW Tool_Team X_Team.xlsm", "Oracle", [[None]] * 4 + [[None] * 4 + ["x"]] * 3)
+    return gba_workbook, team_folder
+
+
+def counting(monkeypatch) -> list:
+    """Counts the headless next-row reads of the Team plan"""
+    calls = []
+    read = plan._team_next_row
+    monkeypatch.setattr(plan, "_team_next_row", lambda path: calls.append(path) or read(path))
+    return calls
+
+
+def test_plan_reads_each_unchanged_target_once(tmp_path, monkeypatch):
+    gba_workbook, team_folder = package(tmp_path)
+    calls = counting(monkeypatch)
+
+    result = plan.plan_team_export(gba_workbook)
+    targets = {t["file"]: (t["action"], t["rows"], t["first_row"], t["last_row"]) for t in result["targets"]}
+    assert targets == {
+        "CPW Tool_Team X_Team.xlsm": (plan.UPDATE, 2, 8, 9),
+        "CPW Tool_Team Y_Team.xlsm": (plan.CREATE, 1, 5, 5),
+    }
+    assert (result["create"], result["update"], result["done"], result["rows"]) == (1, 1, 0, 3)
+    assert len(calls) == 1
+    assert os.path.exists(team_folder / plan.PLAN_INDEX_FILE)
+
+    # The index answers for the unchanged workbook, a changed one is read again
+    plan.plan_team_export(gba_workbook)
+    assert len(calls) == 1
+    save_sheet(team_folder / "CPW Tool_Team X_Team.xlsm", "Oracle", [[None]] * 4 + [[None] * 4 + ["x"]])
+    result = plan.plan_team_export(gba_workbook)
+    assert len(calls) == 2
+    assert result["targets"][0]["first_row"] == 6
+
+
+def test_targets_the_journal_saved_are_done(tmp_path):
+    gba_workbook, team_folder = package(tmp_path)
+    # The rows as the plan reads them (numbers as floats), so the checksums match
+    rows = group_team_rows(plan.read_sheet_values(gba_workbook, "Project Plan Analysis"))["Team Y"]
+    journal = ExportJournal.for_run(str(team_folder), "team", gba_workbook, 2)
+    journal.mark(str(team_folder / "CPW Tool_Team Y_Team.xlsm"), SAVED, payload_checksum(rows), start_row=5)
+
+    result = plan.plan_team_export(gba_workbook)
+    assert [t["action"] for t in result["targets"]] == [plan.UPDATE, plan.DONE]
+    assert result["rows"] == 2
+    # A fresh plan ignores the journal
+    assert plan.plan_team_export(gba_workbook, resume=False)["done"] == 0
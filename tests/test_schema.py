@@ -0,0 +1,51 @@
+"""schema.validate_file on small workbooks: header-only checks and the compiled ColumnMap"""
+import importlib.util
+
+import pytest
+from openpyxl import Workbook
+
+from cpw_engine.schema import GBA_SOURCE, GBA_WORKBOOK, SchemaError, validate_file
+
+
+def workbook(path, sheets: dict) -> str:
+    """Writes sheet name -> rows into path"""
+    book = Workbook()
+    book.remove(book.active)
+    for name, rows in sheets.items():
+        sheet = book.create_sheet(name)
+        for row in rows:
+            sheet.append(row)
+    book.save(path)
+    return str(path)
+
+
+def test_columns_map_to_their_positions(tmp_path):
+    path = workbook(tmp_path / "source.xlsx", {"Sheet1": [
+        ["Employee Name", " Project Number ", None, "Expenditure Organization Name", "Project Number"],
+        ["A", "P1", None, "GBA 1", "P9"],
+    ]})
+    columns = validate_file(path, GBA_SOURCE)
+    # Whitespace is ignored and the first of two equal headers wins; Project Name is optional
+    assert dict(columns) == {"Project Number": 1, "Employee Name": 0, "Expenditure Organization Name": 3}
+    assert columns.position("Project Name") == -1
+
+
+def test_missing_columns_and_sheets_are_reported(tmp_path):
+    path = workbook(tmp_path / "source.xlsx", {"Sheet1": [["Project Number", "Project Name"]]})
+    with pytest.raises(SchemaError) as error:
+        validate_file(path, GBA_SOURCE)
+    assert error.value.missing == ["Employee Name", "Expenditure Organization Name"]
+    assert "source.xlsx" in str(error.value)
+
+    # GBA_WORKBOOK is checked on its own sheet, not the first one
+    with pytest.raises(SchemaError) as error:
+        validate_file(path, GBA_WORKBOOK)
+    assert error.value.missing == ['sheet "Project Plan Analysis"']
+
+
+@pytest.mark.skipif(importlib.util.find_spec("xlrd") is not None, reason="xlrd is installed")
+def test_xls_without_xlrd_says_what_to_do(tmp_path):
+    path = tmp_path / "legacy.xls"
+    path.write_bytes(b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1" + b"\0" * 504)
+    with pytest.raises(ValueError, match="xlrd"):
+        validate_file(str(path), GBA_SOURCE)
@@ -0,0 +1,21 @@
+"""team.group_team_rows on a plain block: rows from start_row grouped by department, as plain lists"""
+from cpw_engine.team import group_team_rows
+
+HEADERS = ["Oracle Date", "Index", "Unique Code", "Project Number", "Project Name", "Resource Name", "Department Name"]
+
+
+def test_groups_are_plain_lists_for_the_range_write():
+    block = [
+        HEADERS,
+        ["05-Jan-2026", 1, "P1 - A", "P1", "Alpha", "A", "Team X"],   # before start_row
+        ["05-Jan-2026", 2, "P2 - B", "P2", None, "B", "Team Y"],
+        ["05-Jan-2026", 3, "P3 - C", "P3", "Gamma", "C", "  "],       # no team
+        ["05-Jan-2026", 4, "P4 - D", "P4", "Delta", "D", "Team X"],
+    ]
+    groups = group_team_rows(block, start_row=3)
+    assert groups == {
+        "Team Y": [["05-Jan-2026", 2, "P2 - B", "P2", "", "B"]],
+        "Team X": [["05-Jan-2026", 4, "P4 - D", "P4", "Delta", "D"]],
+    }
+    assert all(type(rows) is list and all(type(row) is list for row in rows) for rows in groups.values())
+    assert type(groups["Team X"][0][1]) is int
@@ -0,0 +1,107 @@
+"""RawDataWatcher with a fake clock and a fake process_ba_pfp: settling, baseline and retry backoff"""
+import os
+from types import SimpleNamespace
+
+import pytest
+
+from cpw_engine import batch, watch
+from cpw_engine.events import silent_reporter
+
+T0 = 1_000_000.0
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = SimpleNamespace(now=T0)
+    monkeypatch.setattr(watch, "time", SimpleNamespace(time=lambda: clock.now))
+    return clock
+
+
+@pytest.fixture
+def runs(monkeypatch):
+    """Calls of process_ba_pfp; each returns the next of runs.results (default: ok)"""
+    runs = SimpleNamespace(calls=[], results=[])
+
+    def process_ba_pfp(ba, pfp_folder, cache_dir, raw_file=None):
+        runs.calls.append(os.path.basename(raw_file))
+        error = runs.results.pop(0) if runs.results else ""
+        return {"status": "failed" if error else "ok", "error": error, "pfp_seconds": 0.1, "new_rows": 3}
+
+    monkeypatch.setattr(batch, "process_ba_pfp", process_ba_pfp)
+    return runs
+
+
+def extract(pfp_folder, name: str, content: bytes = b"data") -> str:
+    raw_folder = pfp_folder / "Raw Data"
+    raw_folder.mkdir(parents=True, exist_ok=True)
+    path = raw_folder / name
+    path.write_bytes(content)
+    return str(path)
+
+
+def watcher(pfp_folder) -> watch.RawDataWatcher:
+    return watch.RawDataWatcher({"BA": str(pfp_folder)}, cache_dir=str(pfp_folder / "cache"), settle_seconds=5,
+                                reporter=silent_reporter())
+
+
+def test_a_new_extract_is_processed_once_it_settled(tmp_path, clock, runs):
+    old = extract(tmp_path, "old.xlsx")
+    w = watcher(tmp_path)
+    path = extract(tmp_path, "new.xlsx")
+
+    w.scan()
+    clock.now += 4
+    w.scan()
+    assert runs.calls == []
+    # Still being copied: a change restarts the settle time
+    extract(tmp_path, "new.xlsx", b"more data")
+    clock.now += 2
+    w.scan()
+    clock.now += 4
+    w.scan()
+    assert runs.calls == []
+    clock.now += 1
+    w.scan()
+    assert runs.calls == ["new.xlsx"]
+
+    clock.now += 60
+    w.scan()
+    assert runs.calls == ["new.xlsx"]
+    assert watch.processed_entry(path)["new_rows"] == 3
+    # The extract present at start-up is left alone
+    assert watch.load_state(str(tmp_path))[os.path.abspath(old)]["status"] == watch.BASELINE
+
+
+def test_a_failed_extract_is_retried_with_backoff_until_it_gives_up(tmp_path, clock, runs):
+    w = watcher(tmp_path)
+    path = extract(tmp_path, "new.xlsx")
+    runs.results = ["locked"] * watch.MAX_ATTEMPTS
+    w.scan()
+    clock.now += 5
+    w.scan()
+    assert len(runs.calls) == 1
+
+    for attempt in range(1, watch.MAX_ATTEMPTS):
+        backoff = watch.RETRY_BACKOFF * 2 ** (attempt - 1)
+        entry = watch.failed_entry(path)
+        assert (entry["attempts"], entry["retry_at"]) == (attempt, clock.now + backoff)
+        clock.now += backoff - 1
+        w.scan()
+        assert len(runs.calls) == attempt
+        clock.now += 1
+        w.scan()
+        assert len(runs.calls) == attempt + 1
+
+    entry = watch.failed_entry(path)
+    assert (entry["attempts"], entry["retry_at"], entry["error"]) == (watch.MAX_ATTEMPTS, None, "locked")
+    clock.now += 10 * watch.RETRY_BACKOFF * 2 ** watch.MAX_ATTEMPTS
+    w.scan()
+    assert len(runs.calls) == watch.MAX_ATTEMPTS
+
+    # Replacing the file starts over
+    extract(tmp_path, "new.xlsx", b"fixed extract")
+    w.scan()
+    clock.now += 5
+    w.scan()
+    assert len(runs.calls) == watch.MAX_ATTEMPTS + 1
+    assert watch.processed_entry(path)["attempts"] == 0
@@ -0,0 +1,80 @@
+"""weeks.HistoryStore on small frames"""
+import os
+from datetime import date, timedelta
+
+import pandas as pd
+
+from cpw_engine.weeks import DEFAULT_REBASE_EVERY, HistoryStore, prune_snapshots
+
+
+def week(n: int) -> str:
+    return str(date(2025, 1, 6) + timedelta(weeks=n))
+
+
+def frame(n: int) -> pd.DataFrame:
+    """Week n: 100 codes, the value of one row changed per week, one code added per week"""
+    codes = [f"P{i} - Employee {i}" for i in range(100 + n)]
+    values = [-i if i < n else i for i in range(len(codes))]
+    return pd.DataFrame({"Unique Code": codes, "Project Number": values, "Task": [f"{i:03d}" for i in values],
+                         "Start": pd.Timestamp("2025-01-06")})
+
+
+def test_a_new_base_every_rebase_every_weeks(tmp_path):
+    store = HistoryStore(str(tmp_path))
+    for n in range(2 * DEFAULT_REBASE_EVERY + 1):
+        store.add_week(frame(n), week(n))
+    bases = [i for i, w in enumerate(store.weeks) if w["kind"] == "base"]
+    assert bases == [0, DEFAULT_REBASE_EVERY, 2 * DEFAULT_REBASE_EVERY]
+
+
+def test_state_as_of_rebuilds_every_week(tmp_path):
+    store = HistoryStore(str(tmp_path), rebase_every=3)
+    for n in range(7):
+        store.add_week(frame(n), week(n))
+    for n in range(7):
+        state = store.state_as_of(week(n)).drop(columns=["_row_hash"]).sort_values("Unique Code")
+        expected = frame(n).sort_values("Unique Code")
+        assert state.to_numpy().tolist() == expected.to_numpy().tolist()
+
+
+def test_compare_weeks_returns_typed_new_rows(tmp_path):
+    store = HistoryStore(str(tmp_path))
+    for n in range(3):
+        store.add_week(frame(n), week(n))
+    new, stats = store.compare_weeks(week(0), week(2))
+    assert new["Unique Code"].tolist() == ["P100 - Employee 100", "P101 - Employee 101"]
+    assert new["Project Number"].tolist() == [100, 101]
+    assert new["Task"].tolist() == ["100", "101"]
+    assert pd.api.types.is_integer_dtype(new["Project Number"])
+    assert pd.api.types.is_datetime64_any_dtype(new["Start"])
+    assert stats == {"prev_unique_codes": 100, "current_unique_codes": 102, "new_entries": 2,
+                     "existing_entries": 100}
+
+
+def test_text_keeps_leading_zeros_and_mixed_columns_are_stored(tmp_path):
+    store = HistoryStore(str(tmp_path))
+    first = pd.DataFrame({"Unique Code": ["001 - A", "002 - B"], "Project Number": ["001", "002"],
+                          "Hours": [1, "n/a"]})
+    store.add_week(first, week(0))
+    store.add_week(first.iloc[:1], week(1))
+    state = store.state_as_of(week(0)).sort_values("Unique Code")
+    assert state["Project Number"].tolist() == ["001", "002"]
+    assert state["Hours"].tolist() == ["1", "n/a"]
+    assert store.state_as_of(week(1))["Unique Code"].tolist() == ["001 - A"]
+
+
+def test_stores_opened_before_another_write_do_not_drop_its_week(tmp_path):
+    app, watcher = HistoryStore(str(tmp_path)), HistoryStore(str(tmp_path))
+    app.add_week(frame(0), week(0))
+    watcher.add_week(frame(1), week(1))
+    assert HistoryStore(str(tmp_path)).week_dates() == [week(0), week(1)]
+
+
+def test_prune_skips_files_without_a_date(tmp_path):
+    for n in range(3):
+        frame(n).to_excel(tmp_path / f"Project Plan Analysis-continuous-{week(n)}.xlsx", index=False)
+    (tmp_path / "Project Plan Analysis-continuous-copy.xlsx").write_bytes(b"")
+    HistoryStore.for_folder(str(tmp_path)).import_folder(str(tmp_path))
+    deleted = prune_snapshots(str(tmp_path), keep=2)
+    assert [os.path.basename(p) for p in deleted] == [f"Project Plan Analysis-continuous-{week(0)}.xlsx"]
+    assert (tmp_path / "Project Plan Analysis-continuous-copy.xlsx").exists()
@@ -0,0 +1,125 @@
+"""run_local_workers against a fake executor (no Excel): exclusive claims and lease takeover"""
+import json
+import os
+import sqlite3
+import time
+
+from cpw_engine import workqueue
+
+
+def _source(tmp_path, gba_values=()) -> str:
+    """A source file path in the package layout, with existing GBA workbooks for gba_values"""
+    package = tmp_path / "CPW FINAL PACKAGE"
+    (package / "01 Data Processing").mkdir(parents=True)
+    (package / "02 GBA Workbooks").mkdir()
+    for gba in gba_values:
+        (package / "02 GBA Workbooks" / f"CPW Tool_{gba}_Main.xlsm").touch()
+    return str(package / "01 Data Processing" / "New_PFP_2025-01-06.xlsx")
+
+
+def _record(shard, event: str):
+    line = json.dumps({"shard": shard["id"], "pid": os.getpid(), "event": event, "at": time.time()})
+    with open(f"{shard['source']}.log", "a", encoding="utf-8") as f:
+        f.write(line + "\n")
+
+
+def _events(source: str) -> list:
+    with open(f"{source}.log", encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def quick_execute(shard, reporter):
+    _record(shard, "start")
+    reporter.progress("writing...")
+    time.sleep(0.2)
+    _record(shard, "end")
+    return {"created": shard["targets"], "updated": [], "skipped": []}
+
+
+def hanging_execute(shard, reporter):
+    """The first attempt hangs without reporting progress, like a stuck Excel"""
+    _record(shard, "start")
+    marker = f"{shard['source']}.hung"
+    if not os.path.exists(marker):
+        open(marker, "w").close()
+        time.sleep(4)
+    _record(shard, "end")
+    return {"created": shard["targets"], "updated": [], "skipped": []}
+
+
+def test_each_shard_is_claimed_by_one_worker_at_a_time(tmp_path):
+    queue_path = str(tmp_path / "queue.db")
+    gba_values = [f"GBA {i}" for i in range(8)]
+    # Existing workbooks, so shards do not all lock the template to create theirs
+    source = _source(tmp_path, gba_values)
+    queue = workqueue.WorkQueue(queue_path)
+    assert queue.enqueue("gba", source, gba_values, shard_size=1) == 8
+
+    codes = workqueue.run_local_workers(queue_path, 3, execute=quick_execute, poll_seconds=0.1)
+
+    assert codes == [0, 0, 0]
+    shards = queue.shards()
+    assert [s["status"] for s in shards] == [workqueue.DONE] * 8
+    assert [s["attempts"] for s in shards] == [1] * 8
+    events = _events(source)
+    starts = [e for e in events if e["event"] == "start"]
+    assert sorted(e["shard"] for e in starts) == [s["id"] for s in shards]
+    assert len({e["pid"] for e in starts}) > 1
+    # No two workers inside the same shard at once
+    for shard in shards:
+        runs = [e for e in events if e["shard"] == shard["id"]]
+        assert [e["event"] for e in runs] == ["start", "end"]
+
+
+def test_a_hung_worker_loses_its_shard_to_another(tmp_path):
+    queue_path = str(tmp_path / "queue.db")
+    source = _source(tmp_path)
+    queue = workqueue.WorkQueue(queue_path)
+    queue.enqueue("gba", source, ["GBA 1"], shard_size=1)
+
+    codes = workqueue.run_local_workers(queue_path, 2, execute=hanging_execute, poll_seconds=0.1,
+                                        lease_seconds=1.5)
+
+    assert codes == [0, 0]
+    [shard] = queue.shards()
+    assert shard["status"] == workqueue.DONE
+    assert shard["attempts"] == 2
+    starts = [e for e in _events(source) if e["event"] == "start"]
+    hung_pid, takeover_pid = starts[0]["pid"], starts[1]["pid"]
+    assert hung_pid != takeover_pid
+    assert shard["owner"].split(":")[1] == str(takeover_pid)
+    # The takeover finished while the hung worker was still stuck
+    ends = [e for e in _events(source) if e["event"] == "end"]
+    assert ends[0]["pid"] == takeover_pid
+
+
+def test_a_taken_over_worker_stops_writing(tmp_path):
+    queue_path = str(tmp_path / "queue.db")
+    source = _source(tmp_path)
+    queue = workqueue.WorkQueue(queue_path)
+    queue.enqueue("gba", source, ["GBA 1"], shard_size=1)
+    follow_up = {"kind": "team", "source": source, "groups": ["Team A"]}
+    writes = []
+
+    def execute(shard, reporter):
+        for i in range(3):
+            reporter.progress(f"Saving workbook {i}...")
+            writes.append(i)
+            if i == 0:
+                # The lease runs out, another worker claims the shard and finishes it
+                with sqlite3.connect(queue_path) as conn:
+                    conn.execute("UPDATE shards SET lease_until = 0")
+                takeover = queue.claim("other")
+                assert queue.complete(takeover["id"], "other", {"created": ["GBA 1"]})
+        return {"created": ["GBA 1"], "updated": [], "skipped": [], "follow_up": [follow_up]}
+
+    stats = workqueue.run_worker(queue_path, "late", execute=execute, poll_seconds=0.1)
+
+    assert writes == [0]
+    assert stats == {"done": 0, "failed": 0, "lost": 1}
+    [shard] = queue.shards()
+    assert (shard["status"], shard["owner"], shard["result"]) == (workqueue.DONE, "other", {"created": ["GBA 1"]})
+    # The late worker can neither renew nor complete, and queues no follow-ups
+    assert not queue.renew(shard["id"], "late")
+    assert not queue.complete(shard["id"], "late", {}, [follow_up])
+    assert len(queue.shards()) == 1
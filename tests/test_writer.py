@@ -0,0 +1,82 @@
+"""WorkbookWriter with fake workbooks: appends to one workbook within an interval share one open and save"""
+import os
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from cpw_engine import writer as writer_module
+from cpw_engine.writer import TEAM, WorkbookWriter
+
+
+@pytest.fixture
+def fake_excel(tmp_path, monkeypatch):
+    """Existing workbooks whose next free row is 10; records opens, row writes and saves"""
+    excel = SimpleNamespace(opens=[], writes=[], saves=[], failing=set())
+
+    def open_workbook(path):
+        excel.opens.append(os.path.basename(path))
+        return SimpleNamespace(name=os.path.basename(path), close=lambda: None)
+
+    def write_team_rows(ws_target, next_row, projects):
+        excel.writes.append((ws_target.name, next_row, [row[0] for row in projects]))
+
+    def save_workbook(book, path=None):
+        if book.name in excel.failing:
+            raise OSError("file is locked")
+        excel.saves.append(book.name)
+
+    monkeypatch.setattr(writer_module, "open_workbook", open_workbook)
+    monkeypatch.setattr(writer_module, "oracle_sheet", lambda book: book)
+    monkeypatch.setattr(writer_module, "next_team_row", lambda ws: 10)
+    monkeypatch.setattr(writer_module, "write_team_rows", write_team_rows)
+    monkeypatch.setattr(writer_module, "finish_team_workbook", lambda book, reporter, name: None)
+    monkeypatch.setattr(writer_module, "save_workbook", save_workbook)
+    for name in ("X", "Y"):
+        (tmp_path / f"CPW Tool_{name}_Team.xlsm").touch()
+    excel.target = lambda name: str(tmp_path / f"CPW Tool_{name}_Team.xlsm")
+    return excel
+
+
+def new_writer(flush_interval: float) -> WorkbookWriter:
+    return WorkbookWriter(flush_interval, app_factory=lambda: (SimpleNamespace(), False))
+
+
+def test_sessions_within_one_interval_share_one_save(fake_excel):
+    writer = new_writer(0.5)
+    futures = {}
+
+    def session(i):
+        futures[i] = writer.submit(TEAM, fake_excel.target("X"), "template.xlsm", [[f"s{i}-r1"], [f"s{i}-r2"]], "X")
+
+    threads = [threading.Thread(target=session, args=(i,)) for i in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # The same rows again (e.g. a double click) are written once
+    again = writer.submit(TEAM, fake_excel.target("X"), "template.xlsm", [["s0-r1"], ["s0-r2"]], "X")
+    results = {i: future.result(timeout=10) for i, future in futures.items()}
+    assert again.result(timeout=10) == results[0]
+    writer.stop()
+
+    assert fake_excel.opens == fake_excel.saves == ["CPW Tool_X_Team.xlsm"]
+    assert writer.stats == {"requests": 4, "flushes": 1, "saves": 1}
+    # Appended one after the other in arrival order, each session learns where its rows went
+    assert [row for _, row, _ in fake_excel.writes] == [10, 12, 14]
+    for _, row, rows in fake_excel.writes:
+        session_index = int(rows[0][1])
+        assert results[session_index]["start_row"] == row
+
+
+def test_a_failed_save_only_fails_its_own_workbook(fake_excel):
+    fake_excel.failing = {"CPW Tool_Y_Team.xlsm"}
+    writer = new_writer(0.2)
+    ok = writer.submit(TEAM, fake_excel.target("X"), "template.xlsm", [["x1"]], "X")
+    failed = writer.submit(TEAM, fake_excel.target("Y"), "template.xlsm", [["y1"]], "Y")
+
+    assert ok.result(timeout=10) == {"start_row": 10, "rows": 1, "created": False, "warnings": []}
+    with pytest.raises(OSError, match="locked"):
+        failed.result(timeout=10)
+    writer.stop()
+    assert fake_excel.saves == ["CPW Tool_X_Team.xlsm"]